@@ -1,291 +1,887 @@
 import random
-from enums import AIPersonality
+import time
+from enums import AIPersonality, PowerUpType
+from bitboard import full_mask, board_to_masks, iter_bits, neighbour_masks, powerups_to_mask
+from solver import load_solution_table, WIN_SCORE as TABLE_WIN_SCORE
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+from search_trace import NullTrace
+from opponent import load_opponent_model, position_key
+from linecount import LineCounts
+from parallel import root_search_pool, search_workers
+import config
+
+# Personalities that play perfectly and can read their move from the solution table
+# (LEARNING only until the opponent model knows something)
+OPTIMAL_PERSONALITIES = (AIPersonality.BALANCED, AIPersonality.LEARNING)
+
+# Terminal scores are WIN_SCORE minus the distance to the win, kept well above
+# any heuristic value so cached results can be re-based between searches
+WIN_SCORE = 100000
+WIN_THRESHOLD = WIN_SCORE - 1000
+DEADLINE_CHECK_NODES = 256  # Nodes between reads of the clock for the move's deadline
+
+# Search moves are ints: the cell in the low byte, the powerup the move
+# triggers (a PowerUpType value, 0 for none) above it and, for a SWAP, the
+# target cell + 1 above that (0 when there is nothing to swap with)
+CELL_MASK = 0xFF
+KIND_SHIFT = 8
+TARGET_SHIFT = 10
+ORDER_MASK = (1 << TARGET_SHIFT) - 1  # Cell and powerup kind, the part of a move static ordering looks at
+BLOCK = PowerUpType.BLOCK.value
+SWAP = PowerUpType.SWAP.value
+WILD = PowerUpType.WILDCARD.value
+
+class SearchCancelled(Exception):
+    """Raised inside a search when its cancel event is set"""
+
 
 class AIEngine:
     def __init__(self, game):
         self.game = game
-        self.tree_nodes = []
-        self.pruned_nodes = []
+        self.trace = NullTrace()  # Search tree recording, only when something displays it
+        self.metrics = None  # SearchMetrics collecting per-search telemetry (see set_metrics)
+        self.node_count = 0  # Nodes visited or pruned in the last search
+        self.pruned_count = 0
         self.current_eval = 0
-        self.transposition_table = {}  # Cache for evaluated positions
-    
+        self.search_generation = 0  # Bumped whenever the trace or eval changes
+        self.cancel_event = None  # threading.Event that aborts the running search
+        self.deadline = None  # perf_counter time after which the search stops deepening
+        self.timed_out = False
+        self.shared_alpha = None  # Root bound shared by a parallel search's workers (set in workers only)
+        # Cache for evaluated positions, kept across moves and games
+        self.transposition_table = TranspositionTable(config.TT_MAX_ENTRIES, config.TT_MAX_BYTES)
+        # Searches that prune with the opponent model get values that only hold
+        # against this human, so they are cached apart (created on first use)
+        self.learning_table = None
+        self.table = self.transposition_table  # The cache the running search uses
+
+        # Bitboard search state, loaded from the game board by load_position()
+        self.size = game.BOARD_SIZE
+        self.win_length = game.WIN_LENGTH
+        self.cells = self.size * self.size
+        self.full = full_mask(self.size)
+        self.counts = LineCounts(self.size, self.win_length)  # Kept in step with the bitboards
+        self.mcts = None  # Tree search for the MCTS personality, built on first use and reused across turns
+        self.mcts_stats = None  # Visits and value of the last MCTS search, for display
+        # Large boards only search empty cells near existing marks
+        self.neighbour_masks = neighbour_masks(self.size, config.AI_NEIGHBOR_RADIUS) if self.size > 4 else None
+
+        # Move ordering: static priorities indexed by move & ORDER_MASK (cells on
+        # more winning lines first; as in generate_moves, wildcards ahead of
+        # everything and swaps last), plus per-search killer moves and history scores
+        line_counts = [len(lines) for lines in self.counts.cell_lines]
+        line_counts += [0] * (CELL_MASK + 1 - len(line_counts))
+        kind_bonus = {WILD: 100, SWAP: -100}
+        self.move_priority = tuple(line_counts[move & CELL_MASK] + kind_bonus.get(move >> KIND_SHIFT, 0)
+                                   for move in range(ORDER_MASK + 1))
+        last = self.size - 1
+        self.attack_priority = tuple(  # AGGRESSIVE's center-and-corners-first order
+            0 if (row == col == self.size // 2 or (row in (0, last) and col in (0, last))) else 1
+            for row in range(self.size) for col in range(self.size))
+        # Small trees skip ordering just above the leaves, where it costs more than it saves
+        self.order_min_remaining = 1 if self.neighbour_masks is not None else 2
+        self.killers = []  # Per ply: the last two moves that caused a cutoff there
+        self.history = ({}, {})  # Per side (indexed by is_maximizing): move -> cutoff score
+        self.player_bits = 0
+        self.ai_bits = 0
+        self.blocked_bits = 0
+        # Unused powerups, one cells-wide mask per PowerUpType packed into an int
+        # (BLOCK lowest); only the human side (powerup_mark) can trigger them
+        self.powerup_bits = 0
+        self.powerup_mark = 1
+        self.swap_target = None  # (row, col) to pair with a SWAP move the search picked
+        self.personality = AIPersonality.BALANCED
+
+        # Precomputed perfect-play table (3x3 only), shared by every engine in the process
+        self.solution_table = load_solution_table(config.SOLUTION_TABLE_PATH) if self.size == 3 else None
+
+        # The human's replies learned across games, read from disk on first use
+        model_path = config.OPPONENT_MODEL_PATH
+        if model_path is not None:
+            model_path = model_path.format(size=self.size, win=self.win_length)
+        self.opponent_model = load_opponent_model(model_path, self.size, self.win_length)
+        self.use_model = False  # The running search orders and prunes the human's moves by the model
+
     def reset(self):
-        """Reset the AI engine's state"""
-        self.tree_nodes = []
-        self.pruned_nodes = []
+        """Reset the AI engine's per-search state (the transposition table is kept)"""
+        self.trace.clear()
+        self.search_generation += 1
+        self.node_count = 0
+        self.deadline_check = 0  # node_count at which the deadline is next checked
+        self.pruned_count = 0
         self.current_eval = 0
-        self.transposition_table = {}
-    
-    def get_best_move(self, personality):
-        """Get the best move based on AI personality"""
+        self.mcts_stats = None
+        self.killers = [[None, None] for _ in range(2 * self.cells + 1)]  # Enough for every ply a game can have
+        self.history = ({}, {})
+        self.pv = []  # Principal variation of the last completed iteration, root move first
+        self.completed_depth = 0  # Depth of the last completed iteration
+
+    def set_trace(self, trace):
+        """Install a search trace sink (NullTrace disables recording)"""
+        self.trace = trace
+
+    def set_metrics(self, metrics):
+        """Report every search to a SearchMetrics collector (None turns collection off)"""
+        if self.metrics is not None:
+            self.metrics.detach(self)
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.attach(self)
+
+    def load_position(self, mark=-1):
+        """Copy the game board into the engine's bitboards, seen from mark's side"""
+        player_bits, ai_bits, blocked_bits = board_to_masks(self.game.board, self.size)
+        if mark == 1:
+            # Searching for the player: swap sides so the engine is always the maximizer
+            player_bits, ai_bits = ai_bits, player_bits
+
+        powerup_bits = powerups_to_mask(self.game.powerups, self.size)
+        # The human's marks, whichever side the engine plays
+        self.set_position(player_bits, ai_bits, blocked_bits, powerup_bits, -mark)
+
+    def set_position(self, player_bits, ai_bits, blocked_bits, powerup_bits=0, powerup_mark=1):
+        """Load a position given as bitmasks, with the engine (ai_bits) as the maximizer"""
+        self.player_bits, self.ai_bits, self.blocked_bits = player_bits, ai_bits, blocked_bits
+        self.counts.clear()
+        for bits, value in ((player_bits, 1), (ai_bits, -1), (blocked_bits, 2)):
+            for cell in iter_bits(bits):
+                self.counts.place(cell, value)
+        self.powerup_bits = powerup_bits
+        self.powerup_mark = powerup_mark
+
+    def valid_moves(self):
+        """Empty cells as bit indices, in row-major order"""
+        return list(iter_bits(self.full & ~(self.player_bits | self.ai_bits | self.blocked_bits)))
+
+    def candidate_moves(self):
+        """Moves worth searching: every empty cell on small boards, cells next to a mark on large ones"""
+        if self.neighbour_masks is None:
+            return self.valid_moves()
+
+        empty = self.full & ~(self.player_bits | self.ai_bits | self.blocked_bits)
+        marks = self.player_bits | self.ai_bits
+        if not marks:
+            # Nothing to play next to yet: start in the middle
+            center = (self.size // 2) * self.size + self.size // 2
+            return [center] if empty >> center & 1 else list(iter_bits(empty))
+
+        near = 0
+        for cell in iter_bits(marks):
+            near |= self.neighbour_masks[cell]
+        return list(iter_bits(near & empty)) or list(iter_bits(empty))
+
+    def live_powerups(self):
+        """Mask of the empty cells that still hold a powerup"""
+        bits = self.powerup_bits
+        empty = self.full & ~(self.player_bits | self.ai_bits | self.blocked_bits)
+        return (bits | bits >> self.cells | bits >> 2 * self.cells) & empty
+
+    def generate_moves(self, is_maximizing):
+        """Search moves for the side to move, with powerup moves expanded for the human side"""
+        moves = self.candidate_moves()
+        if not self.powerup_bits or is_maximizing != (self.powerup_mark == -1):
+            return moves
+        live = self.live_powerups()
+        if not live:
+            return moves
+
+        if self.neighbour_masks is not None:
+            # Powerup cells are worth a look even away from the marks
+            extra = live
+            for cell in moves:
+                extra &= ~(1 << cell)
+            moves = moves + list(iter_bits(extra))
+
+        # Wildcards (an extra turn) first, swaps (one move per target) last
+        bits = self.powerup_bits
+        wild, others, swaps = [], [], []
+        for cell in moves:
+            if not live >> cell & 1:
+                others.append(cell)
+            elif bits >> cell & 1:
+                others.append(cell | BLOCK << KIND_SHIFT)
+            elif bits >> (self.cells + cell) & 1:
+                swaps.append(cell)
+            else:
+                wild.append(cell | WILD << KIND_SHIFT)
+
+        if swaps:
+            targets = self.swap_targets()
+            for cell in swaps:
+                move = cell | SWAP << KIND_SHIFT
+                if targets:
+                    others.extend(move | (target + 1) << TARGET_SHIFT for target in targets)
+                else:
+                    others.append(move)  # Nothing to swap with: the powerup is spent and the turn passes
+        return wild + others
+
+    def swap_targets(self):
+        """Occupied cells a swap can move: the opponent's marks, then blocked cells, then our own"""
+        if self.powerup_mark == 1:
+            own, other = self.player_bits, self.ai_bits
+        else:
+            own, other = self.ai_bits, self.player_bits
+        return list(iter_bits(other)) + list(iter_bits(self.blocked_bits)) + list(iter_bits(own))
+
+    def marking_cells(self, cells, mark):
+        """The cells where a move by mark puts its own mark down (BLOCK and SWAP cells don't)"""
+        if mark != self.powerup_mark or not self.powerup_bits:
+            return cells
+        no_mark = (self.powerup_bits | self.powerup_bits >> self.cells) & self.full
+        return [cell for cell in cells if not no_mark >> cell & 1]
+
+    def search_depth(self, personality, branching):
+        """Deepest iteration for a search whose root has the given number of moves
+
+        Small boards search up to 5 plies (6 for LEARNING). On large boards
+        the depth shrinks until the expected node count, about
+        branching**(depth + 1) / 2, fits config.AI_SEARCH_BUDGET.
+        config.AI_MAX_DEPTH, when set, replaces both limits.
+        """
+        if config.AI_MAX_DEPTH:
+            return config.AI_MAX_DEPTH
+        max_depth = 5
+        if personality == AIPersonality.LEARNING:
+            max_depth += 1  # Deeper search for learning AI
+        if self.neighbour_masks is None:
+            return max_depth
+
+        while max_depth > 1 and branching ** (max_depth + 1) // 2 > config.AI_SEARCH_BUDGET:
+            max_depth -= 1
+        return max_depth
+
+    def check_winner(self):
+        """Win/draw state of the loaded position, read from the line counts
+        Return: 1 for player win, -1 for AI win, 2 for draw, 0 for ongoing
+        """
+        return self.counts.winner()
+
+    def check_cancelled(self):
+        """Raise SearchCancelled if the running search has been cancelled"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise SearchCancelled()
+
+    def get_best_move(self, personality, mark=-1, cancel=None, position=None, budget=None):
+        """Get the best move based on AI personality, for the AI (-1) or the player (1)
+
+        Setting the optional cancel event (from another thread) makes the
+        search raise SearchCancelled. Minimax deepens one ply at a time;
+        once budget seconds (config.AI_MOVE_BUDGET by default) have passed,
+        the unfinished depth is dropped and the best move of the last
+        completed one returned. position, (player, ai, blocked, powerup)
+        bitmasks with the AI to move, is searched instead of the game board.
+        """
         self.reset()
-        
+        if position is None:
+            self.load_position(mark)
+        else:
+            self.set_position(*position)
+        self.personality = personality
+        self.cancel_event = cancel
+        self.deadline = time.perf_counter() + (config.AI_MOVE_BUDGET if budget is None else budget)
+        self.timed_out = False
+        self.swap_target = None
+        self.use_model = (personality == AIPersonality.LEARNING and mark == -1
+                          and self.opponent_model.has_data())
+        self.table = self.model_table() if self.use_model else self.transposition_table
+        if self.metrics is not None:
+            self.metrics.begin_search(self)
+
+        try:
+            best_move = self.choose_move(personality)
+        finally:
+            self.cancel_event = None
+            self.deadline = None
+
+        self.search_generation += 1  # Trace and eval are final for this search
+        if self.metrics is not None:
+            self.metrics.end_search(self, best_move)  # Cancelled searches aren't reported
+        return best_move
+
+    def choose_move(self, personality):
+        """Pick a move for the loaded position"""
         best_score = float('-inf')
         best_move = None
-        
-        valid_moves = self.game.get_valid_moves()
-        
+
+        valid_moves = self.candidate_moves()
+
         if not valid_moves:
             return None
-        
+
+        # Perfect play is a single read from the solution table
+        if (self.solution_table and personality in OPTIMAL_PERSONALITIES
+                and not self.use_model and not self.live_powerups()):
+            cell, score = self.solution_table.lookup(self.player_bits, self.ai_bits, self.blocked_bits)
+            if cell is not None:
+                # Table scores are 10 - plies to the win; rescale to the search's WIN_SCORE
+                if score > 0:
+                    self.current_eval = WIN_SCORE - (TABLE_WIN_SCORE - score)
+                elif score < 0:
+                    self.current_eval = -WIN_SCORE + (TABLE_WIN_SCORE + score)
+                else:
+                    self.current_eval = 0
+                return divmod(cell, self.size)
+
         # Random chance for non-optimal move based on personality
         if personality == AIPersonality.RANDOM and random.random() < 0.2:
-            best_move = random.choice(valid_moves)
+            best_move = divmod(random.choice(valid_moves), self.size)
         else:
             # Optimization: First check for winning move
-            winning_move = self.find_winning_move(valid_moves)
+            winning_move = self.find_winning_move(self.marking_cells(valid_moves, -1))
             if winning_move:
                 return winning_move
-                
+
             # Optimization: Then check for blocking move
             if personality != AIPersonality.AGGRESSIVE:
-                blocking_move = self.find_blocking_move(valid_moves)
+                blocking_move = self.find_blocking_move(self.marking_cells(valid_moves, 1))
                 if blocking_move:
                     return blocking_move
-            
-            # Standard minimax with alpha-beta pruning and transposition table
-            alpha = float('-inf')
-            beta = float('inf')
-            
-            for row, col in valid_moves:
-                self.game.board[row][col] = -1  # AI mark
-                
-                # Deeper search for more advanced personalities
-                max_depth = 5  # Simplified constant depth 
-                if personality == AIPersonality.LEARNING:
-                    max_depth += 1  # Deeper search for learning AI
-                
-                score = self.minimax_alpha_beta(0, max_depth, alpha, beta, False)
-                self.game.board[row][col] = 0  # Undo move
-                
-                if score > best_score:
-                    best_score = score
-                    best_move = (row, col)
-                    
-                alpha = max(alpha, best_score)
-        
-        self.current_eval = best_score if best_move else 0
+
+            if personality == AIPersonality.MCTS:
+                return self.choose_mcts_move(valid_moves)
+
+            # Standard minimax with alpha-beta pruning and transposition table, deepened
+            # one ply at a time until the depth limit or the move's deadline
+            moves = self.generate_moves(True)
+            max_depth = self.search_depth(personality, len(moves))
+            pool = self.search_pool(len(moves))
+
+            best = None
+            for depth in range(1, max_depth + 1):
+                self.trace.clear()  # The panel shows the deepest iteration
+                # Shallow iterations are over before the workers' round trips would pay off
+                score, move = self.search_root(moves, depth, pool if depth >= 3 else None)
+                if self.timed_out and best is not None:
+                    break  # Unfinished: the last completed depth stands
+                best_score, best = score, move
+                self.completed_depth = depth
+                # The next iteration tries this one's line first
+                self.pv = self.principal_variation(best, depth + 1)
+                moves.remove(best)
+                moves.insert(0, best)
+                if self.timed_out or abs(best_score) > WIN_THRESHOLD:
+                    break  # Out of time, or a forced result that deeper search can't change
+
+            if best is not None:
+                best_move = divmod(best & CELL_MASK, self.size)
+                target = (best >> TARGET_SHIFT) - 1
+                self.swap_target = divmod(target, self.size) if target >= 0 else None
+
+        if best_move and best_score != float('-inf'):  # Random picks leave the eval at 0
+            self.current_eval = best_score
         return best_move
-    
+
+    def search_root(self, moves, max_depth, pool=None):
+        """Search every root move to max_depth and return the first best (score, move)
+
+        With a pool the first move is searched here and the rest on its
+        workers. Stops early once the deadline passes (see timed_out).
+        """
+        alpha = best_score = float('-inf')
+        best = None
+        for move in (moves if pool is None else moves[:1]):
+            score = self.search_root_move(move, max_depth, alpha)
+            if score > best_score:
+                best_score = score
+                best = move
+            alpha = max(alpha, best_score)
+            if self.timed_out:
+                return best_score, best
+
+        if pool is not None:
+            # The first move's score bounds the others, which the workers search side by side
+            score, move = pool.search(self, moves[1:], max_depth, alpha)
+            if score > best_score:
+                best_score = score
+                best = move
+        return best_score, best
+
+    def principal_variation(self, first_move, length):
+        """The line the table expects after root move first_move, at most length moves, first_move included"""
+        line = [first_move]
+        played = []
+        move = first_move
+        is_maximizing = True
+        while True:
+            if move > CELL_MASK:
+                played.append((move, self.make_powerup_move(move)))
+                if move >> KIND_SHIFT & 3 != WILD:
+                    is_maximizing = not is_maximizing
+            else:
+                mark = -1 if is_maximizing else 1
+                self.toggle_cell(move, mark)
+                self.counts.place(move, mark)
+                played.append((move, mark))
+                is_maximizing = not is_maximizing
+            if len(line) >= length or self.counts.complete or self.counts.empty == 0:
+                break
+            entry = self.table.peek(self.get_board_hash(is_maximizing))
+            if entry is None or entry[3] is None:
+                break
+            move = entry[3]
+            line.append(move)
+
+        for move, value in reversed(played):
+            if move > CELL_MASK:
+                self.unmake_powerup_move(move, value)
+            else:
+                self.toggle_cell(move, value)
+                self.counts.remove(move, value)
+        return line
+
+    def search_root_move(self, move, max_depth, alpha):
+        """Play a root move for the engine, search the reply and undo it, returning the move's score"""
+        if move > CELL_MASK:
+            return self.search_powerup_move(move, 0, max_depth, alpha, float('inf'), True)
+        self.ai_bits |= 1 << move  # AI mark
+        self.counts.place(move, -1)
+
+        score = self.minimax_alpha_beta(0, max_depth, alpha, float('inf'), False)
+        self.ai_bits &= ~(1 << move)  # Undo move
+        self.counts.remove(move, -1)
+        return score
+
+    def search_pool(self, branching):
+        """The process pool for a parallel root search, or None to search serially
+
+        Worth it with several cores and root moves on boards from
+        config.AI_PARALLEL_MIN_SIZE up, unless the search is being traced.
+        """
+        workers = search_workers()
+        if workers < 2 or branching < 3 or self.size < config.AI_PARALLEL_MIN_SIZE or self.trace.enabled:
+            return None
+        return root_search_pool(workers, type(self))
+
+    def choose_mcts_move(self, valid_moves):
+        """Pick a move by Monte Carlo tree search and publish its statistics"""
+        from mcts import MCTS, EVAL_SCALE  # NumPy loads only for the personalities that use it
+        if self.mcts is None:
+            self.mcts = MCTS(self)
+        best, root = self.mcts.search(valid_moves)
+
+        self.node_count = self.mcts.iterations
+        self.current_eval = best.mean() * EVAL_SCALE
+        self.mcts_stats = {
+            'iterations': self.mcts.iterations,
+            'rollouts': self.mcts.rollouts,
+            'root_visits': root.visits,
+            'visits': best.visits,
+            'value': best.mean(),
+        }
+        if self.trace.enabled:
+            self.mcts.record_trace(root, self.trace)
+        return divmod(best.cell, self.size)
+
     def find_winning_move(self, valid_moves):
         """Check if AI can win in one move"""
-        for row, col in valid_moves:
-            self.game.board[row][col] = -1  # AI mark
-            if self.game.check_winner() == -1:  # AI wins
-                self.game.board[row][col] = 0  # Undo move
-                return (row, col)
-            self.game.board[row][col] = 0  # Undo move
+        for cell in valid_moves:
+            self.counts.place(cell, -1)  # AI mark
+            result = self.check_winner()
+            self.counts.remove(cell, -1)  # Undo move
+            if result == -1:  # AI wins
+                return divmod(cell, self.size)
         return None
-    
+
     def find_blocking_move(self, valid_moves):
         """Check if player can win in one move and block it"""
-        for row, col in valid_moves:
-            self.game.board[row][col] = 1  # Player mark
-            if self.game.check_winner() == 1:  # Player would win
-                self.game.board[row][col] = 0  # Undo move
-                return (row, col)
-            self.game.board[row][col] = 0  # Undo move
+        for cell in valid_moves:
+            self.counts.place(cell, 1)  # Player mark
+            result = self.check_winner()
+            self.counts.remove(cell, 1)  # Undo move
+            if result == 1:  # Player would win
+                return divmod(cell, self.size)
         return None
-    
-    def get_board_hash(self):
-        """Generate a hash of the current board state for the transposition table"""
-        return tuple(tuple(row) for row in self.game.board)
-    
+
+    def get_board_hash(self, is_maximizing):
+        """Generate a hash of the current position for the transposition table
+
+        The same powerup bits mean different moves depending on which side
+        holds them, so powerup_mark is part of the key.
+        """
+        return (self.player_bits, self.ai_bits, self.blocked_bits, is_maximizing, self.powerup_bits,
+                self.powerup_mark)
+
+    def score_to_table(self, value, depth):
+        """Make a win/loss score relative to the node instead of the search root"""
+        if value > WIN_THRESHOLD:
+            return value + depth
+        if value < -WIN_THRESHOLD:
+            return value - depth
+        return value
+
+    def score_from_table(self, value, depth):
+        """Re-base a cached win/loss score onto the current search root"""
+        if value > WIN_THRESHOLD:
+            return value - depth
+        if value < -WIN_THRESHOLD:
+            return value + depth
+        return value
+
     def minimax_alpha_beta(self, depth, max_depth, alpha, beta, is_maximizing, node_id=0, parent_id=None):
         """Minimax algorithm with alpha-beta pruning and transposition table"""
-        result = self.game.check_winner()
-        
+        # Win/draw test straight from the line counts (LineCounts.winner, inlined)
+        counts = self.counts
+        complete = counts.complete
+        if complete:
+            result = complete[min(complete)]
+        elif counts.empty == 0:
+            result = 2
+        else:
+            result = 0
+
         # Terminal state evaluation
         if result != 0:
             value = 0
             if result == 1:  # Player wins
-                value = -10 + depth  # Prefer longer paths to defeat
+                value = -WIN_SCORE + depth  # Prefer longer paths to defeat
             elif result == -1:  # AI wins
-                value = 10 - depth  # Prefer shorter paths to victory
+                value = WIN_SCORE - depth  # Prefer shorter paths to victory
             elif result == 2:  # Draw
                 value = 0
-            
-            self.tree_nodes.append((depth, node_id, parent_id, value, False))
+
+            self.node_count += 1
+            if self.trace.enabled:
+                self.trace.record(depth, node_id, parent_id, value, False)
             return value
-        
-        if depth >= max_depth:  # Depth limit
+
+        if (self.node_count >= self.deadline_check and depth < max_depth and self.deadline is not None
+                and not self.timed_out):
+            self.deadline_check = self.node_count + DEADLINE_CHECK_NODES  # The clock is read every so many nodes
+            if time.perf_counter() > self.deadline:
+                self.timed_out = True  # Out of time: finish with static evaluations
+
+        if depth >= max_depth or self.timed_out:  # Depth limit
             # Heuristic evaluation
             value = self.evaluate_board()
-            self.tree_nodes.append((depth, node_id, parent_id, value, False))
+            self.node_count += 1
+            if self.trace.enabled:
+                self.trace.record(depth, node_id, parent_id, value, False)
             return value
-        
+
+        self.check_cancelled()
+
         # Check transposition table
-        board_hash = self.get_board_hash()
-        if board_hash in self.transposition_table:
-            stored_depth, stored_value = self.transposition_table[board_hash]
-            if stored_depth >= max_depth - depth:
+        board_hash = self.get_board_hash(is_maximizing)
+        entry = self.table.get(board_hash)
+        tt_move = entry[3] if entry is not None else None
+        if entry is not None and entry[0] >= max_depth - depth:
+            stored_value = self.score_from_table(entry[1], depth)
+            flag = entry[2]
+            if flag == EXACT:
+                return stored_value
+            if flag == LOWER and stored_value > alpha:
+                alpha = stored_value
+            elif flag == UPPER and stored_value < beta:
+                beta = stored_value
+            if alpha >= beta:
                 return stored_value
-        
-        next_node_id = len(self.tree_nodes) + 1
-        
+        alpha_orig, beta_orig = alpha, beta
+
+        next_node_id = self.node_count + 1
+
         if is_maximizing:  # AI's turn (maximizing)
             max_eval = float('-inf')
-            moves = self.game.get_valid_moves()
-            
-            # Apply AI personality
-            if self.game.ai_personality == AIPersonality.AGGRESSIVE:
+            best_move = None
+            moves = self.order_moves(self.generate_moves(True), depth, True, tt_move, max_depth - depth)
+
+            # Apply AI personality (stable sorts keep the ordering above among equals)
+            if self.personality == AIPersonality.AGGRESSIVE:
                 # Prioritize center and corners
-                moves.sort(key=lambda m: 0 if (m[0] == m[1] == self.game.BOARD_SIZE//2 or 
-                                             (m[0] in [0, self.game.BOARD_SIZE-1] and 
-                                              m[1] in [0, self.game.BOARD_SIZE-1])) else 1)
-            elif self.game.ai_personality == AIPersonality.DEFENSIVE:
+                attack = self.attack_priority
+                moves.sort(key=lambda m: attack[m & CELL_MASK])
+            elif self.personality == AIPersonality.DEFENSIVE:
                 # Prioritize blocking player's potential wins
-                moves.sort(key=lambda m: self.defensive_priority(m), reverse=True)
-            elif self.game.ai_personality == AIPersonality.RANDOM and random.random() < 0.2:
+                moves.sort(key=lambda m: self.defensive_priority(m & CELL_MASK), reverse=True)
+            elif self.personality == AIPersonality.RANDOM and random.random() < 0.2:
                 # 20% chance to randomize move order
                 random.shuffle(moves)
-            
-            for i, (row, col) in enumerate(moves):
+
+            for i, move in enumerate(moves):
                 child_id = next_node_id + i
-                
-                # Make move
-                self.game.board[row][col] = -1
-                
-                # Recursive evaluation
-                eval = self.minimax_alpha_beta(depth + 1, max_depth, alpha, beta, False, child_id, node_id)
-                
-                # Undo move
-                self.game.board[row][col] = 0
-                
-                max_eval = max(max_eval, eval)
-                alpha = max(alpha, eval)
-                
+                if move > CELL_MASK:
+                    eval = self.search_powerup_move(move, depth + 1, max_depth, alpha, beta, True, child_id, node_id)
+                else:
+                    bit = 1 << move
+
+                    # Make move
+                    self.ai_bits |= bit
+                    counts.place(move, -1)
+
+                    # Recursive evaluation
+                    eval = self.minimax_alpha_beta(depth + 1, max_depth, alpha, beta, False, child_id, node_id)
+
+                    # Undo move
+                    self.ai_bits ^= bit
+                    counts.remove(move, -1)
+
+                if eval > max_eval:
+                    max_eval = eval
+                    best_move = move
+                if eval > alpha:
+                    alpha = eval
+
                 # Pruning
                 if beta <= alpha:
-                    # Mark remaining moves as pruned
-                    for j in range(i+1, len(moves)):
-                        pruned_id = next_node_id + j
-                        self.tree_nodes.append((depth + 1, pruned_id, node_id, None, True))
-                        self.pruned_nodes.append(pruned_id)
+                    if max_depth - depth >= self.order_min_remaining:  # Only ordered nodes use what it learns
+                        self.record_cutoff(move, depth, max_depth, True)
+                    self.record_pruned(moves, i, next_node_id, depth, node_id)
                     break
-            
+
             # Store in transposition table
-            self.transposition_table[board_hash] = (max_depth - depth, max_eval)
-            
-            self.tree_nodes.append((depth, node_id, parent_id, max_eval, False))
+            self.store_result(board_hash, depth, max_depth, max_eval, alpha_orig, beta_orig, best_move)
+
+            self.node_count += 1
+            if self.trace.enabled:
+                self.trace.record(depth, node_id, parent_id, max_eval, False)
             return max_eval
-        
+
         else:  # Player's turn (minimizing)
             min_eval = float('inf')
-            moves = self.game.get_valid_moves()
-            
-            for i, (row, col) in enumerate(moves):
+            best_move = None
+            moves = self.order_moves(self.generate_moves(False), depth, False, tt_move, max_depth - depth)
+            if self.use_model:
+                moves = self.predicted_moves(moves)
+
+            for i, move in enumerate(moves):
+                if i and depth == 0 and self.shared_alpha is not None:
+                    # Parallel root search: another worker may have raised the root's bound meanwhile
+                    bound = self.shared_alpha.value - 1
+                    if bound > alpha:
+                        alpha = alpha_orig = bound
+                        if beta <= alpha:
+                            self.record_pruned(moves, i - 1, next_node_id, depth, node_id)
+                            break
+
                 child_id = next_node_id + i
-                
-                # Make move
-                self.game.board[row][col] = 1
-                
-                # Recursive evaluation
-                eval = self.minimax_alpha_beta(depth + 1, max_depth, alpha, beta, True, child_id, node_id)
-                
-                # Undo move
-                self.game.board[row][col] = 0
-                
-                min_eval = min(min_eval, eval)
-                beta = min(beta, eval)
-                
+                if move > CELL_MASK:
+                    eval = self.search_powerup_move(move, depth + 1, max_depth, alpha, beta, False, child_id, node_id)
+                else:
+                    bit = 1 << move
+
+                    # Make move
+                    self.player_bits |= bit
+                    counts.place(move, 1)
+
+                    # Recursive evaluation
+                    eval = self.minimax_alpha_beta(depth + 1, max_depth, alpha, beta, True, child_id, node_id)
+
+                    # Undo move
+                    self.player_bits ^= bit
+                    counts.remove(move, 1)
+
+                if eval < min_eval:
+                    min_eval = eval
+                    best_move = move
+                if eval < beta:
+                    beta = eval
+
                 # Pruning
                 if beta <= alpha:
-                    # Mark remaining moves as pruned
-                    for j in range(i+1, len(moves)):
-                        pruned_id = next_node_id + j
-                        self.tree_nodes.append((depth + 1, pruned_id, node_id, None, True))
-                        self.pruned_nodes.append(pruned_id)
+                    if max_depth - depth >= self.order_min_remaining:  # Only ordered nodes use what it learns
+                        self.record_cutoff(move, depth, max_depth, False)
+                    self.record_pruned(moves, i, next_node_id, depth, node_id)
                     break
-            
+
             # Store in transposition table
-            self.transposition_table[board_hash] = (max_depth - depth, min_eval)
-            
-            self.tree_nodes.append((depth, node_id, parent_id, min_eval, False))
+            self.store_result(board_hash, depth, max_depth, min_eval, alpha_orig, beta_orig, best_move)
+
+            self.node_count += 1
+            if self.trace.enabled:
+                self.trace.record(depth, node_id, parent_id, min_eval, False)
             return min_eval
-    
+
+    def model_table(self):
+        """The transposition table for searches pruned by the opponent model"""
+        if self.learning_table is None:
+            self.learning_table = TranspositionTable(config.TT_MAX_ENTRIES, config.TT_MAX_BYTES)
+        return self.learning_table
+
+    def predicted_moves(self, moves):
+        """The human's moves, most often played first
+
+        Once a position has config.OPPONENT_MODEL_MIN_SAMPLES observations,
+        only the most played replies covering config.OPPONENT_MODEL_COVERAGE
+        of them are searched.
+        """
+        replies = self.opponent_model.replies(position_key(self.player_bits, self.ai_bits, self.blocked_bits,
+                                                           self.powerup_bits))
+        if not replies:
+            return moves
+        rank = {cell: i for i, cell in enumerate(replies[0::2])}
+        predicted = [move for move in moves if (move & CELL_MASK) in rank]
+        predicted.sort(key=lambda move: rank[move & CELL_MASK])
+
+        total = sum(replies[1::2])
+        if total >= config.OPPONENT_MODEL_MIN_SAMPLES:
+            covered = kept = 0
+            while covered < total * config.OPPONENT_MODEL_COVERAGE:
+                covered += replies[2 * kept + 1]
+                kept += 1
+            likely = [move for move in predicted if rank[move & CELL_MASK] < kept]
+            if likely:
+                return likely
+        return predicted + [move for move in moves if (move & CELL_MASK) not in rank]
+
+    def observe_player_move(self, row, col, position=None):
+        """Teach the opponent model the human's move in the current game position
+
+        position, (player, ai, blocked, powerup) bitmasks as get_best_move
+        takes them, stands in for the game board.
+        """
+        if position is None:
+            position = (*board_to_masks(self.game.board, self.size), powerups_to_mask(self.game.powerups, self.size))
+        self.opponent_model.observe(position_key(*position), row * self.size + col)
+
+    def end_game(self):
+        """Let the opponent model close the finished game"""
+        if self.opponent_model.end_game() and self.learning_table is not None:
+            self.learning_table.clear()  # Cached values assumed the old predictions
+
+    def search_powerup_move(self, move, depth, max_depth, alpha, beta, is_maximizing, node_id=0, parent_id=None):
+        """Play a powerup move for the side given by is_maximizing, search the child at depth and undo it"""
+        moved = self.make_powerup_move(move)
+        if move >> KIND_SHIFT & 3 != WILD:  # A wildcard gives the same side another turn
+            is_maximizing = not is_maximizing
+        value = self.minimax_alpha_beta(depth, max_depth, alpha, beta, is_maximizing, node_id, parent_id)
+        self.unmake_powerup_move(move, moved)
+        return value
+
+    def make_powerup_move(self, move):
+        """Play a move that triggers a powerup, returning the cell value it put down"""
+        cell = move & CELL_MASK
+        kind = move >> KIND_SHIFT & 3
+        self.powerup_bits ^= 1 << ((kind - 1) * self.cells + cell)  # Used up
+        if kind == SWAP:
+            target = (move >> TARGET_SHIFT) - 1
+            if target < 0:
+                return 0  # A pass
+            # The target's piece moves onto the powerup cell
+            value = self.cell_value(target)
+            self.toggle_cell(target, value)
+            self.counts.remove(target, value)
+        else:
+            value = 2 if kind == BLOCK else self.powerup_mark
+        self.toggle_cell(cell, value)
+        self.counts.place(cell, value)
+        return value
+
+    def unmake_powerup_move(self, move, value):
+        """Take back make_powerup_move, given the value it returned"""
+        cell = move & CELL_MASK
+        kind = move >> KIND_SHIFT & 3
+        self.powerup_bits ^= 1 << ((kind - 1) * self.cells + cell)
+        if not value:
+            return
+        self.toggle_cell(cell, value)
+        self.counts.remove(cell, value)
+        if kind == SWAP:
+            target = (move >> TARGET_SHIFT) - 1
+            self.toggle_cell(target, value)
+            self.counts.place(target, value)
+
+    def cell_value(self, cell):
+        """Board value of an occupied cell: 1 player, -1 AI, 2 blocked"""
+        if self.player_bits >> cell & 1:
+            return 1
+        if self.ai_bits >> cell & 1:
+            return -1
+        return 2
+
+    def toggle_cell(self, cell, value):
+        """Flip cell in the bitboard for value"""
+        bit = 1 << cell
+        if value == 1:
+            self.player_bits ^= bit
+        elif value == -1:
+            self.ai_bits ^= bit
+        else:
+            self.blocked_bits ^= bit
+
+    def order_moves(self, moves, depth, is_maximizing, tt_move=None, remaining=None):
+        """Sort moves in place: the table's best move, the previous iteration's move for this ply, this ply's
+        killers, then by history and static priority
+
+        remaining is the depth left below the node; see order_min_remaining.
+        """
+        if remaining is not None and remaining < self.order_min_remaining:
+            return moves
+        history = self.history[is_maximizing]
+        priority = self.move_priority
+        if history:
+            moves.sort(key=lambda move: history.get(move, 0) + priority[move & ORDER_MASK], reverse=True)
+        else:
+            moves.sort(key=lambda move: priority[move & ORDER_MASK], reverse=True)
+
+        killer, second_killer = self.killers[depth]
+        pv = self.pv
+        pv_move = pv[depth + 1] if depth + 1 < len(pv) else None  # The previous iteration's line
+        for move in (second_killer, killer, pv_move, tt_move):  # Each goes in front of the previous one
+            if move is not None and move != moves[0] and move in moves:
+                moves.remove(move)
+                moves.insert(0, move)
+        return moves
+
+    def record_cutoff(self, move, depth, max_depth, is_maximizing):
+        """Remember a move that caused a cutoff as a killer for its ply and in the side's history"""
+        killers = self.killers[depth]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        history = self.history[is_maximizing]
+        history[move] = history.get(move, 0) + (max_depth - depth) ** 2  # Cutoffs high in the tree weigh more
+
+    def record_pruned(self, moves, index, next_node_id, depth, node_id):
+        """Mark the moves after index as pruned"""
+        pruned = len(moves) - index - 1
+        if self.trace.enabled:
+            for j in range(index + 1, len(moves)):
+                self.trace.record(depth + 1, next_node_id + j, node_id, None, True)
+        self.node_count += pruned
+        self.pruned_count += pruned
+
+    def store_result(self, board_hash, depth, max_depth, value, alpha, beta, best_move=None):
+        """Cache a node's value together with the kind of bound it is"""
+        if self.timed_out:
+            return  # Parts of the subtree were cut short; the depth would be overstated
+        if value <= alpha:
+            flag = UPPER
+        elif value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.store(board_hash, max_depth - depth, self.score_to_table(value, depth), flag, best_move)
+
     def evaluate_board(self):
         """Improved heuristic evaluation for non-terminal states"""
-        score = 0
-        
-        # Evaluate rows, columns, and diagonals
-        lines = []
-        
-        # Rows
-        for row in range(self.game.BOARD_SIZE):
-            lines.append([self.game.board[row][col] for col in range(self.game.BOARD_SIZE)])
-        
-        # Columns
-        for col in range(self.game.BOARD_SIZE):
-            lines.append([self.game.board[row][col] for row in range(self.game.BOARD_SIZE)])
-        
-        # Diagonals
-        lines.append([self.game.board[i][i] for i in range(self.game.BOARD_SIZE)])
-        lines.append([self.game.board[i][self.game.BOARD_SIZE-1-i] for i in range(self.game.BOARD_SIZE)])
-        
-        # Evaluate each line
-        for line in lines:
-            score += self.evaluate_line(line)
-        
+        # Rows, columns and diagonals, summed incrementally by the line counts
+        score = self.counts.score
+
         # Add bonus for center control (important in tic-tac-toe)
-        center = self.game.BOARD_SIZE // 2
-        if self.game.board[center][center] == -1:  # AI has center
+        center = self.size // 2
+        center_bit = 1 << (center * self.size + center)
+        if self.ai_bits & center_bit:  # AI has center
             score += 2
-        elif self.game.board[center][center] == 1:  # Player has center
+        elif self.player_bits & center_bit:  # Player has center
             score -= 2
-            
+
         return score
-    
-    def evaluate_line(self, line):
-        """Evaluate a single line (row, column, or diagonal)"""
-        # Count AI marks, player marks, and empty cells
-        ai_count = line.count(-1)
-        player_count = line.count(1)
-        empty_count = line.count(0)
-        
-        # Blocked cells don't contribute to winning
-        if 2 in line:
-            return 0
-        
-        # Score based on potential to win
-        if player_count == 0 and ai_count > 0:
-            return ai_count * ai_count  # Square for emphasis on near-wins
-        elif ai_count == 0 and player_count > 0:
-            return -player_count * player_count
-        
-        return 0
-    
+
+    def evaluate_batch(self, boards):
+        """evaluate_board and check_winner for a whole NumPy array of boards at once
+
+        boards is (N, cells) or (N, size, size) with player 1, AI -1, blocked 2;
+        returns (scores, results) arrays, see batcheval.BatchEvaluator.
+        """
+        from batcheval import evaluator
+        return evaluator(self.size, self.win_length).evaluate(boards)
+
     def defensive_priority(self, move):
         """Calculate defensive priority for a move"""
-        row, col = move
-        self.game.board[row][col] = 1  # Temporarily place player mark
-        
-        # Check if this would block a potential win
-        for i in range(self.game.BOARD_SIZE):
-            # Check row
-            if sum(self.game.board[row]) == self.game.BOARD_SIZE - 1:
-                self.game.board[row][col] = 0
-                return 10
-            
-            # Check column
-            col_sum = sum(self.game.board[j][col] for j in range(self.game.BOARD_SIZE))
-            if col_sum == self.game.BOARD_SIZE - 1:
-                self.game.board[row][col] = 0
-                return 10
-        
-        # Check diagonals if applicable
-        if row == col:  # On main diagonal
-            diag_sum = sum(self.game.board[i][i] for i in range(self.game.BOARD_SIZE))
-            if diag_sum == self.game.BOARD_SIZE - 1:
-                self.game.board[row][col] = 0
-                return 10
-        
-        if row + col == self.game.BOARD_SIZE - 1:  # On other diagonal
-            other_diag_sum = sum(self.game.board[i][self.game.BOARD_SIZE-1-i] for i in range(self.game.BOARD_SIZE))
-            if other_diag_sum == self.game.BOARD_SIZE - 1:
-                self.game.board[row][col] = 0
+        counts = self.counts
+        player_step = counts.steps[1][0]  # Code change from a player mark on the cell
+
+        # Check if this would block a potential win on a line through the cell
+        for index in counts.cell_lines[move]:
+            if counts.sums[counts.codes[index] + player_step] == self.win_length - 1:
                 return 10
-        
-        # Restore the board
-        self.game.board[row][col] = 0
-        return 0
\ No newline at end of file
+        return 0
@@ -0,0 +1,87 @@
+"""Vectorized evaluation of many boards at once.
+
+Gives the same scores as AIEngine.evaluate_board and the same win/draw
+results as check_winner for a whole (N, cells) or (N, size, size) array of
+boards, using one matrix product against a cell-to-line incidence table.
+
+Usage:
+    scores, results = evaluate_boards(boards)  # boards: int array of 1/-1/2/0
+"""
+from functools import lru_cache
+import math
+
+import numpy as np
+
+from linecount import LineCounts
+
+CHUNK = 65536  # Boards per block, keeps the temporaries small
+
+
+class BatchEvaluator:
+    def __init__(self, size, win_length=None):
+        """Precomputed line tables for one board size and win length"""
+        counts = LineCounts(size, win_length)
+        self.size = size
+        self.win_length = counts.win_length
+        cells = size * size
+
+        # Board value -> line code step, indexed by value + 1 (-1 AI, 0 empty, 1 player, 2 blocked)
+        self.cell_steps = np.array([counts.steps[-1][0], 0, counts.steps[1][0], counts.steps[2][0]],
+                                   dtype=np.float32)
+
+        # incidence[cell, line] = 1 when the line runs through the cell
+        self.incidence = np.zeros((cells, len(counts.lines)), dtype=np.float32)
+        for line, (_, line_cells) in enumerate(counts.lines):
+            for row, col in line_cells:
+                self.incidence[row * size + col, line] = 1
+
+        self.line_scores = np.array(counts.scores, dtype=np.int32)
+        self.player_full = counts.steps[1][1]
+        self.ai_full = counts.steps[-1][1]
+        self.center = (size // 2) * size + size // 2
+
+    def evaluate(self, boards):
+        """Return (scores, results) for an (N, cells) or (N, size, size) array of boards
+
+        scores match evaluate_board (AI's point of view), results match
+        check_winner: 1 player win, -1 AI win, 2 draw, 0 ongoing.
+        """
+        boards = np.asarray(boards).reshape(len(boards), -1)
+        scores = np.empty(len(boards), dtype=np.int32)
+        results = np.empty(len(boards), dtype=np.int8)
+        for start in range(0, len(boards), CHUNK):
+            chunk = boards[start:start + CHUNK]
+            scores[start:start + CHUNK], results[start:start + CHUNK] = self.evaluate_chunk(chunk)
+        return scores, results
+
+    def evaluate_chunk(self, boards):
+        """evaluate for one block of boards"""
+        # Every line's code for every board in one matrix product (exact: codes are < 16**3)
+        codes = (self.cell_steps[boards + 1] @ self.incidence).astype(np.int32)
+
+        scores = self.line_scores[codes].sum(axis=1)
+        center = boards[:, self.center]
+        scores += np.where(center == -1, 2, np.where(center == 1, -2, 0))
+
+        # The first filled line decides, as in check_winner's scan order
+        player_lines = codes == self.player_full
+        filled = player_lines | (codes == self.ai_full)
+        first = filled.argmax(axis=1)
+        won = filled[np.arange(len(boards)), first]
+        winner = np.where(player_lines[np.arange(len(boards)), first], 1, -1)
+        draw = (boards != 0).all(axis=1)
+        results = np.where(won, winner, np.where(draw, 2, 0)).astype(np.int8)
+        return scores, results
+
+
+@lru_cache(maxsize=None)
+def evaluator(size, win_length=None):
+    """Shared BatchEvaluator for a board configuration"""
+    return BatchEvaluator(size, win_length)
+
+
+def evaluate_boards(boards, win_length=None):
+    """Score a batch of boards; the board size is taken from the array shape"""
+    boards = np.asarray(boards)
+    size = boards.shape[1] if boards.ndim == 3 else math.isqrt(boards.shape[1])
+    return evaluator(size, win_length).evaluate(boards)
@@ -0,0 +1,479 @@
+"""Headless benchmark for AIEngine over a fixed position corpus.
+
+Reports min/median/p99 latencies (microseconds) and node counts as JSON,
+including per-move latency on larger NxN boards, and can compare against a saved baseline, exiting non-zero when any
+entry regresses by more than the threshold.
+
+Usage:
+    python benchmark.py --save-baseline bench_baseline.json
+    python benchmark.py --baseline bench_baseline.json --threshold 0.25
+    python benchmark.py --no-boards --workers 1,2,4,8   # parallel root search speedup
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from core import GameCore
+from enums import AIPersonality, GameState, PowerUpType
+from records import GameRecord, GameRecordWriter, read_games, PLAYER, AI
+from search_metrics import SearchMetrics
+from session import CompactGame, session_bytes
+import config
+
+# Positions as rows separated by "/": X player, O AI, # blocked, . empty,
+# and b/s/w for an empty cell holding a BLOCK/SWAP/WILDCARD powerup.
+# Every position has the AI (O) to move.
+CORPUS = {
+    'opening': [
+        ".../.../...",
+        ".../.X./...",
+        "X../.../...",
+        ".X./.../...",
+    ],
+    'midgame': [
+        "X../.O./..X",
+        "XO./.X./...",
+        ".X./XO./...",
+        "X.X/.O./...",
+    ],
+    'blocked': [
+        "#../.X./...",
+        "X.#/.O./...",
+        ".#./X.X/.O.",
+        "#X./.#./..X",
+    ],
+    'swap': [
+        # Piece counts that only a SWAP (or WILDCARD) can produce
+        "XX./X../...",
+        "X.O/.../..X",
+        "XX./.O./..X",
+        ".X./X.X/...",
+    ],
+    'powerups': [
+        # The player still holds powerups the search has to play through
+        "s.w/.X./b..",
+        "X.s/.O./w.b",
+        "XOw/.X./s..",
+        "w.X/sO./..b",
+    ],
+}
+
+# (board size, win length) pairs timed by the board-scaling section
+BOARD_CONFIGS = [(3, 3), (5, 4), (7, 5), (15, 5)]
+# Boards the parallel section times (the pool only serves boards from config.AI_PARALLEL_MIN_SIZE)
+PARALLEL_CONFIGS = [(5, 4), (7, 5), (15, 5)]
+
+
+def parse_position(text):
+    """Turn a corpus string into a board (nested lists of cell values)"""
+    values = {'.': 0, 'X': 1, 'O': -1, '#': 2, 'b': 0, 's': 0, 'w': 0}
+    return [[values[ch] for ch in row] for row in text.split("/")]
+
+
+def parse_powerups(text):
+    """The powerup grid (PowerUpType values) of a corpus string"""
+    kinds = {'b': PowerUpType.BLOCK.value, 's': PowerUpType.SWAP.value, 'w': PowerUpType.WILDCARD.value}
+    return [[kinds.get(ch, 0) for ch in row] for row in text.split("/")]
+
+
+def generated_positions(size, win_length, count, seed=0):
+    """Reproducible ongoing positions with marks clustered around the center, AI (O) to move"""
+    rng = random.Random(seed)
+    game = GameCore(size, win_length)
+    positions = []
+    while len(positions) < count:
+        marks = 2 * rng.randint(1, win_length) + 1  # X has one more mark than O
+        center = size // 2
+        board = [[0] * size for _ in range(size)]
+        cells = [(center, center)]
+        while len(cells) < marks:
+            row, col = rng.choice(cells)
+            row, col = row + rng.randint(-1, 1), col + rng.randint(-1, 1)
+            if 0 <= row < size and 0 <= col < size and (row, col) not in cells:
+                cells.append((row, col))
+        for i, (row, col) in enumerate(cells):
+            board[row][col] = 1 if i % 2 == 0 else -1
+        game.set_board(board)
+        if game.check_winner() == 0:
+            positions.append(board)
+    return positions
+
+
+def generated_powerups(board, count, seed=0):
+    """Reproducible powerup grid with count powerups on empty cells next to the marks"""
+    rng = random.Random(seed)
+    size = len(board)
+    near = sorted({(row + dr, col + dc) for row in range(size) for col in range(size) if board[row][col]
+                   for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+                   if 0 <= row + dr < size and 0 <= col + dc < size and not board[row + dr][col + dc]})
+    powerups = [[0] * size for _ in range(size)]
+    for row, col in rng.sample(near, min(count, len(near))):
+        powerups[row][col] = rng.choice([PowerUpType.BLOCK.value, PowerUpType.SWAP.value, PowerUpType.WILDCARD.value])
+    return powerups
+
+
+def summarize(samples_ns, nodes=None):
+    """Min/median/p99 in microseconds for a list of per-position sample lists
+
+    stable_us is the median over positions of each position's fastest
+    sample; it filters out scheduler noise and is what baselines compare.
+    """
+    ordered = sorted(sample for samples in samples_ns for sample in samples)
+    best = sorted(min(samples) for samples in samples_ns)
+    count = len(ordered)
+    result = {
+        'samples': count,
+        'min_us': ordered[0] / 1000,
+        'median_us': ordered[count // 2] / 1000,
+        'p99_us': ordered[min(count - 1, int(count * 0.99))] / 1000,
+        'stable_us': best[len(best) // 2] / 1000,
+    }
+    if nodes is not None:
+        result['nodes'] = nodes
+    return result
+
+
+def time_calls(func, repeats, batch):
+    """Time func in batches, returning per-call nanoseconds for each batch"""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        for _ in range(batch):
+            func()
+        samples.append((time.perf_counter_ns() - start) / batch)
+    return samples
+
+
+def run_board_benchmarks(results, repeats, use_table=False, positions_per_board=6):
+    """Time BALANCED get_best_move per board configuration against the move budget
+
+    Each board is timed twice: without powerups and with the player holding
+    some (the board.NxN/k+powerups entries; on 3x3 the 'powerups' corpus,
+    elsewhere three powerups next to the marks).
+    """
+    for size, win_length in BOARD_CONFIGS:
+        random.seed(0)
+        game = GameCore(size, win_length)
+        engine = game.ai_engine
+        if not use_table:
+            engine.solution_table = None
+        empty = [[0] * size for _ in range(size)]
+        if size == 3:
+            suites = {
+                '': [(parse_position(text), empty)
+                     for category, texts in CORPUS.items() if category != 'powerups' for text in texts],
+                '+powerups': [(parse_position(text), parse_powerups(text)) for text in CORPUS['powerups']],
+            }
+        else:
+            boards = generated_positions(size, win_length, positions_per_board)
+            suites = {
+                '': [(board, empty) for board in boards],
+                '+powerups': [(board, generated_powerups(board, 3, seed)) for seed, board in enumerate(boards)],
+            }
+
+        for suffix, positions in suites.items():
+            name = f'board.{size}x{size}/{win_length}{suffix}'
+            run_board_suite(results, name, game, positions, repeats)
+
+
+def run_board_suite(results, name, game, positions, repeats):
+    """Time BALANCED get_best_move over (board, powerups) positions into results[name]"""
+    engine = game.ai_engine
+    samples, nodes, timeouts = [], 0, 0
+    for board, powerups in positions:
+        game.set_board(board)
+        game.powerups = powerups
+        samples.append([])
+        for _ in range(repeats):
+            engine.transposition_table.clear()
+            start = time.perf_counter_ns()
+            engine.get_best_move(AIPersonality.BALANCED)
+            samples[-1].append(time.perf_counter_ns() - start)
+            nodes += engine.node_count - engine.pruned_count
+            timeouts += engine.timed_out
+
+    results[name] = summarize(samples, nodes)
+    results[name]['max_us'] = max(map(max, samples)) / 1000
+    results[name]['budget_us'] = config.AI_MOVE_BUDGET * 1e6
+    results[name]['timeouts'] = timeouts
+
+
+def run_metrics_benchmarks(results, repeats, size=7, win_length=5, positions_per_board=4):
+    """Cost of SearchMetrics: the same BALANCED searches with collection off and on"""
+    random.seed(0)
+    game = GameCore(size, win_length)
+    positions = [(board, [[0] * size for _ in range(size)])
+                 for board in generated_positions(size, win_length, positions_per_board)]
+    run_board_suite(results, 'metrics.off', game, positions, repeats)
+    game.ai_engine.set_metrics(SearchMetrics())
+    run_board_suite(results, 'metrics.on', game, positions, repeats)
+    game.ai_engine.set_metrics(None)
+    results['metrics.on']['overhead'] = results['metrics.on']['stable_us'] / results['metrics.off']['stable_us'] - 1
+
+
+def run_parallel_benchmarks(results, repeats, worker_counts, positions_per_board=6):
+    """Time BALANCED get_best_move per board with each number of search workers
+
+    Reports the speedup over the first worker count and whether every
+    position got the same move and eval as with it.
+    """
+    move_budget, search_workers = config.AI_MOVE_BUDGET, config.AI_SEARCH_WORKERS
+    config.AI_MOVE_BUDGET = 1e9  # Without a deadline every run searches the same tree
+    try:
+        for size, win_length in PARALLEL_CONFIGS:
+            game = GameCore(size, win_length)
+            engine = game.ai_engine
+            boards = generated_positions(size, win_length, positions_per_board)
+            baseline = None
+            for workers in worker_counts:
+                config.AI_SEARCH_WORKERS = workers
+                game.set_board(boards[0])
+                engine.get_best_move(AIPersonality.BALANCED)  # Start the pool outside the timings
+
+                samples, nodes, moves = [], 0, []
+                for board in boards:
+                    game.set_board(board)
+                    samples.append([])
+                    for _ in range(repeats):
+                        engine.transposition_table.clear()
+                        start = time.perf_counter_ns()
+                        move = engine.get_best_move(AIPersonality.BALANCED)
+                        samples[-1].append(time.perf_counter_ns() - start)
+                        nodes += engine.node_count - engine.pruned_count
+                    moves.append((move, engine.current_eval))
+
+                name = f'parallel.{size}x{size}/{win_length}.w{workers}'
+                results[name] = summarize(samples, nodes)
+                if baseline is None:
+                    baseline = results[name]['stable_us'], moves
+                results[name]['speedup'] = baseline[0] / results[name]['stable_us']
+                results[name]['same_moves'] = moves == baseline[1]
+    finally:
+        config.AI_MOVE_BUDGET, config.AI_SEARCH_WORKERS = move_budget, search_workers
+
+
+def random_records(size, win_length, count, seed=0):
+    """Reproducible game records of random play with two starting powerups"""
+    rng = random.Random(seed)
+    cells = size * size
+    records = []
+    for _ in range(count):
+        order = rng.sample(range(cells), rng.randint(win_length * 2 - 1, cells))
+        powerups = tuple((cell, rng.randint(1, 3)) for cell in rng.sample(range(cells), 2))
+        actions = tuple((cell, PLAYER if i % 2 == 0 else AI) for i, cell in enumerate(order))
+        result = rng.choice([GameState.PLAYER_WIN, GameState.AI_WIN, GameState.DRAW]).value
+        records.append(GameRecord(size, win_length, AIPersonality.BALANCED.value, result, 0, powerups, actions))
+    return records
+
+
+def run_record_benchmarks(results, games=5000):
+    """Record size and write/read throughput of the binary game record per board configuration"""
+    for size, win_length in BOARD_CONFIGS:
+        records = random_records(size, win_length, games)
+        fd, path = tempfile.mkstemp(suffix=".bin")
+        os.close(fd)
+        os.remove(path)
+        try:
+            start = time.perf_counter()
+            writer = GameRecordWriter(path)
+            for record in records:
+                writer.write(record)
+            writer.close()
+            write_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            actions = sum(len(record.actions) for record in read_games(path))
+            read_seconds = time.perf_counter() - start
+            file_bytes = os.path.getsize(path)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+        results[f'records.{size}x{size}/{win_length}'] = {
+            'games': games,
+            'bytes_per_game': file_bytes / games,
+            'bytes_per_action': file_bytes / actions,
+            'write_games_per_second': games / write_seconds,
+            'write_mb_per_second': file_bytes / write_seconds / 1e6,
+            'read_games_per_second': games / read_seconds,
+            'read_mb_per_second': file_bytes / read_seconds / 1e6,
+        }
+
+
+def run_session_benchmarks(results, games=500, cores=10):
+    """Memory per hosted game: compact sessions (idle and a few plies in) against GameCore"""
+    for size, win_length in BOARD_CONFIGS:
+        start = time.perf_counter()
+        for _ in range(games):
+            CompactGame(size, win_length)
+        create_seconds = time.perf_counter() - start
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        kept = [GameCore(size, win_length) for _ in range(cores)]
+        core_bytes = (tracemalloc.get_traced_memory()[0] - before) / cores
+        tracemalloc.stop()
+        del kept
+
+        idle_bytes = session_bytes(games, size, win_length)
+        results[f'sessions.{size}x{size}/{win_length}'] = {
+            'games': games,
+            'idle_bytes_per_game': idle_bytes,
+            'playing_bytes_per_game': session_bytes(games, size, win_length, moves=2 * size),
+            'gamecore_bytes_per_game': core_bytes,
+            'games_per_gamecore': core_bytes / idle_bytes,
+            'create_us': create_seconds / games * 1e6,
+        }
+
+
+def run_benchmarks(repeats=3, micro_repeats=20, micro_batch=200, use_table=False, boards=True, workers=None):
+    """Run the whole suite and return the machine-readable report"""
+    random.seed(0)  # RANDOM personality choices are part of what we measure
+    config.OPPONENT_MODEL_PATH = None  # Measure LEARNING without whatever the local model learned
+    game = GameCore()
+    engine = game.ai_engine
+    if not use_table:
+        engine.solution_table = None  # Measure the search itself
+
+    positions = [(category, text) for category, texts in CORPUS.items() for text in texts]
+    results = {}
+
+    for personality in AIPersonality:
+        move_samples, search_samples = [], []
+        move_nodes = search_nodes = 0
+        raw_search = personality != AIPersonality.MCTS  # MCTS has no fixed-depth search to time
+
+        for category, text in positions:
+            game.set_board(parse_position(text))
+            game.powerups = parse_powerups(text)
+            move_samples.append([])
+            search_samples.append([])
+
+            for _ in range(repeats):
+                # Cold cache so every sample measures a full search
+                engine.transposition_table.clear()
+                start = time.perf_counter_ns()
+                engine.get_best_move(personality)
+                move_samples[-1].append(time.perf_counter_ns() - start)
+                move_nodes += engine.node_count - engine.pruned_count
+                if not raw_search:
+                    continue
+
+                # Raw search from the position, AI to move
+                engine.transposition_table.clear()
+                engine.reset()
+                engine.load_position()
+                engine.personality = personality
+                start = time.perf_counter_ns()
+                engine.minimax_alpha_beta(0, 5, float('-inf'), float('inf'), True)
+                search_samples[-1].append(time.perf_counter_ns() - start)
+                search_nodes += engine.node_count - engine.pruned_count
+
+        results[f'get_best_move.{personality.name}'] = summarize(move_samples, move_nodes)
+        if raw_search:
+            search_seconds = sum(map(sum, search_samples)) / 1e9
+            results[f'minimax.{personality.name}'] = summarize(search_samples, search_nodes)
+            results[f'minimax.{personality.name}']['nodes_per_second'] = (
+                search_nodes / search_seconds if search_seconds else 0.0)
+
+    # Per-call costs of the primitives the search leans on
+    primitives = {
+        'evaluate_board': engine.evaluate_board,
+        'engine.check_winner': engine.check_winner,
+        'engine.valid_moves': engine.valid_moves,
+        'core.check_winner': game.check_winner,
+        'core.get_valid_moves': game.get_valid_moves,
+    }
+    for name, func in primitives.items():
+        samples = []
+        for _, text in positions:
+            game.set_board(parse_position(text))
+            game.powerups = parse_powerups(text)
+            engine.load_position()
+            samples.append(time_calls(func, micro_repeats, micro_batch))
+        results[name] = summarize(samples)
+
+    # Batch evaluation: per-board cost over the corpus tiled to a large array
+    batch = np.array([parse_position(text) for _, text in positions] * 4096, dtype=np.int8)
+    samples = [[ns / len(batch) for ns in time_calls(lambda: engine.evaluate_batch(batch), micro_repeats // 4, 1)]]
+    results['evaluate_batch'] = summarize(samples)
+    results['evaluate_batch']['boards_per_second'] = 1e6 / results['evaluate_batch']['stable_us']
+
+    run_record_benchmarks(results)
+    run_session_benchmarks(results)
+    if boards:
+        run_board_benchmarks(results, repeats, use_table)
+        run_metrics_benchmarks(results, repeats)
+    if workers:
+        run_parallel_benchmarks(results, repeats, workers)
+
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'positions': len(positions),
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold, metric='stable_us'):
+    """Return the names whose metric is more than threshold slower than the baseline"""
+    regressions = []
+    for name, stats in report['results'].items():
+        base = baseline['results'].get(name)
+        if base and base.get(metric) and stats[metric] > base[metric] * (1 + threshold):
+            regressions.append((name, base[metric], stats[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AI engine on a fixed position corpus")
+    parser.add_argument("--repeats", type=int, default=3, help="samples per position and personality")
+    parser.add_argument("--use-table", action="store_true", help="let BALANCED/LEARNING use the solution table")
+    parser.add_argument("--no-boards", action="store_true", help="skip the larger-board latency section")
+    parser.add_argument("--out", help="write the JSON report to this file instead of stdout")
+    parser.add_argument("--save-baseline", help="also save the report as a baseline file")
+    parser.add_argument("--baseline", help="baseline report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--metric", default="stable_us", choices=["stable_us", "min_us", "median_us", "p99_us"],
+                        help="latency statistic compared against the baseline")
+    parser.add_argument("--workers", type=lambda text: [int(n) for n in text.split(",")],
+                        help="also time the parallel root search with these worker counts, e.g. 1,2,4,8")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = run_benchmarks(args.repeats, use_table=args.use_table, boards=not args.no_boards,
+                            workers=args.workers)
+    report['seconds'] = time.perf_counter() - start
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.metric)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {args.metric} {before:.1f}us -> {after:.1f}us", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
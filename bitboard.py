@@ -0,0 +1,116 @@
+from functools import lru_cache
+
+# Cells are numbered row-major (index = row * size + col). Each side's marks
+# and the blocked cells are kept in plain int bitmasks so the search can
+# make/unmake moves and test for wins with a handful of mask operations.
+
+
+@lru_cache(maxsize=None)
+def win_lines(size, win_length=None):
+    """Every run of win_length cells as (kind, cells), in the order check_winner scans them
+
+    kind is "row", "col", "diag" or "anti-diag"; cells are (row, col) pairs
+    from one end of the run to the other. win_length defaults to the board
+    width, which gives the classic rows, columns and two diagonals.
+    """
+    k = win_length or size
+    span = range(size - k + 1)
+    lines = []
+
+    # Rows
+    for row in range(size):
+        for col in span:
+            lines.append(("row", tuple((row, col + i) for i in range(k))))
+
+    # Columns
+    for col in range(size):
+        for row in span:
+            lines.append(("col", tuple((row + i, col) for i in range(k))))
+
+    # Diagonals
+    for row in span:
+        for col in span:
+            lines.append(("diag", tuple((row + i, col + i) for i in range(k))))
+    for row in span:
+        for col in range(k - 1, size):
+            lines.append(("anti-diag", tuple((row + i, col - i) for i in range(k))))
+
+    return tuple(lines)
+
+
+@lru_cache(maxsize=None)
+def win_masks(size, win_length=None):
+    """Winning-line masks, in the same order as win_lines"""
+    return tuple(sum(1 << (row * size + col) for row, col in cells) for _, cells in win_lines(size, win_length))
+
+
+@lru_cache(maxsize=None)
+def full_mask(size):
+    """Mask with every cell of the board set"""
+    return (1 << (size * size)) - 1
+
+
+@lru_cache(maxsize=None)
+def neighbour_masks(size, radius):
+    """For each cell, the mask of cells within radius steps in any direction (itself excluded)"""
+    masks = []
+    for row in range(size):
+        for col in range(size):
+            mask = 0
+            for r in range(max(0, row - radius), min(size, row + radius + 1)):
+                for c in range(max(0, col - radius), min(size, col + radius + 1)):
+                    mask |= 1 << (r * size + c)
+            masks.append(mask & ~(1 << (row * size + col)))
+    return tuple(masks)
+
+
+def board_to_masks(board, size):
+    """Convert a board array into (player, ai, blocked) bitmasks"""
+    player = ai = blocked = 0
+    for row in range(size):
+        for col in range(size):
+            value = board[row][col]
+            bit = 1 << (row * size + col)
+            if value == 1:
+                player |= bit
+            elif value == -1:
+                ai |= bit
+            elif value == 2:
+                blocked |= bit
+    return player, ai, blocked
+
+
+def powerups_to_mask(powerups, size):
+    """Convert a powerup array (PowerUpType values) into one mask: kind k's cells at (k - 1) * size * size"""
+    cells = size * size
+    mask = 0
+    for row in range(size):
+        for col in range(size):
+            kind = powerups[row][col]
+            if kind:
+                mask |= 1 << ((kind - 1) * cells + row * size + col)
+    return mask
+
+
+def iter_bits(mask):
+    """Yield the indices of the set bits of mask in ascending order"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def winner(player, ai, blocked, size, win_length=None):
+    """Bitboard equivalent of GameCore.check_winner
+    Return: 1 for player win, -1 for AI win, 2 for draw, 0 for ongoing
+    """
+    for line in win_masks(size, win_length):
+        if player & line == line:
+            return 1
+        if ai & line == line:
+            return -1
+
+    if (player | ai | blocked) == full_mask(size):
+        return 2
+
+    return 0
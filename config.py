@@ -1,3 +1,5 @@
+import os
+
 # Colors
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
@@ -11,6 +13,46 @@ PURPLE = (128, 0, 128)
 # Window settings
 WIDTH = 1200
 HEIGHT = 700
-DEFAULT_BOARD_SIZE = 3  # Fixed to 3x3 since we removed other options
-CELL_SIZE = 100
-VISUALIZATION_WIDTH = 400
\ No newline at end of file
+DEFAULT_BOARD_SIZE = 3  # Boards are NxN, from 3x3 up to MAX_BOARD_SIZE
+DEFAULT_WIN_LENGTH = 3  # Marks in a row needed to win (capped at the board size)
+MAX_BOARD_SIZE = 15
+CELL_SIZE = 100  # Largest cell; bigger boards shrink cells to fit BOARD_PIXELS
+BOARD_PIXELS = 400
+LABEL_MIN_CELL_SIZE = 60  # Smaller cells draw powerups and blocked cells without text
+VISUALIZATION_WIDTH = 400
+# AI settings
+SOLUTION_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "solution_table.bin")
+AI_MOVE_BUDGET = 1.0  # Seconds per move; deepening stops and the last completed depth's move is played
+AI_MAX_DEPTH = None  # Deepest search iteration (None: sized by board, see AIEngine.search_depth)
+AI_SEARCH_BUDGET = 150000  # Nodes the search depth is sized for on large boards
+AI_NEIGHBOR_RADIUS = 1  # Boards above 4x4 only consider cells this close to a mark
+AI_SEARCH_WORKERS = None  # Processes for the parallel root search (None: one per core, 1: search serially)
+AI_PARALLEL_MIN_SIZE = 4  # Smaller boards search too little to pay for the round trips to the workers
+MCTS_ITERATIONS = 300  # Tree steps per MCTS move (AI_MOVE_BUDGET still applies)
+MCTS_BATCH = 1024  # Random playouts simulated together at each step
+MCTS_EXPLORATION = 1.4  # UCT exploration constant
+# Per board size and win length; None keeps the model in memory (never read or written)
+OPPONENT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opponent_model_{size}x{size}_{win}.bin")
+OPPONENT_MODEL_MAX_POSITIONS = 65536  # Positions kept on disk (records are 20 bytes each)
+OPPONENT_MODEL_REPLIES = 4  # Most played replies counted per position
+OPPONENT_MODEL_SAVE_GAMES = 10  # Finished games between writes to disk
+OPPONENT_MODEL_MIN_SAMPLES = 5  # Replies seen in a position before LEARNING prunes the rare ones
+OPPONENT_MODEL_COVERAGE = 0.9  # Share of the seen replies LEARNING keeps searching (most played first)
+# Played games are appended here (see records.py); None keeps no record
+GAME_RECORD_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "game_records.bin")
+GAME_RECORD_FLUSH_GAMES = 10  # Finished games buffered between writes to disk
+# Game server (server.py)
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_WORKERS = None  # AI search processes (None: one per core)
+SERVER_MAX_SESSIONS = 200000  # Open games across all connections (a few hundred bytes each)
+SERVER_METRICS_INTERVAL = 10.0  # Seconds between rewrites of the --metrics-prom file
+TT_MAX_ENTRIES = 500000  # Transposition table budget, kept across moves and games
+TT_MAX_BYTES = 256 * 1024 * 1024
+TRACE_CAPACITY = 20000  # Search nodes kept for the visualization panel
+TRACE_RING = False  # Keep the newest nodes instead of the first ones when full
+FPS_CAP = 60  # Upper bound on frames per second while something is changing
+TEXT_CACHE_SIZE = 512  # Rendered text surfaces kept for reuse across frames
+# System font files picked on the first launch (see fonts.py); None scans the system fonts every time
+FONT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "font_cache.json")
+AI_MIN_THINK_TIME = 0.5  # Seconds "AI Thinking..." stays up, overlapping the search
@@ -0,0 +1,239 @@
+import random
+import time
+
+from enums import GameState, PowerUpType, AIPersonality
+from ai import AIEngine
+from linecount import LineCounts
+from records import GameRecord, open_record_writer, PLAYER, AI, BLOCK, SWAP, SWAP_TARGET, WILD
+import config
+
+class GameCore:
+    def __init__(self, board_size=None, win_length=None, record_path=None):
+        """Initialize the headless game: board, rules, powerups and AI
+
+        board_size (N for an NxN board) and win_length (marks in a row
+        needed to win) default to the values in config. Played games are
+        appended to the game record at record_path; headless games keep
+        none unless given one.
+        """
+        self.BOARD_SIZE = board_size or config.DEFAULT_BOARD_SIZE
+        self.WIN_LENGTH = min(win_length or config.DEFAULT_WIN_LENGTH, self.BOARD_SIZE)
+        if not 3 <= self.BOARD_SIZE <= config.MAX_BOARD_SIZE:
+            raise ValueError(f"board size must be between 3 and {config.MAX_BOARD_SIZE}, got {self.BOARD_SIZE}")
+        if self.WIN_LENGTH < 3:
+            raise ValueError(f"win length must be at least 3, got {self.WIN_LENGTH}")
+        # Per-line counts, kept in step with the board by set_cell
+        self.line_counts = LineCounts(self.BOARD_SIZE, self.WIN_LENGTH)
+
+        # Initialize components
+        self.ai_engine = AIEngine(self)
+        # Played games are appended to the binary game record (see records.py)
+        self.record_writer = open_record_writer(record_path)
+        self.actions = []  # (cell, action) of the game being played, for its record
+        self.ai_personality = AIPersonality.BALANCED
+
+        # Game state
+        self.reset_game()
+
+        # Turn and powerup selection states
+        self.selected_powerup = None
+        self.ai_thinking = False
+
+    def reset_game(self):
+        """Reset the game state"""
+        self.save_record()
+        self.board = [[0] * self.BOARD_SIZE for _ in range(self.BOARD_SIZE)]
+        self.line_counts.clear()
+        self.powerups = [[0] * self.BOARD_SIZE for _ in range(self.BOARD_SIZE)]
+        self.player_turn = True
+        self.game_state = GameState.ONGOING
+        self.moves_history = []
+        self.winning_line = None
+        self.highlight_cells = []
+        self.last_move = None
+
+        # Reset AI engine
+        if hasattr(self, 'ai_engine'):
+            self.ai_engine.end_game()
+            self.ai_engine.reset()
+
+        # Add random powerups
+        self.add_powerups()
+        self.started_at = int(time.time())
+        self.start_powerups = tuple((row * self.BOARD_SIZE + col, kind)
+                                    for row, powerup_row in enumerate(self.powerups)
+                                    for col, kind in enumerate(powerup_row) if kind)
+
+    def record_action(self, row, col, action):
+        """Note an action of the game being played for its record"""
+        self.actions.append((row * self.BOARD_SIZE + col, action))
+
+    def save_record(self):
+        """Append the game being played to the game record, if it has begun, and start a new one"""
+        if self.record_writer is not None and self.actions:
+            self.record_writer.write(GameRecord(self.BOARD_SIZE, self.WIN_LENGTH, self.ai_personality.value,
+                                                self.game_state.value, self.started_at, self.start_powerups,
+                                                self.actions))
+        self.actions = []
+
+    def add_powerups(self):
+        """Add random powerups to the board"""
+        # Clear existing powerups
+        self.powerups = [[0] * self.BOARD_SIZE for _ in range(self.BOARD_SIZE)]
+
+        # Add 1-2 powerups for 3x3 board
+        num_powerups = 2
+        available_positions = [(x, y) for x in range(self.BOARD_SIZE) for y in range(self.BOARD_SIZE)]
+
+        for _ in range(min(num_powerups, len(available_positions))):
+            pos_idx = random.randint(0, len(available_positions) - 1)
+            x, y = available_positions.pop(pos_idx)
+            self.powerups[x][y] = random.choice([p.value for p in PowerUpType if p != PowerUpType.NONE])
+
+    def handle_board_click(self, row, col):
+        """Handle click on a board cell"""
+        if self.selected_powerup and self.selected_powerup[0] == PowerUpType.SWAP:
+            # Complete swap powerup action
+            power_row, power_col = self.selected_powerup[1], self.selected_powerup[2]
+            if self.board[row][col] != 0:  # Can only swap with occupied cell
+                # Swap cells
+                power_value, target_value = self.board[power_row][power_col], self.board[row][col]
+                self.set_cell(power_row, power_col, target_value)
+                self.set_cell(row, col, power_value)
+                self.record_action(row, col, SWAP_TARGET)
+                self.selected_powerup = None
+                self.last_move = (row, col, "SWAP")
+                self.player_turn = False
+                self.ai_thinking = True
+                # Moving a mark can complete a line for either side
+                self.update_game_state()
+        else:
+            # Check if cell is empty
+            if self.board[row][col] == 0:
+                self.ai_engine.observe_player_move(row, col)  # LEARNING's model of the human
+
+                # Check if there's a powerup
+                if self.powerups[row][col] != 0:
+                    powerup_type = PowerUpType(self.powerups[row][col])
+                    if powerup_type == PowerUpType.BLOCK:
+                        self.use_block_powerup(row, col)
+                    elif powerup_type == PowerUpType.SWAP:
+                        self.use_swap_powerup(row, col)
+                    elif powerup_type == PowerUpType.WILDCARD:
+                        self.use_wildcard_powerup(row, col)
+                    self.powerups[row][col] = 0
+                else:
+                    # Regular move
+                    self.record_action(row, col, PLAYER)
+                    self.place_mark(row, col, 1)  # 1 represents player's mark (X)
+
+                    if self.check_winner() == 0:  # If game is not over
+                        self.player_turn = False
+                        self.ai_thinking = True
+
+    def use_block_powerup(self, row, col):
+        """Block a cell from AI use"""
+        self.record_action(row, col, BLOCK)
+        self.set_cell(row, col, 2)  # Special value for blocked cell
+        self.last_move = (row, col, "BLOCK")
+        self.player_turn = False
+        self.ai_thinking = True
+        self.update_game_state()  # Blocking the last empty cell ends the game
+
+    def use_swap_powerup(self, row, col):
+        """Set the cell as "swap pending" and wait for another cell to be selected"""
+        self.record_action(row, col, SWAP)
+        if all(value == 0 for board_row in self.board for value in board_row):
+            # Nothing to swap with: the powerup is spent and the turn passes
+            self.last_move = (row, col, "SWAP")
+            self.player_turn = False
+            self.ai_thinking = True
+            return
+        self.selected_powerup = (PowerUpType.SWAP, row, col)
+        self.highlight_cells = [(row, col)]
+
+    def use_wildcard_powerup(self, row, col):
+        """Allow player to place their mark and get another turn"""
+        self.record_action(row, col, WILD)
+        self.place_mark(row, col, 1)
+        self.last_move = (row, col, "WILD")
+        # Player gets another turn, so don't switch to AI
+
+    def place_mark(self, row, col, mark):
+        """Place a mark on the board and check for game end"""
+        self.set_cell(row, col, mark)
+        self.moves_history.append((row, col, mark))
+        if not isinstance(self.last_move, tuple) or len(self.last_move) < 3 or self.last_move[2] != "WILD":
+            self.last_move = (row, col, mark)
+
+        self.update_game_state()
+
+    def update_game_state(self):
+        """Check for win or draw after the board changed"""
+        result = self.check_winner()
+        if result == 1:
+            self.game_state = GameState.PLAYER_WIN
+            self.find_winning_line(1)  # Player's mark
+        elif result == -1:
+            self.game_state = GameState.AI_WIN
+            self.find_winning_line(-1)  # AI's mark
+        elif result == 2:  # Draw
+            self.game_state = GameState.DRAW
+
+    def set_cell(self, row, col, value):
+        """Change one board cell, keeping the line counts in step"""
+        cell = row * self.BOARD_SIZE + col
+        if self.board[row][col] != 0:
+            self.line_counts.remove(cell, self.board[row][col])
+        self.board[row][col] = value
+        if value != 0:
+            self.line_counts.place(cell, value)
+
+    def set_board(self, board):
+        """Replace the whole board, rebuilding the line counts"""
+        self.board = board
+        self.line_counts.load(board)
+
+    def find_winning_line(self, mark):
+        """Find the winning line for animation"""
+        line = self.line_counts.winning_line(mark)
+        if line is None:
+            self.winning_line = None
+        else:
+            kind, cells = line
+            self.winning_line = (kind, cells[0], cells[-1])
+
+    def check_winner(self):
+        """Check if there's a winner or draw
+        Return: 1 for player win, -1 for AI win, 2 for draw, 0 for ongoing
+        """
+        return self.line_counts.winner()
+
+    def get_valid_moves(self):
+        """Get all valid moves on the board"""
+        moves = []
+        for row in range(self.BOARD_SIZE):
+            for col in range(self.BOARD_SIZE):
+                if self.board[row][col] == 0:
+                    moves.append((row, col))
+        return moves
+
+    def set_ai_personality(self, personality):
+        """Choose the AI personality for the following moves"""
+        self.ai_personality = personality
+
+    def ai_move(self):
+        """Make the AI's move"""
+        self.apply_ai_move(self.ai_engine.get_best_move(self.ai_personality))
+
+    def apply_ai_move(self, best_move):
+        """Play a move chosen by the AI engine"""
+        if best_move:
+            self.record_action(best_move[0], best_move[1], AI)
+            self.place_mark(best_move[0], best_move[1], -1)  # -1 represents AI's mark (O)
+        else:
+            # No valid moves left - draw
+            self.game_state = GameState.DRAW
+
+        self.player_turn = True
+        self.ai_thinking = False
@@ -17,4 +17,5 @@ class AIPersonality(Enum):
     AGGRESSIVE = 1 # Prioritizes attacking positions
     DEFENSIVE = 2  # Prioritizes blocking player wins
     RANDOM = 3     # Occasionally makes non-optimal moves
-    LEARNING = 4   # Adapts strategy based on player's moves
\ No newline at end of file
+    LEARNING = 4   # Adapts strategy based on player's moves
+    MCTS = 5       # Monte Carlo tree search with batched random playouts
\ No newline at end of file
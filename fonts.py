@@ -0,0 +1,73 @@
+"""System fonts resolved once and remembered across launches.
+
+pygame.font.SysFont scans every installed font (fc-list on Linux) the
+first time it runs, which dominates a cold start on machines with many
+fonts. load_fonts asks SysFont once per family and style and keeps the
+file it picked in a small JSON cache, so later launches open that file
+directly and never scan. A cached file that has since disappeared is
+looked up again.
+"""
+import json
+import os
+
+import pygame
+
+import config
+
+
+def read_cache(path):
+    """The cache at path: "name|bold" -> [font file or None for pygame's default, synthesize bold]"""
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}  # Unreadable: everything is looked up again and the file rewritten
+    return cache if isinstance(cache, dict) else {}
+
+
+def write_cache(path, cache):
+    """Replace the cache file at path atomically"""
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # A read-only install just scans again next time
+
+
+def resolve_font(name, bold=False):
+    """The [font file, synthesize bold] pair pygame.font.SysFont picks for a family"""
+    picked = []
+    pygame.font.SysFont(name, 1, bold, constructor=lambda path, size, set_bold, set_italic:
+                        picked.append([path, set_bold]))
+    return picked[0]
+
+
+def load_fonts(specs, path=None):
+    """Fonts for {key: (family, size, bold)}, the same ones SysFont would give
+
+    Families are resolved through the cache at path (config.FONT_CACHE_PATH;
+    None resolves them every time).
+    """
+    path = path if path is not None else config.FONT_CACHE_PATH
+    cache = read_cache(path)
+    changed = False
+    fonts = {}
+    for key, (name, size, bold) in specs.items():
+        cache_key = f"{name}|{int(bold)}"
+        choice = cache.get(cache_key)
+        if (not isinstance(choice, list) or len(choice) != 2
+                or (choice[0] is not None and not os.path.exists(choice[0]))):
+            choice = cache[cache_key] = resolve_font(name, bold)
+            changed = True
+        font_path, set_bold = choice
+        font = pygame.font.Font(font_path, size)
+        if set_bold:
+            font.set_bold(True)
+        fonts[key] = font
+    if changed and path:
+        write_cache(path, cache)
+    return fonts
@@ -1,34 +1,48 @@
+import json
 import pygame
-import numpy as np
-import time
 import sys
-import random
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor, wait
 
-from enums import GameState, PowerUpType, AIPersonality
-from ai import AIEngine
+from enums import GameState, PowerUpType
+from core import GameCore
+from ai import SearchCancelled
 from visualization import AlgorithmVisualizer
 from ui import GameUI
+from search_trace import ArrayTrace, NullTrace
+from textcache import TextCache
+from fonts import load_fonts
 import config
 
-class EnhancedTicTacToe:
-    def __init__(self):
-        """Initialize the game"""
-        pygame.init()
+class EnhancedTicTacToe(GameCore):
+    def __init__(self, board_size=None, win_length=None, startup=None):
+        """Initialize the game window on top of the headless game core
+
+        startup, a StartupProfile, gets a mark as each phase of the start
+        finishes; run() then reports it after the first frame and quits.
+        """
+        self.startup = startup
+        # Only the subsystems the game uses: no audio device or joystick probing
+        pygame.display.init()
+        pygame.font.init()
+        self.mark_startup("pygame init")
         self.WIDTH = config.WIDTH
         self.HEIGHT = config.HEIGHT
-        self.BOARD_SIZE = 3
-        self.CELL_SIZE = config.CELL_SIZE
         self.VISUALIZATION_WIDTH = config.VISUALIZATION_WIDTH
         
         self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
         pygame.display.set_caption("Enhanced Tic-Tac-Toe")
+        self.mark_startup("window")
         
-        # Fonts
-        self.fonts = {
-            'normal': pygame.font.SysFont('Arial', 24),
-            'small': pygame.font.SysFont('Arial', 16),
-            'large': pygame.font.SysFont('Arial', 32, True)
-        }
+        # Fonts, with the system font lookup cached across launches
+        self.fonts = load_fonts({
+            'normal': ('Arial', 24, False),
+            'small': ('Arial', 16, False),
+            'large': ('Arial', 32, True)
+        })
+        self.mark_startup("fonts")
         
         # Colors
         self.colors = {
@@ -44,63 +58,139 @@ class EnhancedTicTacToe:
             'LIGHT_GREEN': (144, 238, 144)
         }
         
-        # Initialize components
-        self.ai_engine = AIEngine(self)
-        self.visualizer = AlgorithmVisualizer(self.screen, self.colors, self.fonts)
-        self.ui = GameUI(self, self.screen, self.colors, self.fonts)
+        # AI searches run on a background thread so the window stays responsive
+        self.ai_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-search")
+        self.ai_future = None
+        self.ai_cancel = None
+        self.ai_started_at = 0
         
-        # Game state
-        self.reset_game()
+        # Board, rules, powerups and AI engine
+        super().__init__(board_size, win_length, config.GAME_RECORD_PATH)
+        self.CELL_SIZE = min(config.CELL_SIZE, config.BOARD_PIXELS // self.BOARD_SIZE)
+        self.mark_startup("game core")
+        
+        # Rendered text shared by every component
+        self.text_cache = TextCache(config.TEXT_CACHE_SIZE)
+        
+        # Initialize components
+        self.visualizer = AlgorithmVisualizer(self.screen, self.colors, self.fonts, self.text_cache)
+        self.ui = GameUI(self, self.screen, self.colors, self.fonts, self.text_cache)
         
         # UI states
-        self.show_algorithm = True
-        self.selected_powerup = None
-        self.ai_thinking = False
-        self.ai_personality = AIPersonality.BALANCED
+        self.set_show_algorithm(True)
+        self.needs_redraw = True
+        self.mark_startup("components")
+
+    def mark_startup(self, phase):
+        """End a startup phase when the start is being profiled"""
+        if self.startup is not None:
+            self.startup.mark(phase)
+
+    def set_show_algorithm(self, show):
+        """Toggle the algorithm panel, recording search trees only while it is shown
+
+        A search in flight is abandoned first, so it never records into a
+        trace that is swapped out from under it; the main loop restarts it.
+        """
+        self.cancel_ai_search()
+        self.show_algorithm = show
+        if show:
+            self.ai_engine.set_trace(ArrayTrace(config.TRACE_CAPACITY, config.TRACE_RING))
+        else:
+            self.ai_engine.set_trace(NullTrace())
 
     def reset_game(self):
         """Reset the game state"""
-        self.board = np.zeros((self.BOARD_SIZE, self.BOARD_SIZE), dtype=int)
-        self.powerups = np.zeros((self.BOARD_SIZE, self.BOARD_SIZE), dtype=int)
-        self.player_turn = True
-        self.game_state = GameState.ONGOING
-        self.moves_history = []
-        self.winning_line = None
+        self.cancel_ai_search()
+        super().reset_game()
         self.winning_line_animation = 0
-        self.highlight_cells = []
-        self.last_move = None
-        
-        # Reset AI engine
-        if hasattr(self, 'ai_engine'):
-            self.ai_engine.reset()
-        
-        # Add random powerups
-        self.add_powerups()
 
-    def add_powerups(self):
-        """Add random powerups to the board"""
-        # Clear existing powerups
-        self.powerups = np.zeros((self.BOARD_SIZE, self.BOARD_SIZE), dtype=int)
-        
-        # Add 1-2 powerups for 3x3 board
-        num_powerups = 2
-        available_positions = [(x, y) for x in range(self.BOARD_SIZE) for y in range(self.BOARD_SIZE)]
+    def set_ai_personality(self, personality):
+        """Switch personality, abandoning any search made with the old one"""
+        self.cancel_ai_search()
+        super().set_ai_personality(personality)
+
+    def start_ai_search(self):
+        """Start searching for the AI's move on the background thread"""
+        self.ai_cancel = threading.Event()
+        self.ai_started_at = time.perf_counter()
+        self.ai_future = self.ai_executor.submit(
+            self.ai_engine.get_best_move, self.ai_personality, -1, self.ai_cancel)
+        self.ai_thinking = True
+
+    def cancel_ai_search(self):
+        """Abort the search in flight, if any, and wait until it has let go of the engine
+
+        A running search stops at its next cancel check; until then it is
+        still making moves on the engine's bitboards and tables.
+        """
+        if self.ai_future is not None:
+            future, self.ai_future = self.ai_future, None
+            self.ai_cancel.set()
+            if not future.cancel():
+                wait([future])
+
+    def poll_ai_search(self):
+        """Play the AI's move once the search is done and the minimum display time has passed"""
+        if not self.ai_future.done():
+            return
+        if time.perf_counter() - self.ai_started_at < config.AI_MIN_THINK_TIME:
+            return
         
-        for _ in range(min(num_powerups, len(available_positions))):
-            pos_idx = random.randint(0, len(available_positions) - 1)
-            x, y = available_positions.pop(pos_idx)
-            self.powerups[x][y] = random.choice([p.value for p in PowerUpType if p != PowerUpType.NONE])
+        future, self.ai_future = self.ai_future, None
+        try:
+            best_move = future.result()
+        except SearchCancelled:
+            return
+        except Exception as e:
+            # Keep the window alive: a failed search still has to end the AI's turn
+            warnings.warn(f"AI search failed, playing the first legal move: {e!r}")
+            moves = self.get_valid_moves()
+            best_move = moves[0] if moves else None
+        self.apply_ai_move(best_move)
+        self.request_redraw()
+
+    def board_origin(self):
+        """Top-left corner of the board grid on screen"""
+        board_width = self.BOARD_SIZE * self.CELL_SIZE
+        board_height = self.BOARD_SIZE * self.CELL_SIZE
+        board_x = (self.WIDTH - self.VISUALIZATION_WIDTH - board_width) // 2
+        board_y = (self.HEIGHT - board_height) // 2
+        return board_x, board_y
 
     def draw_board(self):
         """Draw the game board and all elements"""
         # Clear screen
         self.screen.fill(self.colors['LIGHT_BLUE'])
         
-        # Calculate board position
+        board_x, board_y = self.board_origin()
+        board_width = self.BOARD_SIZE * self.CELL_SIZE
+        
+        # Draw title
+        title_text = self.text_cache.render(self.fonts['large'], "Enhanced Tic-Tac-Toe", self.colors['BLACK'])
+        self.screen.blit(title_text, (board_x, board_y - 50))
+        
+        self.draw_board_area()
+        
+        # Draw UI elements
+        self.reset_rect = self.ui.draw_ui(board_x + board_width + 20, board_y)
+        
+        # Draw algorithm visualization if enabled
+        if self.show_algorithm:
+            self.visualizer.draw_algorithm_visualization(
+                self.WIDTH - self.VISUALIZATION_WIDTH, 0, 
+                self.VISUALIZATION_WIDTH, self.HEIGHT,
+                self.ai_engine.trace,
+                self.ai_engine.current_eval,
+                self.ai_engine.search_generation,
+                self.ai_engine.mcts_stats
+            )
+
+    def draw_board_area(self):
+        """Draw the board background, grid, winning line and marks; return the area drawn"""
+        board_x, board_y = self.board_origin()
         board_width = self.BOARD_SIZE * self.CELL_SIZE
         board_height = self.BOARD_SIZE * self.CELL_SIZE
-        board_x = (self.WIDTH - self.VISUALIZATION_WIDTH - board_width) // 2
-        board_y = (self.HEIGHT - board_height) // 2
         
         # Draw board background
         board_bg_rect = pygame.Rect(board_x - 10, board_y - 10, 
@@ -108,10 +198,6 @@ class EnhancedTicTacToe:
         pygame.draw.rect(self.screen, self.colors['LIGHT_GREEN'], board_bg_rect)
         pygame.draw.rect(self.screen, self.colors['BLACK'], board_bg_rect, 3)
         
-        # Draw title
-        title_text = self.fonts['large'].render("Enhanced Tic-Tac-Toe", True, self.colors['BLACK'])
-        self.screen.blit(title_text, (board_x, board_y - 50))
-        
         # Draw grid
         for i in range(self.BOARD_SIZE+1):
             # Vertical lines
@@ -129,22 +215,11 @@ class EnhancedTicTacToe:
         
         # Draw board contents (X, O, powerups)
         self.draw_board_contents(board_x, board_y)
-        
-        # Draw UI elements
-        self.reset_rect = self.ui.draw_ui(board_x + board_width + 20, board_y)
-        
-        # Draw algorithm visualization if enabled
-        if self.show_algorithm:
-            self.visualizer.draw_algorithm_visualization(
-                self.WIDTH - self.VISUALIZATION_WIDTH, 0, 
-                self.VISUALIZATION_WIDTH, self.HEIGHT,
-                self.ai_engine.tree_nodes, 
-                self.ai_engine.pruned_nodes,
-                self.ai_engine.current_eval
-            )
+        return board_bg_rect
 
     def draw_board_contents(self, board_x, board_y):
         """Draw X's, O's and powerups on the board"""
+        mark = self.CELL_SIZE * 3 // 10  # Half the width of an X or O
         for row in range(self.BOARD_SIZE):
             for col in range(self.BOARD_SIZE):
                 center_x = board_x + col * self.CELL_SIZE + self.CELL_SIZE // 2
@@ -165,41 +240,47 @@ class EnhancedTicTacToe:
                 # Draw player marks
                 if self.board[row][col] == 1:  # Player X
                     pygame.draw.line(self.screen, self.colors['BLUE'], 
-                                    (center_x - 30, center_y - 30), 
-                                    (center_x + 30, center_y + 30), 4)
+                                    (center_x - mark, center_y - mark), 
+                                    (center_x + mark, center_y + mark), 4)
                     pygame.draw.line(self.screen, self.colors['BLUE'], 
-                                    (center_x + 30, center_y - 30), 
-                                    (center_x - 30, center_y + 30), 4)
+                                    (center_x + mark, center_y - mark), 
+                                    (center_x - mark, center_y + mark), 4)
                 elif self.board[row][col] == -1:  # AI O
                     pygame.draw.circle(self.screen, self.colors['RED'], 
-                                    (center_x, center_y), 30, 4)
+                                    (center_x, center_y), mark, 4)
                 elif self.board[row][col] == 2:  # Blocked cell
                     pygame.draw.line(self.screen, self.colors['BLACK'], 
-                                   (center_x - 30, center_y - 30), 
-                                   (center_x + 30, center_y + 30), 2)
+                                   (center_x - mark, center_y - mark), 
+                                   (center_x + mark, center_y + mark), 2)
                     pygame.draw.line(self.screen, self.colors['BLACK'], 
-                                   (center_x + 30, center_y - 30), 
-                                   (center_x - 30, center_y + 30), 2)
-                    blocked_text = self.fonts['small'].render("BLOCKED", True, self.colors['BLACK'])
-                    self.screen.blit(blocked_text, (center_x - 30, center_y + 10))
+                                   (center_x + mark, center_y - mark), 
+                                   (center_x - mark, center_y + mark), 2)
+                    if self.CELL_SIZE >= config.LABEL_MIN_CELL_SIZE:
+                        blocked_text = self.text_cache.render(self.fonts['small'], "BLOCKED", self.colors['BLACK'])
+                        self.screen.blit(blocked_text, (center_x - mark, center_y + 10))
 
     def draw_powerup(self, center_x, center_y, power_type):
         """Draw a powerup on the board"""
+        half = self.CELL_SIZE * 3 // 20
+        labels = self.CELL_SIZE >= config.LABEL_MIN_CELL_SIZE  # Small cells only get the colored square
         if power_type == PowerUpType.BLOCK:
             pygame.draw.rect(self.screen, self.colors['RED'], 
-                           (center_x - 15, center_y - 15, 30, 30))
-            power_label = self.fonts['small'].render("BLOCK", True, self.colors['WHITE'])
-            self.screen.blit(power_label, (center_x - 20, center_y - 5))
+                           (center_x - half, center_y - half, 2 * half, 2 * half))
+            if labels:
+                power_label = self.text_cache.render(self.fonts['small'], "BLOCK", self.colors['WHITE'])
+                self.screen.blit(power_label, (center_x - 20, center_y - 5))
         elif power_type == PowerUpType.SWAP:
             pygame.draw.rect(self.screen, self.colors['BLUE'], 
-                           (center_x - 15, center_y - 15, 30, 30))
-            power_label = self.fonts['small'].render("SWAP", True, self.colors['WHITE'])
-            self.screen.blit(power_label, (center_x - 18, center_y - 5))
+                           (center_x - half, center_y - half, 2 * half, 2 * half))
+            if labels:
+                power_label = self.text_cache.render(self.fonts['small'], "SWAP", self.colors['WHITE'])
+                self.screen.blit(power_label, (center_x - 18, center_y - 5))
         elif power_type == PowerUpType.WILDCARD:
             pygame.draw.rect(self.screen, self.colors['YELLOW'], 
-                           (center_x - 15, center_y - 15, 30, 30))
-            power_label = self.fonts['small'].render("WILD", True, self.colors['BLACK'])
-            self.screen.blit(power_label, (center_x - 15, center_y - 5))
+                           (center_x - half, center_y - half, 2 * half, 2 * half))
+            if labels:
+                power_label = self.text_cache.render(self.fonts['small'], "WILD", self.colors['BLACK'])
+                self.screen.blit(power_label, (center_x - 15, center_y - 5))
 
     def draw_winning_line(self, board_x, board_y):
         """Draw winning line animation"""
@@ -256,180 +337,72 @@ class EnhancedTicTacToe:
             if 0 <= row < self.BOARD_SIZE and 0 <= col < self.BOARD_SIZE:
                 self.handle_board_click(row, col)
 
-    def handle_board_click(self, row, col):
-        """Handle click on a board cell"""
-        if self.selected_powerup and self.selected_powerup[0] == PowerUpType.SWAP:
-            # Complete swap powerup action
-            power_row, power_col = self.selected_powerup[1], self.selected_powerup[2]
-            if self.board[row][col] != 0:  # Can only swap with occupied cell
-                # Swap cells
-                self.board[power_row][power_col], self.board[row][col] = \
-                    self.board[row][col], self.board[power_row][power_col]
-                self.selected_powerup = None
-                self.last_move = (row, col, "SWAP")
-                self.player_turn = False
-                self.ai_thinking = True
-        else:
-            # Check if cell is empty
-            if self.board[row][col] == 0:
-                # Check if there's a powerup
-                if self.powerups[row][col] != 0:
-                    powerup_type = PowerUpType(self.powerups[row][col])
-                    if powerup_type == PowerUpType.BLOCK:
-                        self.use_block_powerup(row, col)
-                    elif powerup_type == PowerUpType.SWAP:
-                        self.use_swap_powerup(row, col)
-                    elif powerup_type == PowerUpType.WILDCARD:
-                        self.use_wildcard_powerup(row, col)
-                    self.powerups[row][col] = 0
-                else:
-                    # Regular move
-                    self.place_mark(row, col, 1)  # 1 represents player's mark (X)
-                    
-                    if self.check_winner() == 0:  # If game is not over
-                        self.player_turn = False
-                        self.ai_thinking = True
+    def request_redraw(self):
+        """Repaint the whole window on the next frame"""
+        self.needs_redraw = True
 
-    def use_block_powerup(self, row, col):
-        """Block a cell from AI use"""
-        self.board[row][col] = 2  # Special value for blocked cell
-        self.last_move = (row, col, "BLOCK")
-        self.player_turn = False
-        self.ai_thinking = True
-    
-    def use_swap_powerup(self, row, col):
-        """Set the cell as "swap pending" and wait for another cell to be selected"""
-        self.selected_powerup = (PowerUpType.SWAP, row, col)
-        self.highlight_cells = [(row, col)]
-    
-    def use_wildcard_powerup(self, row, col):
-        """Allow player to place their mark and get another turn"""
-        self.place_mark(row, col, 1)
-        self.last_move = (row, col, "WILD")
-        # Player gets another turn, so don't switch to AI
-    
-    def place_mark(self, row, col, mark):
-        """Place a mark on the board and check for game end"""
-        self.board[row][col] = mark
-        self.moves_history.append((row, col, mark))
-        if not isinstance(self.last_move, tuple) or len(self.last_move) < 3 or self.last_move[2] != "WILD":
-            self.last_move = (row, col, mark)
-        
-        # Check for win or draw
-        result = self.check_winner()
-        if result == 1:
-            self.game_state = GameState.PLAYER_WIN
-            self.find_winning_line(1)  # Player's mark
-        elif result == -1:
-            self.game_state = GameState.AI_WIN
-            self.find_winning_line(-1)  # AI's mark
-        elif result == 2:  # Draw
-            self.game_state = GameState.DRAW
+    def animating(self):
+        """True while the winning line is still growing"""
+        return (self.winning_line is not None and self.game_state != GameState.ONGOING
+                and self.winning_line_animation < 1.0)
 
-    def find_winning_line(self, mark):
-        """Find the winning line for animation"""
-        # Check rows
-        for row in range(self.BOARD_SIZE):
-            if all(self.board[row][col] == mark for col in range(self.BOARD_SIZE)):
-                self.winning_line = ("row", (row, 0), (row, self.BOARD_SIZE-1))
-                return
-        
-        # Check columns
-        for col in range(self.BOARD_SIZE):
-            if all(self.board[row][col] == mark for row in range(self.BOARD_SIZE)):
-                self.winning_line = ("col", (0, col), (self.BOARD_SIZE-1, col))
-                return
-        
-        # Check main diagonal
-        if all(self.board[i][i] == mark for i in range(self.BOARD_SIZE)):
-            self.winning_line = ("diag", (0, 0), (self.BOARD_SIZE-1, self.BOARD_SIZE-1))
-            return
-        
-        # Check other diagonal
-        if all(self.board[i][self.BOARD_SIZE-1-i] == mark for i in range(self.BOARD_SIZE)):
-            self.winning_line = ("anti-diag", (0, self.BOARD_SIZE-1), (self.BOARD_SIZE-1, 0))
-            return
-        
-        self.winning_line = None
+    def ai_turn_pending(self):
+        """True when the AI still has to move"""
+        return not self.player_turn and self.game_state == GameState.ONGOING
 
-    def check_winner(self):
-        """Check if there's a winner or draw
-        Return: 1 for player win, -1 for AI win, 2 for draw, 0 for ongoing
-        """
-        # Check rows
-        for row in range(self.BOARD_SIZE):
-            row_values = [val for val in self.board[row] if val != 2]  # Ignore blocked cells
-            if len(row_values) == self.BOARD_SIZE and len(set(row_values)) == 1 and row_values[0] != 0:
-                return row_values[0]
-        
-        # Check columns
-        for col in range(self.BOARD_SIZE):
-            col_values = [self.board[row][col] for row in range(self.BOARD_SIZE) if self.board[row][col] != 2]
-            if len(col_values) == self.BOARD_SIZE and len(set(col_values)) == 1 and col_values[0] != 0:
-                return col_values[0]
-        
-        # Check main diagonal
-        diag_values = [self.board[i][i] for i in range(self.BOARD_SIZE) if self.board[i][i] != 2]
-        if len(diag_values) == self.BOARD_SIZE and len(set(diag_values)) == 1 and diag_values[0] != 0:
-            return diag_values[0]
-        
-        # Check other diagonal
-        other_diag_values = [self.board[i][self.BOARD_SIZE-1-i] for i in range(self.BOARD_SIZE) 
-                             if self.board[i][self.BOARD_SIZE-1-i] != 2]
-        if len(other_diag_values) == self.BOARD_SIZE and len(set(other_diag_values)) == 1 and other_diag_values[0] != 0:
-            return other_diag_values[0]
-        
-        # Check for draw (board full or no possible moves)
-        if all(self.board[row][col] != 0 for row in range(self.BOARD_SIZE) for col in range(self.BOARD_SIZE)):
-            return 2
-        
-        # Game ongoing
-        return 0
+    def handle_event(self, event):
+        """Handle one pygame event"""
+        if event.type == pygame.QUIT:
+            self.quit()
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            self.handle_click(event.pos)
+            self.request_redraw()
+        elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED):
+            self.request_redraw()
 
-    def get_valid_moves(self):
-        """Get all valid moves on the board"""
-        moves = []
-        for row in range(self.BOARD_SIZE):
-            for col in range(self.BOARD_SIZE):
-                if self.board[row][col] == 0:
-                    moves.append((row, col))
-        return moves
+    def quit(self):
+        """Save what the session learned and played, then close the window and exit"""
+        self.cancel_ai_search()
+        self.ai_executor.shutdown(wait=False)
+        self.ai_engine.end_game()
+        self.ai_engine.opponent_model.save()  # Keep what was learned since the last batch
+        self.save_record()
+        if self.record_writer is not None:
+            self.record_writer.close()  # Write out the games still buffered
+        pygame.quit()
+        sys.exit()
 
-    def ai_move(self):
-        """Make the AI's move"""
-        best_move = self.ai_engine.get_best_move(self.ai_personality)
-        
-        if best_move:
-            self.place_mark(best_move[0], best_move[1], -1)  # -1 represents AI's mark (O)
-        else:
-            # No valid moves left - draw
-            self.game_state = GameState.DRAW
-        
-        self.player_turn = True
-        self.ai_thinking = False
+    def render_frame(self):
+        """Repaint only what changed: everything after input, just the board while animating"""
+        if self.needs_redraw:
+            self.draw_board()
+            pygame.display.flip()
+            self.needs_redraw = False
+        elif self.animating():
+            pygame.display.update(self.draw_board_area())
 
     def run(self):
         """Main game loop"""
         clock = pygame.time.Clock()
+        self.request_redraw()
         while True:
+            # Sleep until there is input when there is nothing to draw or compute
+            if not (self.needs_redraw or self.animating() or self.ai_turn_pending()):
+                self.handle_event(pygame.event.wait())
             for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    self.handle_click(pygame.mouse.get_pos())
+                self.handle_event(event)
             
-            # AI's turn
-            if not self.player_turn and self.game_state == GameState.ONGOING:
-                if self.ai_thinking:
-                    # Show thinking animation first
-                    self.draw_board()
-                    pygame.display.flip()
-                    time.sleep(0.5)  # Simulate thinking time
-                    self.ai_move()
+            # AI's turn: search in the background while frames keep coming
+            if self.ai_turn_pending():
+                if self.ai_future is None:
+                    self.start_ai_search()
+                    self.request_redraw()
                 else:
-                    self.ai_thinking = True
+                    self.poll_ai_search()
             
-            self.draw_board()
-            pygame.display.flip()
-            clock.tick(30)
\ No newline at end of file
+            self.render_frame()
+            if self.startup is not None:
+                self.mark_startup("first frame")
+                print(json.dumps(self.startup.report(), indent=2))
+                self.quit()
+            clock.tick(config.FPS_CAP)
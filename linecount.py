@@ -0,0 +1,109 @@
+from bitboard import win_lines
+
+# Every winning line keeps one small int code holding how many player, AI
+# and blocked cells it contains. Placing or removing a mark only touches the
+# codes of the lines through that cell, and per-code tables turn a code into
+# its heuristic score, so wins, draws and the evaluation are plain reads.
+
+
+def line_score(player_count, ai_count, blocked_count):
+    """Heuristic value of one line from the AI's point of view"""
+    # Blocked cells don't contribute to winning
+    if blocked_count:
+        return 0
+
+    # Score based on potential to win
+    if player_count == 0 and ai_count > 0:
+        return ai_count * ai_count  # Square for emphasis on near-wins
+    elif ai_count == 0 and player_count > 0:
+        return -player_count * player_count
+
+    return 0
+
+
+class LineCounts:
+    def __init__(self, size, win_length=None):
+        """Per-line player/AI/blocked counts for an NxN board, updated one cell at a time"""
+        self.size = size
+        self.win_length = win_length or size
+        self.lines = win_lines(size, win_length)
+        self.cell_lines = [[] for _ in range(size * size)]
+        for index, (_, cells) in enumerate(self.lines):
+            for row, col in cells:
+                self.cell_lines[row * size + col].append(index)
+        self.cell_lines = [tuple(indices) for indices in self.cell_lines]
+
+        # code = player + ai * base + blocked * base**2
+        k = self.win_length
+        base = k + 1
+        # mark -> (code step, code of a line it fills); blocked cells never complete a line
+        self.steps = {1: (1, k), -1: (base, k * base), 2: (base * base, -1)}
+        codes = [(code % base, code // base % base, code // (base * base)) for code in range(base ** 3)]
+        self.scores = tuple(line_score(*counts) for counts in codes)
+        self.sums = tuple(player - ai + 2 * blocked for player, ai, blocked in codes)
+
+        self.clear()
+
+    def clear(self):
+        """Empty the board"""
+        self.codes = [0] * len(self.lines)
+        self.score = 0  # Sum of line scores, the evaluation without positional bonuses
+        self.empty = self.size * self.size
+        self.complete = {}  # Line index -> mark, for every line one side has filled
+
+    def place(self, cell, mark):
+        """Put mark (1 player, -1 AI, 2 blocked) on an empty cell"""
+        step, full = self.steps[mark]
+        codes = self.codes
+        scores = self.scores
+        score = self.score
+        for index in self.cell_lines[cell]:
+            code = codes[index]
+            codes[index] = new = code + step
+            score += scores[new] - scores[code]
+            if new == full:
+                self.complete[index] = mark
+        self.score = score
+        self.empty -= 1
+
+    def remove(self, cell, mark):
+        """Take mark back off cell, undoing place"""
+        step, full = self.steps[mark]
+        codes = self.codes
+        scores = self.scores
+        score = self.score
+        for index in self.cell_lines[cell]:
+            code = codes[index]
+            if code == full:
+                del self.complete[index]
+            codes[index] = new = code - step
+            score += scores[new] - scores[code]
+        self.score = score
+        self.empty += 1
+
+    def load(self, board):
+        """Rebuild every count from a board array"""
+        self.clear()
+        size = self.size
+        for row in range(size):
+            for col in range(size):
+                if board[row][col] != 0:
+                    self.place(row * size + col, board[row][col])
+
+    def winner(self):
+        """Return: 1 for player win, -1 for AI win, 2 for draw, 0 for ongoing
+
+        When both sides have a full line (possible after a swap) the first
+        one in win_lines order decides, as a full rescan would.
+        """
+        complete = self.complete
+        if complete:
+            return complete[min(complete)]
+        if self.empty == 0:
+            return 2
+        return 0
+
+    def winning_line(self, mark):
+        """The first (kind, cells) line filled by mark, or None"""
+        indices = [index for index, owner in self.complete.items() if owner == mark]
+        return self.lines[min(indices)] if indices else None
@@ -0,0 +1,151 @@
+"""Load-test client for server.py.
+
+Opens many sessions at once, each on its own connection, and plays random
+legal moves (powerups and swaps included) game after game for a fixed
+time. Reports the sessions held, requests per second and move latency,
+the time from sending a move until the reply with the AI's answer, as
+JSON.
+
+Usage:
+    python loadtest.py --sessions 200 --seconds 30 --port 8765
+    python loadtest.py --spawn --sessions 200   # start a local server first
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import config
+
+
+class LoadStats:
+    def __init__(self, seconds):
+        """Counters shared by every simulated player"""
+        self.deadline = time.perf_counter() + seconds
+        self.open = 0  # Sessions open on the server right now
+        self.peak = 0
+        self.requests = 0
+        self.errors = 0
+        self.games = 0
+        self.move_latencies = []  # Seconds per move request
+
+    def report(self, sessions, elapsed):
+        """The run's summary"""
+        latencies = sorted(self.move_latencies)
+        count = len(latencies)
+
+        def percentile(fraction):
+            return latencies[min(count - 1, int(count * fraction))] * 1000 if count else 0.0
+
+        return {
+            'sessions': sessions,
+            'sessions_held': self.peak,
+            'seconds': elapsed,
+            'requests': self.requests,
+            'requests_per_second': self.requests / elapsed if elapsed else 0.0,
+            'games': self.games,
+            'errors': self.errors,
+            'moves': count,
+            'move_p50_ms': percentile(0.5),
+            'move_p99_ms': percentile(0.99),
+            'move_max_ms': latencies[-1] * 1000 if count else 0.0,
+        }
+
+
+async def call(reader, writer, stats, request):
+    """Send one request and wait for its reply"""
+    writer.write(json.dumps(request).encode() + b"\n")
+    await writer.drain()
+    reply = json.loads(await reader.readline())
+    stats.requests += 1
+    if not reply['ok']:
+        stats.errors += 1
+    return reply
+
+
+async def play(reader, writer, stats, options, seed):
+    """One player: random games on its connection until the deadline"""
+    rng = random.Random(seed)
+    new_game = {'op': 'new_game', 'size': options.size, 'win': options.win, 'personality': options.personality}
+    try:
+        while time.perf_counter() < stats.deadline:
+            state = await call(reader, writer, stats, new_game)
+            if not state['ok']:
+                return
+            stats.open += 1
+            stats.peak = max(stats.peak, stats.open)
+            try:
+                while state['state'] == 'ONGOING' and time.perf_counter() < stats.deadline:
+                    # Empty cells to play, or the occupied ones a pending swap can take
+                    cells = [(row, col) for row, values in enumerate(state['board'])
+                             for col, value in enumerate(values) if (value != 0) == state['swap_pending']]
+                    row, col = rng.choice(cells)
+                    op = 'swap' if state['swap_pending'] else 'move'
+                    if options.think:
+                        await asyncio.sleep(rng.uniform(0, 2 * options.think))
+                    sent = time.perf_counter()
+                    reply = await call(reader, writer, stats,
+                                       {'op': op, 'session': state['session'], 'row': row, 'col': col})
+                    stats.move_latencies.append(time.perf_counter() - sent)
+                    if not reply['ok']:
+                        return
+                    state = reply
+                if state['state'] != 'ONGOING':
+                    stats.games += 1
+                await call(reader, writer, stats, {'op': 'close', 'session': state['session']})
+            finally:
+                stats.open -= 1
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, options):
+    """Hold options.sessions sessions for options.seconds and return the report"""
+    # Every player is connected before the clock starts
+    connections = await asyncio.gather(*(asyncio.open_connection(host, port) for _ in range(options.sessions)))
+    stats = LoadStats(options.seconds)
+    began = time.perf_counter()
+    await asyncio.gather(*(play(reader, writer, stats, options, options.seed + index)
+                           for index, (reader, writer) in enumerate(connections)))
+    return stats.report(options.sessions, time.perf_counter() - began)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the game server with simulated players")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    parser.add_argument("--spawn", action="store_true", help="start a server on a free local port for the run")
+    parser.add_argument("--workers", type=int, default=None, help="AI search processes of a spawned server")
+    parser.add_argument("--sessions", type=int, default=100, help="concurrent players, one session each")
+    parser.add_argument("--seconds", type=float, default=10.0, help="length of the run")
+    parser.add_argument("--think", type=float, default=0.0, help="mean seconds a player waits before moving")
+    parser.add_argument("--size", type=int, default=config.DEFAULT_BOARD_SIZE)
+    parser.add_argument("--win", type=int, default=config.DEFAULT_WIN_LENGTH)
+    parser.add_argument("--personality", default="BALANCED")
+    parser.add_argument("--seed", type=int, default=0)
+    options = parser.parse_args()
+
+    server = None
+    host, port = options.host, options.port
+    if options.spawn:
+        command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py"),
+                   "--host", host, "--port", "0"]
+        if options.workers:
+            command += ["--workers", str(options.workers)]
+        server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+        host, port = json.loads(server.stdout.readline())['listening']
+    try:
+        report = asyncio.run(run_load(host, port, options))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,37 @@
-from game import EnhancedTicTacToe
+import argparse
+
+from startup import StartupProfile
+import config
+
+
+def main():
+    profile = StartupProfile()
+    parser = argparse.ArgumentParser(description="Enhanced Tic-Tac-Toe")
+    parser.add_argument("--size", type=int, default=config.DEFAULT_BOARD_SIZE,
+                        help=f"board size N for an NxN board (3-{config.MAX_BOARD_SIZE})")
+    parser.add_argument("--win", type=int, default=config.DEFAULT_WIN_LENGTH, help="marks in a row needed to win")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print how long each phase took up to the first frame as JSON, then quit")
+    args = parser.parse_args()
+    # GameCore's own checks, made here so a bad pair is a usage error rather than a traceback
+    if not 3 <= args.size <= config.MAX_BOARD_SIZE:
+        parser.error(f"--size must be between 3 and {config.MAX_BOARD_SIZE}, got {args.size}")
+    if args.win < 3:
+        parser.error(f"--win must be at least 3, got {args.win}")
+    # GameCore would cap it at the board size; from the command line it is more likely a typo
+    if args.win > args.size:
+        parser.error(f"--win can't be longer than the board size {args.size}, got {args.win}")
+
+    # Imported only now, so --help and bad arguments don't wait for pygame. Importing it
+    # on its own line (game imports it again) gives pygame's load time its own phase.
+    import pygame  # noqa: F401
+    profile.mark("import pygame")
+    from game import EnhancedTicTacToe
+    profile.mark("import game")
+
+    game = EnhancedTicTacToe(args.size, args.win, profile if args.profile_startup else None)
+    game.run()
+
 
 if __name__ == "__main__":
-    game = EnhancedTicTacToe()
-    game.run()
\ No newline at end of file
+    main()
@@ -0,0 +1,220 @@
+import math
+import random
+import time
+
+import numpy as np
+
+from bitboard import iter_bits
+import config
+
+# Playout results are +1 for an AI win, -1 for a player win and 0 for a draw;
+# a node's mean result times EVAL_SCALE fills the panel's evaluation gauge
+EVAL_SCALE = 20
+NEVER = np.iinfo(np.int16).max  # Completion time of a line nobody can fill
+
+
+def random_playouts(board, to_move, line_cells, batch, rng):
+    """Finish batch uniformly random games from board at once and return their results
+
+    board holds one int8 per cell (1 player, -1 AI, 2 blocked, 0 empty).
+    Every playout fills all empty cells in a random order, alternating sides
+    from to_move; the winner is whoever completes a line first.
+    """
+    empty = np.flatnonzero(board == 0)
+    ranks = rng.random((batch, len(empty))).argsort(axis=1).argsort(axis=1)
+
+    # When each cell gets filled (0 = already filled) and by whom
+    times = np.zeros((batch, board.size), dtype=np.int16)
+    times[:, empty] = ranks + 1
+    owners = np.repeat(board[np.newaxis, :], batch, axis=0)
+    owners[:, empty] = np.where(ranks % 2 == 0, to_move, -to_move)
+
+    # A line is won when its last cell is filled, if all its cells share an owner
+    line_times = times[:, line_cells].max(axis=2)
+    line_owners = owners[:, line_cells]
+    player_time = np.where((line_owners == 1).all(axis=2), line_times, NEVER).min(axis=1)
+    ai_time = np.where((line_owners == -1).all(axis=2), line_times, NEVER).min(axis=1)
+
+    return np.sign(player_time.astype(np.int32) - ai_time)
+
+
+class Node:
+    __slots__ = ('cell', 'mark', 'parent', 'children', 'untried', 'visits', 'value', 'result')
+
+    def __init__(self, cell=None, mark=1, parent=None):
+        self.cell = cell  # Move that led here, None for the root
+        self.mark = mark  # Who made that move; the root's "mover" is the player
+        self.parent = parent
+        self.children = []
+        self.untried = None  # Moves not expanded yet, filled on the first visit
+        self.visits = 0
+        self.value = 0.0  # Sum of playout results, from the AI's point of view
+        self.result = 0  # Win/draw state of the position (see LineCounts.winner)
+
+    def mean(self):
+        """Average playout result, from the AI's point of view"""
+        return self.value / self.visits if self.visits else 0.0
+
+
+class MCTS:
+    def __init__(self, engine):
+        """UCT search over an AIEngine's position, with the tree kept between turns"""
+        self.engine = engine
+        self.root = None
+        self.root_key = None  # (player, ai, blocked) bits of the root position
+        self.line_cells = np.array([[row * engine.size + col for row, col in cells]
+                                    for _, cells in engine.counts.lines], dtype=np.intp)
+        self.iterations = 0
+        self.rollouts = 0
+
+    def position_key(self):
+        """The engine's current position as a hashable key"""
+        engine = self.engine
+        return (engine.player_bits, engine.ai_bits, engine.blocked_bits)
+
+    def find_root(self, moves):
+        """Reuse the subtree for the current position if the last search reached it
+
+        That is the last search's root when the same position is searched
+        again, or the node after one of its moves and the player's reply.
+        """
+        key = self.position_key()
+        if self.root is not None:
+            if key == self.root_key:
+                return self.root
+            player, ai, blocked = self.root_key
+            for child in self.root.children:
+                if ai | 1 << child.cell != key[1]:
+                    continue
+                for reply in child.children:
+                    if (player | 1 << reply.cell, blocked) == (key[0], key[2]):
+                        reply.parent = None
+                        return reply
+
+        root = Node()
+        root.untried = list(moves)
+        return root
+
+    def search(self, moves, iterations=None):
+        """Run UCT from the loaded position (AI to move) and return (best child, root)
+
+        Stops after iterations steps (config.MCTS_ITERATIONS by default) or at
+        the engine's deadline, whichever comes first.
+        """
+        engine = self.engine
+        iterations = iterations or config.MCTS_ITERATIONS
+        rng = np.random.default_rng(random.getrandbits(64))
+
+        root = self.find_root(moves)
+        self.root, self.root_key = root, self.position_key()
+        self.iterations = self.rollouts = 0
+
+        for _ in range(iterations):
+            engine.check_cancelled()
+            self.iterate(root, rng)
+            if engine.deadline is not None and time.perf_counter() > engine.deadline:
+                engine.timed_out = True
+                break
+
+        best = max(root.children, key=lambda child: child.visits)
+        return best, root
+
+    def iterate(self, root, rng):
+        """One selection, expansion, batched simulation and backpropagation step"""
+        engine = self.engine
+        counts = engine.counts
+        node = root
+        path = []
+
+        # Selection: descend through fully expanded nodes
+        while node.result == 0 and not node.untried and node.children:
+            node = self.select_child(node)
+            self.play(node.cell, node.mark)
+            path.append(node)
+
+        # Expansion: add one untried move
+        if node.result == 0:
+            if node.untried is None:
+                node.untried = engine.candidate_moves()
+            if node.untried:
+                cell = node.untried.pop(rng.integers(len(node.untried)))
+                child = Node(cell, -node.mark, node)
+                node.children.append(child)
+                self.play(cell, child.mark)
+                child.result = counts.winner()
+                path.append(child)
+                node = child
+
+        # Simulation: a whole batch of random playouts from the new node
+        batch = config.MCTS_BATCH
+        if node.result == 0:
+            board = self.board_array()
+            total = float(random_playouts(board, -node.mark, self.line_cells, batch, rng).sum())
+            self.rollouts += batch
+        else:
+            total = float(self.terminal_value(node.result) * batch)
+
+        # Backpropagation, undoing the moves on the way up
+        for visited in reversed(path):
+            self.undo(visited.cell, visited.mark)
+        node_path = path[::-1] + [root]
+        for visited in node_path:
+            visited.visits += batch
+            visited.value += total
+        self.iterations += 1
+
+    def select_child(self, node):
+        """UCT: the mover picks the child with the best mean for them plus an exploration bonus"""
+        sign = 1 if node.mark == 1 else -1  # Children are AI moves when the player moved into node
+        log_visits = math.log(node.visits)
+        exploration = config.MCTS_EXPLORATION
+        return max(node.children,
+                   key=lambda child: sign * child.value / child.visits
+                   + exploration * math.sqrt(log_visits / child.visits))
+
+    def terminal_value(self, result):
+        """Playout result of a finished game"""
+        if result == -1:
+            return 1
+        if result == 1:
+            return -1
+        return 0
+
+    def play(self, cell, mark):
+        """Make a move on the engine's bitboards and line counts"""
+        engine = self.engine
+        if mark == -1:
+            engine.ai_bits |= 1 << cell
+        else:
+            engine.player_bits |= 1 << cell
+        engine.counts.place(cell, mark)
+
+    def undo(self, cell, mark):
+        """Take back a move made by play"""
+        engine = self.engine
+        if mark == -1:
+            engine.ai_bits &= ~(1 << cell)
+        else:
+            engine.player_bits &= ~(1 << cell)
+        engine.counts.remove(cell, mark)
+
+    def board_array(self):
+        """The engine's position as an int8 cell array for the playouts"""
+        engine = self.engine
+        board = np.zeros(engine.size * engine.size, dtype=np.int8)
+        for bits, value in ((engine.player_bits, 1), (engine.ai_bits, -1), (engine.blocked_bits, 2)):
+            board[list(iter_bits(bits))] = value
+        return board
+
+    def record_trace(self, root, trace, max_depth=2):
+        """Record the top of the tree (mean results scaled like evals) into a trace sink"""
+        count = 0
+        frontier = [(root, 0, None)]
+        while frontier:
+            node, depth, parent_id = frontier.pop(0)
+            node_id = count
+            count += 1
+            trace.record(depth, node_id, parent_id, node.mean() * EVAL_SCALE, False)
+            if depth < max_depth:
+                frontier.extend((child, depth + 1, node_id) for child in node.children)
+        return count
@@ -0,0 +1,179 @@
+"""Persistent model of the human's replies, for the LEARNING personality.
+
+For every position the human has moved in, the model keeps the few replies
+they played most often with their counts (space-saving counting, so a
+position never holds more than a fixed number of slots). The store is a
+flat binary file of fixed-size records, read on first use and rewritten in
+batches of finished games; when it outgrows its position budget the least
+played positions are dropped.
+
+Positions are keyed by a 64-bit BLAKE2b digest of their bitmasks, powerups
+included, so keys are the same on every platform and Python build. The
+header records the key scheme; a store written with another one is
+ignored and replaced.
+"""
+import hashlib
+import itertools
+import os
+import struct
+import warnings
+import zlib
+
+import config
+
+MAGIC = b"TTTO"
+VERSION = 2
+KEY_SCHEME = 1  # BLAKE2b-64 of the masks at fixed offsets, see position_key
+# magic, version, key scheme, board size, win length, replies per record, records, crc32
+HEADER = struct.Struct("<4sHBBBBII")
+MASK_BITS = config.MAX_BOARD_SIZE ** 2  # Any board's cell mask fits
+KEY_BYTES = (6 * MASK_BITS + 7) // 8  # Player, AI, blocked and the three powerup kinds
+NO_CELL = 255  # Unused reply slot
+MAX_COUNT = 0xFFFF  # Counts are halved before they overflow their u16 slot
+
+_revisions = itertools.count()
+
+
+def position_key(player, ai, blocked, powerups=0):
+    """64-bit key of a position given as bitmasks (player = the human; powerups packed as the engine's)"""
+    packed = player | ai << MASK_BITS | blocked << 2 * MASK_BITS | powerups << 3 * MASK_BITS
+    return int.from_bytes(hashlib.blake2b(packed.to_bytes(KEY_BYTES, "little"), digest_size=8).digest(), "little")
+
+
+class OpponentModel:
+    def __init__(self, path=None, size=3, win_length=3, max_positions=None, max_replies=None):
+        """Reply counts for one board configuration; path None keeps them in memory only"""
+        self.path = path
+        self.size = size
+        self.win_length = win_length
+        self.max_positions = max_positions or config.OPPONENT_MODEL_MAX_POSITIONS
+        self.max_replies = max_replies or config.OPPONENT_MODEL_REPLIES
+        self.record = struct.Struct("<Q" + "BH" * self.max_replies)
+        # key -> (cell, count, cell, count, ...) most played first, padded with
+        # (NO_CELL, 0) to max_replies slots like the records; loaded on first use
+        self.positions = None
+        self.unsaved = 0  # Observations not written to disk yet
+        self.game_moves = 0  # Observations in the game being played
+        self.games = 0  # Finished games seen by this process
+        self.revision = next(_revisions)  # Unique per model, renewed whenever the counts change
+
+    def load(self):
+        """Read the store from disk the first time the model is used"""
+        if self.positions is not None:
+            return
+        self.positions = {}
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            self.positions = self.decode(data)
+        except (OSError, ValueError) as e:
+            warnings.warn(f"Ignoring opponent model: {e}")
+
+    def decode(self, data):
+        """Parse a store file, raising ValueError if it is corrupt or for another board"""
+        if data[:4] == MAGIC and data[4:6] != VERSION.to_bytes(2, "little"):
+            raise ValueError(f"{self.path}: opponent model written by another version")
+        if len(data) < HEADER.size:
+            raise ValueError(f"{self.path}: truncated opponent model")
+        magic, version, key_scheme, size, win_length, replies, records, crc = HEADER.unpack_from(data)
+        if (magic != MAGIC or version != VERSION or key_scheme != KEY_SCHEME
+                or size != self.size or win_length != self.win_length
+                or replies != self.max_replies or len(data) != HEADER.size + records * self.record.size):
+            raise ValueError(f"{self.path}: opponent model has an unexpected format or version")
+        payload = memoryview(data)[HEADER.size:]
+        if zlib.crc32(payload) != crc:
+            raise ValueError(f"{self.path}: opponent model checksum mismatch")
+
+        return {fields[0]: fields[1:] for fields in self.record.iter_unpack(payload)}
+
+    def has_data(self):
+        """True once any reply has been observed"""
+        self.load()
+        return bool(self.positions)
+
+    def replies(self, key):
+        """Flat (cell, count, ...) replies seen in a position, most played first; () if none"""
+        return self.positions.get(key, ())
+
+    def observe(self, key, cell):
+        """Count the human playing cell in the position with this key"""
+        self.load()
+        # Re-inserting keeps the dict in least-recently-played order
+        slots = self.positions.pop(key, ())
+        counts = {slots[i]: slots[i + 1] for i in range(0, len(slots), 2) if slots[i] != NO_CELL}
+        if cell in counts:
+            counts[cell] += 1
+        elif len(counts) < self.max_replies:
+            counts[cell] = 1
+        else:
+            # Space-saving: a new reply takes over the rarest slot and its count
+            rarest = min(counts, key=counts.get)
+            counts[cell] = counts.pop(rarest) + 1
+        if counts[cell] > MAX_COUNT:
+            counts = {reply: max(1, count // 2) for reply, count in counts.items()}
+        replies = sorted(counts.items(), key=lambda item: -item[1])
+        replies += [(NO_CELL, 0)] * (self.max_replies - len(replies))
+        self.positions[key] = tuple(value for reply in replies for value in reply)
+        self.revision = next(_revisions)
+        self.unsaved += 1
+        self.game_moves += 1
+
+    def end_game(self):
+        """Close the current game; every config.OPPONENT_MODEL_SAVE_GAMES games the store is saved
+
+        Returns True if the game taught the model anything.
+        """
+        if not self.game_moves:
+            return False
+        self.game_moves = 0
+        self.games += 1
+        if self.games % config.OPPONENT_MODEL_SAVE_GAMES == 0:
+            self.save()
+        return True
+
+    def trim(self):
+        """Drop the least played positions (oldest first on ties) beyond max_positions"""
+        if len(self.positions) <= self.max_positions:
+            return
+        newest_first = list(self.positions.items())[::-1]
+        newest_first.sort(key=lambda item: sum(item[1][1::2]), reverse=True)
+        keep = {key for key, _ in newest_first[:self.max_positions]}
+        self.positions = {key: replies for key, replies in self.positions.items() if key in keep}
+        self.revision = next(_revisions)
+
+    def encode(self):
+        """The store file contents for the current counts (decode reads them back)"""
+        self.load()
+        pack = self.record.pack
+        payload = b"".join(pack(key, *replies) for key, replies in self.positions.items())
+        header = HEADER.pack(MAGIC, VERSION, KEY_SCHEME, self.size, self.win_length, self.max_replies,
+                             len(self.positions), zlib.crc32(payload))
+        return header + payload
+
+    def save(self):
+        """Write the store if anything changed since the last save"""
+        if self.positions is None:
+            return
+        self.trim()
+        if not self.path or not self.unsaved:
+            return
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.encode())
+        os.replace(tmp_path, self.path)
+        self.unsaved = 0
+
+
+_loaded_models = {}
+
+
+def load_opponent_model(path, size, win_length):
+    """The process-wide model stored at path (a private in-memory one when path is None)"""
+    if path is None:
+        return OpponentModel(None, size, win_length)
+    if path not in _loaded_models:
+        _loaded_models[path] = OpponentModel(path, size, win_length)
+    return _loaded_models[path]
@@ -0,0 +1,203 @@
+"""Parallel root search over a process pool.
+
+The engine searches its first (best ordered) root move itself. The pool's
+workers then search the remaining root moves side by side, each with a
+persistent engine of its own. The best root score found so far lives in
+shared memory. A worker reads it when it starts a move and again between
+the replies of the move's opponent node, so a score one worker finds
+narrows every other worker's window. Windows sit one point below the
+shared score, so a move that ties the best still comes back exact. Ties
+then go to the earliest root move, as in the serial search.
+
+LEARNING's opponent model goes to the workers once per revision: the pool
+writes it to a file of its own, and tasks name only the revision, which a
+worker reads the first time it meets it.
+"""
+import math
+import os
+import shutil
+import tempfile
+import time
+import weakref
+from types import SimpleNamespace
+
+from opponent import OpponentModel
+import config
+
+# Worker process state, set up by _init_worker
+_engine_class = None
+_shared_alpha = None
+_cancel = None
+_model_dir = None
+_engines = {}  # (board size, win length) -> engine, kept across searches
+_search_ids = {}  # engine key -> id of the search the engine's killers and history belong to
+_model_revisions = {}  # engine key -> opponent model revision the engine holds
+_table_generations = {}  # (engine key, use_model) -> generation of the parent's table the engine's table copies
+
+
+def _init_worker(engine_class, settings, shared_alpha, cancel, model_dir):
+    """Pool initializer: adopt the parent's settings and the shared search state"""
+    global _engine_class, _shared_alpha, _cancel, _model_dir
+    vars(config).update(settings)
+    _engine_class = engine_class
+    _shared_alpha = shared_alpha
+    _cancel = cancel
+    _model_dir = model_dir
+
+
+def _model_path(model_dir, revision):
+    """Where the pool writes an opponent model revision for its workers"""
+    return os.path.join(model_dir, f"{revision}.bin")
+
+
+def _worker_engine(size, win_length):
+    """This worker's engine for a board configuration"""
+    key = (size, win_length)
+    engine = _engines.get(key)
+    if engine is None:
+        engine = _engine_class(SimpleNamespace(BOARD_SIZE=size, WIN_LENGTH=win_length))
+        # Only the parent process learns from the human; searches send the counts they need
+        engine.opponent_model = OpponentModel(None, size, win_length)
+        engine.shared_alpha = _shared_alpha
+        engine.cancel_event = _cancel
+        _engines[key] = engine
+    return engine
+
+
+def _search_move(task):
+    """Score one root move; returns (index, score, nodes, pruned, timed out)"""
+    (search_id, size, win_length, position, personality, model_revision, generation, max_depth,
+     index, move, deadline) = task
+    engine = _worker_engine(size, win_length)
+    key = (size, win_length)
+    if _search_ids.get(key) != search_id:
+        _search_ids[key] = search_id
+        engine.reset()
+
+    engine.set_position(*position)
+    engine.personality = personality
+    engine.use_model = model_revision is not None
+    if model_revision is not None:
+        if _model_revisions.get(key) != model_revision:
+            with open(_model_path(_model_dir, model_revision), "rb") as f:
+                engine.opponent_model.positions = engine.opponent_model.decode(f.read())
+            _model_revisions[key] = model_revision
+        engine.table = engine.model_table()
+    else:
+        engine.table = engine.transposition_table
+    if _table_generations.get((key, engine.use_model)) != generation:
+        _table_generations[key, engine.use_model] = generation
+        engine.table.clear()  # The parent's table was cleared or replaced
+    # Deadlines travel as wall-clock times; perf_counter only compares within a process
+    engine.deadline = None if deadline is None else time.perf_counter() + (deadline - time.time())
+    engine.timed_out = False
+
+    nodes, pruned = engine.node_count, engine.pruned_count
+    score = engine.search_root_move(move, max_depth, _shared_alpha.value - 1)
+    return index, score, engine.node_count - nodes, engine.pruned_count - pruned, engine.timed_out
+
+
+class RootSearchPool:
+    def __init__(self, workers, engine_class):
+        """Start the worker processes, which build engine_class engines on demand"""
+        import multiprocessing  # Only paid for by processes that search in parallel
+        self.workers = workers
+        # Spawned rather than forked: searches start from the GUI's worker thread
+        context = multiprocessing.get_context("spawn")
+        self.shared_alpha = context.RawValue('d', -math.inf)  # Best root score so far (written here only)
+        self.cancel = context.Event()
+        settings = {name: value for name, value in vars(config).items() if name.isupper()}
+        self.model_dir = tempfile.mkdtemp(prefix="tictactoe-models-")
+        self.model_revision = None  # Revision last written to model_dir
+        self.remove_models = weakref.finalize(self, shutil.rmtree, self.model_dir, True)
+        self.pool = context.Pool(workers, initializer=_init_worker,
+                                 initargs=(engine_class, settings, self.shared_alpha, self.cancel, self.model_dir))
+        self.searches = 0
+
+    def publish_model(self, model):
+        """Write model for the workers unless its revision is already there; returns the revision"""
+        if model.revision != self.model_revision:
+            path = _model_path(self.model_dir, model.revision)
+            with open(path + ".tmp", "wb") as f:
+                f.write(model.encode())
+            os.replace(path + ".tmp", path)
+            if self.model_revision is not None:
+                os.remove(_model_path(self.model_dir, self.model_revision))  # No task names it again
+            self.model_revision = model.revision
+        return model.revision
+
+    def search(self, engine, moves, max_depth, alpha):
+        """Score moves from engine's loaded position, given the root's alpha
+
+        Adds the workers' node counts and timeouts to engine and returns the
+        first best (score, move); the score is at most alpha when no move
+        beats it. Raises SearchCancelled once engine.cancel_event is set.
+        """
+        import multiprocessing
+        self.searches += 1
+        self.shared_alpha.value = alpha
+        position = (engine.player_bits, engine.ai_bits, engine.blocked_bits,
+                    engine.powerup_bits, engine.powerup_mark)
+        model_revision = self.publish_model(engine.opponent_model) if engine.use_model else None
+        deadline = None
+        if engine.deadline is not None:
+            deadline = time.time() + (engine.deadline - time.perf_counter())
+        tasks = [(self.searches, engine.size, engine.win_length, position, engine.personality, model_revision,
+                  engine.table.generation, max_depth, index, move, deadline) for index, move in enumerate(moves)]
+
+        scores = [None] * len(moves)
+        results = self.pool.imap_unordered(_search_move, tasks)
+        received = 0
+        while received < len(tasks):
+            try:
+                index, score, nodes, pruned, timed_out = results.next(0.01)
+            except multiprocessing.TimeoutError:
+                if engine.cancel_event is not None and engine.cancel_event.is_set():
+                    self.cancel_workers(results, len(tasks) - received)
+                    engine.check_cancelled()
+                continue
+            received += 1
+            scores[index] = score
+            if score > self.shared_alpha.value:
+                self.shared_alpha.value = score
+            engine.node_count += nodes
+            engine.pruned_count += pruned
+            engine.timed_out |= timed_out
+
+        best = max(range(len(moves)), key=lambda i: (scores[i], -i))
+        return scores[best], moves[best]
+
+    def cancel_workers(self, results, pending):
+        """Abort the running search and wait until the pending results are in"""
+        self.cancel.set()
+        for _ in range(pending):
+            try:
+                results.next()
+            except Exception:  # The workers' SearchCancelled
+                pass
+        self.cancel.clear()
+
+    def close(self):
+        """Stop the workers and remove the models written for them"""
+        self.pool.terminate()
+        self.pool.join()
+        self.remove_models()
+
+
+_pool = None
+
+
+def root_search_pool(workers, engine_class):
+    """The process-wide pool, restarted when the worker count changes"""
+    global _pool
+    if _pool is not None and _pool.workers != workers:
+        _pool.close()
+        _pool = None
+    if _pool is None:
+        _pool = RootSearchPool(workers, engine_class)
+    return _pool
+
+
+def search_workers():
+    """Worker processes for a parallel root search (config.AI_SEARCH_WORKERS, None for every core)"""
+    return config.AI_SEARCH_WORKERS or os.cpu_count() or 1
@@ -0,0 +1,205 @@
+"""Compact append-only binary record of played games.
+
+A record file is a small header followed by one variable-length record per
+game, so finished games can be appended without touching the rest of the
+file. Every record carries its own length and crc32, so a reader streams
+through files of any size chunk by chunk and catches corrupt games; a last
+game cut short by a crash while appending is skipped.
+
+Record layout (little-endian): u16 length of the rest of the record,
+u32 start time, board size, win length, AI personality, result (GameState
+value) and powerup count bytes, then two bytes (cell, kind) per powerup
+placed at the start, two bytes (cell, action) per action, and the crc32
+of everything after the length.
+
+Usage: python records.py game_records.bin
+"""
+import atexit
+import json
+import os
+import struct
+import sys
+import time
+import warnings
+import zlib
+from collections import Counter
+
+from enums import GameState
+import config
+
+MAGIC = b"TTTR"
+VERSION = 1
+HEADER = struct.Struct("<4sH")  # magic, version
+LENGTH = struct.Struct("<H")
+GAME = struct.Struct("<IBBBBB")  # start time, board size, win length, personality, result, powerups
+CRC = struct.Struct("<I")
+READ_CHUNK = 1 << 20
+
+# Actions, each stored after the cell it happened on
+PLAYER = 0  # The player's mark
+AI = 1  # The AI's mark
+BLOCK = 2  # The player took a BLOCK powerup
+SWAP = 3  # The player took a SWAP powerup; the SWAP_TARGET that follows, if any, is the piece moved onto it
+SWAP_TARGET = 4
+WILD = 5  # The player took a WILDCARD powerup and marked the cell
+ACTION_NAMES = ("PLAYER", "AI", "BLOCK", "SWAP", "SWAP_TARGET", "WILD")
+
+
+class GameRecord:
+    __slots__ = ('size', 'win_length', 'personality', 'result', 'started', 'powerups', 'actions')
+
+    def __init__(self, size, win_length, personality, result, started=0, powerups=(), actions=()):
+        self.size = size
+        self.win_length = win_length
+        self.personality = personality  # AIPersonality value
+        self.result = result  # GameState value
+        self.started = started  # Unix time the game started
+        self.powerups = powerups  # (cell, PowerUpType value) placed at the start
+        self.actions = actions  # (cell, action) in the order they happened
+
+    def encode(self):
+        """The game as one record, length prefix included"""
+        body = GAME.pack(self.started, self.size, self.win_length, self.personality, self.result,
+                         len(self.powerups))
+        body += bytes(value for pair in self.powerups for value in pair)
+        body += bytes(value for pair in self.actions for value in pair)
+        return LENGTH.pack(len(body) + CRC.size) + body + CRC.pack(zlib.crc32(body))
+
+    @classmethod
+    def decode(cls, data, start, end):
+        """Parse the record whose body (after the length) is data[start:end]"""
+        body_end = end - CRC.size
+        body = data[start:body_end]
+        if CRC.unpack_from(data, body_end)[0] != zlib.crc32(body):
+            raise ValueError("game record checksum mismatch")
+        started, size, win_length, personality, result, powerup_count = GAME.unpack_from(body)
+        powerups_end = GAME.size + 2 * powerup_count
+        pairs = body[GAME.size:powerups_end]
+        powerups = tuple(zip(pairs[0::2], pairs[1::2]))
+        pairs = body[powerups_end:]
+        actions = tuple(zip(pairs[0::2], pairs[1::2]))
+        return cls(size, win_length, personality, result, started, powerups, actions)
+
+
+class GameRecordWriter:
+    def __init__(self, path, flush_games=None):
+        """Appends games to the record file at path, writing them out in batches"""
+        self.path = path
+        self.flush_games = flush_games or config.GAME_RECORD_FLUSH_GAMES
+        self.file = None  # Opened on the first flush
+        self.buffer = bytearray()
+        self.pending = 0  # Games in the buffer
+
+    def write(self, record):
+        """Queue a finished game; every flush_games games the queue is written out"""
+        self.buffer += record.encode()
+        self.pending += 1
+        if self.pending >= self.flush_games:
+            self.flush()
+
+    def flush(self):
+        """Append the queued games to the file"""
+        if not self.pending:
+            return
+        if self.file is None:
+            self.file = open(self.path, "ab")
+            if self.file.tell() == 0:
+                self.file.write(HEADER.pack(MAGIC, VERSION))
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer.clear()
+        self.pending = 0
+
+    def close(self):
+        """Write the queued games and close the file"""
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def read_games(path, chunk_size=READ_CHUNK):
+    """Yield the GameRecords in a record file one at a time, reading it chunk by chunk
+
+    Raises ValueError for a file that isn't a game record or a corrupt
+    game; a game cut short at the end of the file is skipped with a warning.
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size or HEADER.unpack(header) != (MAGIC, VERSION):
+            raise ValueError(f"{path}: not a game record file or an unexpected version")
+
+        buffer = b""
+        pos = 0
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            while pos + LENGTH.size <= len(buffer):
+                end = pos + LENGTH.size + LENGTH.unpack_from(buffer, pos)[0]
+                if end > len(buffer):
+                    break
+                try:
+                    record = GameRecord.decode(buffer, pos + LENGTH.size, end)
+                except ValueError as e:
+                    raise ValueError(f"{path}: {e}") from None
+                pos = end
+                yield record
+        if pos < len(buffer):
+            warnings.warn(f"{path}: ignoring a truncated game at the end")
+
+
+_writers = {}
+
+
+def open_record_writer(path):
+    """The process-wide writer appending to path (None when path is None)
+
+    Writers are closed at exit, so games still queued are written out even
+    when their owner never closes them.
+    """
+    if path is None:
+        return None
+    if path not in _writers:
+        if not _writers:
+            atexit.register(close_record_writers)
+        _writers[path] = GameRecordWriter(path)
+    return _writers[path]
+
+
+def close_record_writers():
+    """Write out and close every process-wide writer"""
+    for writer in _writers.values():
+        writer.close()
+
+
+def summarize(path):
+    """Game, action and result counts of a record file, with the read throughput"""
+    start = time.perf_counter()
+    games = actions = 0
+    results = Counter()
+    action_counts = Counter()
+    for record in read_games(path):
+        games += 1
+        actions += len(record.actions)
+        results[record.result] += 1
+        action_counts.update(action for _, action in record.actions)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(path)
+    return {
+        'games': games,
+        'actions': actions,
+        'bytes': size,
+        'bytes_per_game': size / games if games else 0.0,
+        'bytes_per_action': size / actions if actions else 0.0,
+        'results': {GameState(result).name: count for result, count in sorted(results.items())},
+        'action_counts': {ACTION_NAMES[action]: count for action, count in sorted(action_counts.items())},
+        'games_per_second': games / elapsed if elapsed else 0.0,
+        'mb_per_second': size / elapsed / 1e6 if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(summarize(sys.argv[1] if len(sys.argv) > 1 else config.GAME_RECORD_PATH), indent=2))
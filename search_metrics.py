@@ -0,0 +1,234 @@
+"""Per-search telemetry for AIEngine, for callbacks and dashboards.
+
+engine.set_metrics(SearchMetrics(hooks)) turns collection on. Every
+get_best_move then produces one record (a plain dict) that goes to each
+hook and into running totals, which export as Prometheus text:
+
+    wall_ms, nodes, pruned, timed_out   the whole search
+    tt_probes, tt_hits, tt_stores       on the table the search used
+    cutoffs                             beta cutoffs by ply ([0]: the positions right after a root move)
+    depth                               deepest ply searched
+    completed_depth                     last iteration finished within the move budget
+    eval_ms, eval_calls                 static evaluations
+    movegen_ms, movegen_calls           move generation and ordering
+
+The detail counters come from wrappers set_metrics installs on the engine
+instance, so an engine without metrics runs the plain methods and pays
+nothing; with them, the eval and move generation timers slow the search
+a little. In a parallel root search the workers contribute their nodes
+only.
+
+Usage:
+    metrics = SearchMetrics([JsonLinesHook("searches.jsonl")])
+    engine.set_metrics(metrics)
+    ...
+    write_text(path, metrics.prometheus_text())
+"""
+import json
+import os
+import time
+
+# Search wall-time histogram buckets, seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Engine methods the collector wraps while attached
+WRAPPED = ('minimax_alpha_beta', 'record_pruned', 'evaluate_board', 'generate_moves', 'order_moves')
+
+
+class SearchMetrics:
+    def __init__(self, hooks=()):
+        """Collector whose hooks get each search's record"""
+        self.hooks = list(hooks)
+        self.last = None  # The latest search's record
+        self.totals = {}  # (personality, board) -> summed counters, see record()
+        self.begin_search()
+
+    def add_hook(self, hook):
+        """Call hook(record) after every search"""
+        self.hooks.append(hook)
+
+    def attach(self, engine):
+        """Wrap engine's hot methods with this collector's counters"""
+        clock = time.perf_counter_ns
+        search = engine.minimax_alpha_beta
+        record_pruned = engine.record_pruned
+        evaluate_board = engine.evaluate_board
+        generate_moves = engine.generate_moves
+        order_moves = engine.order_moves
+
+        def counted_search(depth, *args):
+            if depth >= self.depth:
+                self.depth = depth + 1
+            return search(depth, *args)
+
+        def counted_pruned(moves, index, next_node_id, depth, node_id):
+            cutoffs = self.cutoffs
+            while len(cutoffs) <= depth:
+                cutoffs.append(0)
+            cutoffs[depth] += 1
+            return record_pruned(moves, index, next_node_id, depth, node_id)
+
+        def timed_evaluate():
+            start = clock()
+            value = evaluate_board()
+            self.eval_ns += clock() - start
+            self.eval_calls += 1
+            return value
+
+        def timed_generate(is_maximizing):
+            start = clock()
+            moves = generate_moves(is_maximizing)
+            self.movegen_ns += clock() - start
+            self.movegen_calls += 1
+            return moves
+
+        def timed_order(*args):
+            start = clock()
+            moves = order_moves(*args)
+            self.movegen_ns += clock() - start
+            return moves
+
+        engine.minimax_alpha_beta = counted_search
+        engine.record_pruned = counted_pruned
+        engine.evaluate_board = timed_evaluate
+        engine.generate_moves = timed_generate
+        engine.order_moves = timed_order
+
+    def detach(self, engine):
+        """Put engine's own methods back"""
+        for name in WRAPPED:
+            engine.__dict__.pop(name, None)
+
+    def begin_search(self, engine=None):
+        """Zero the per-search counters; engine.table is the table the search will use"""
+        self.started = time.perf_counter()
+        self.depth = 0
+        self.cutoffs = []
+        self.eval_ns = self.eval_calls = 0
+        self.movegen_ns = self.movegen_calls = 0
+        table = engine.table if engine is not None else None
+        self.table_start = (table.hits, table.misses, table.stores) if table is not None else (0, 0, 0)
+
+    def end_search(self, engine, move):
+        """Build the finished search's record and hand it on"""
+        hits, misses, stores = engine.table.hits, engine.table.misses, engine.table.stores
+        start_hits, start_misses, start_stores = self.table_start
+        self.record({
+            'personality': engine.personality.name,
+            'board': f"{engine.size}x{engine.size}/{engine.win_length}",
+            'wall_ms': (time.perf_counter() - self.started) * 1000,
+            'nodes': engine.node_count,
+            'pruned': engine.pruned_count,
+            'timed_out': engine.timed_out,
+            'tt_probes': hits + misses - start_hits - start_misses,
+            'tt_hits': hits - start_hits,
+            'tt_stores': stores - start_stores,
+            'cutoffs': self.cutoffs,
+            'depth': self.depth,
+            'completed_depth': engine.completed_depth,
+            'eval_ms': self.eval_ns / 1e6,
+            'eval_calls': self.eval_calls,
+            'movegen_ms': self.movegen_ns / 1e6,
+            'movegen_calls': self.movegen_calls,
+            'move': list(move) if move else None,
+        })
+
+    def record(self, record):
+        """Add a search record (from this process or a worker's) to the totals and pass it to the hooks"""
+        key = (record['personality'], record['board'])
+        totals = self.totals.get(key)
+        if totals is None:
+            totals = self.totals[key] = {
+                'searches': 0, 'seconds': 0.0, 'buckets': [0] * len(LATENCY_BUCKETS), 'nodes': 0,
+                'tt_probes': 0, 'tt_hits': 0, 'tt_stores': 0, 'cutoffs': [], 'timeouts': 0,
+                'eval_seconds': 0.0, 'movegen_seconds': 0.0, 'depth': 0, 'completed_depth': 0,
+            }
+        seconds = record['wall_ms'] / 1000
+        totals['searches'] += 1
+        totals['seconds'] += seconds
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                totals['buckets'][i] += 1
+        totals['nodes'] += record['nodes']
+        totals['tt_probes'] += record['tt_probes']
+        totals['tt_hits'] += record['tt_hits']
+        totals['tt_stores'] += record['tt_stores']
+        cutoffs = totals['cutoffs']
+        for ply, count in enumerate(record['cutoffs']):
+            if ply == len(cutoffs):
+                cutoffs.append(0)
+            cutoffs[ply] += count
+        totals['timeouts'] += record['timed_out']
+        totals['eval_seconds'] += record['eval_ms'] / 1000
+        totals['movegen_seconds'] += record['movegen_ms'] / 1000
+        totals['depth'] = record['depth']
+        totals['completed_depth'] = record.get('completed_depth', 0)
+
+        self.last = record
+        for hook in self.hooks:
+            hook(record)
+
+    def prometheus_text(self, prefix="tictactoe_ai"):
+        """The totals in the Prometheus text exposition format"""
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f'{label}="{text}"' for label, text in labels)
+                lines.append(f"{prefix}_{name}{suffix}{{{label_text}}} {value}")
+
+        def per_key(field):
+            return [("", (("personality", personality), ("board", board)), totals[field])
+                    for (personality, board), totals in sorted(self.totals.items())]
+
+        histogram = []
+        for (personality, board), totals in sorted(self.totals.items()):
+            labels = (("personality", personality), ("board", board))
+            for bound, count in zip(LATENCY_BUCKETS, totals['buckets']):
+                histogram.append(("_bucket", labels + (("le", repr(bound)),), count))
+            histogram.append(("_bucket", labels + (("le", "+Inf"),), totals['searches']))
+            histogram.append(("_sum", labels, totals['seconds']))
+            histogram.append(("_count", labels, totals['searches']))
+        family("search_seconds", "histogram", "Wall time of get_best_move", histogram)
+        family("nodes_total", "counter", "Search nodes visited or pruned", per_key('nodes'))
+        family("tt_probes_total", "counter", "Transposition table lookups", per_key('tt_probes'))
+        family("tt_hits_total", "counter", "Transposition table lookups that found an entry", per_key('tt_hits'))
+        family("tt_stores_total", "counter", "Transposition table entries written", per_key('tt_stores'))
+        family("cutoffs_total", "counter", "Beta cutoffs by ply below the root", [
+            ("", (("personality", personality), ("board", board), ("ply", str(ply + 1))), count)
+            for (personality, board), totals in sorted(self.totals.items())
+            for ply, count in enumerate(totals['cutoffs'])])
+        family("timeouts_total", "counter", "Searches cut short by the move budget", per_key('timeouts'))
+        family("eval_seconds_total", "counter", "Time in static evaluation", per_key('eval_seconds'))
+        family("movegen_seconds_total", "counter", "Time generating and ordering moves", per_key('movegen_seconds'))
+        family("search_depth", "gauge", "Deepest ply the last search reached", per_key('depth'))
+        family("completed_depth", "gauge", "Last iteration the last search finished in its budget",
+               per_key('completed_depth'))
+        return "\n".join(lines) + "\n"
+
+
+class JsonLinesHook:
+    def __init__(self, path):
+        """Hook appending each record to path as one JSON line"""
+        self.path = path
+        self.file = None  # Opened on the first record
+
+    def __call__(self, record):
+        if self.file is None:
+            self.file = open(self.path, "a", buffering=1)  # Line-buffered: tails see every search
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def write_text(path, text):
+    """Replace the file at path atomically (for a node_exporter textfile collector)"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,75 @@
+from array import array
+import math
+
+class NullTrace:
+    """Trace sink that records nothing; the default when nobody is watching"""
+    enabled = False
+    total = 0
+    pruned_total = 0
+
+    def __len__(self):
+        return 0
+
+    def record(self, depth, node_id, parent_id, value, pruned):
+        """Discard a node"""
+
+    def clear(self):
+        """Nothing to clear"""
+
+    def nodes(self):
+        """No nodes were kept"""
+        return []
+
+
+class ArrayTrace:
+    """Struct-of-arrays search trace with a hard cap and an optional ring-buffer mode"""
+    enabled = True
+
+    def __init__(self, capacity, ring=False):
+        """Preallocate typed arrays for capacity nodes"""
+        self.capacity = capacity
+        self.ring = ring
+        self.depth = array('h', bytes(2 * capacity))
+        self.node_id = array('q', bytes(8 * capacity))
+        self.parent_id = array('q', bytes(8 * capacity))  # -1 for the root
+        self.value = array('d', bytes(8 * capacity))  # NaN for pruned nodes
+        self.pruned = array('b', bytes(capacity))
+        self.clear()
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def clear(self):
+        """Forget every node, keeping the buffers"""
+        self.total = 0  # Nodes offered, including any dropped or overwritten
+        self.pruned_total = 0
+
+    def record(self, depth, node_id, parent_id, value, pruned):
+        """Store one search node, dropping it (or the oldest, in ring mode) when full"""
+        index = self.total
+        self.total += 1
+        if pruned:
+            self.pruned_total += 1
+        if index >= self.capacity:
+            if not self.ring:
+                return
+            index %= self.capacity
+
+        self.depth[index] = depth
+        self.node_id[index] = node_id
+        self.parent_id[index] = -1 if parent_id is None else parent_id
+        self.value[index] = math.nan if value is None else value
+        self.pruned[index] = pruned
+
+    def nodes(self):
+        """Kept nodes, oldest first, as (depth, id, parent, value, pruned) tuples"""
+        count = len(self)
+        start = self.total % self.capacity if self.ring and self.total > self.capacity else 0
+        result = []
+        for offset in range(count):
+            i = (start + offset) % self.capacity
+            parent_id = self.parent_id[i]
+            value = self.value[i]
+            result.append((self.depth[i], self.node_id[i], None if parent_id < 0 else parent_id,
+                           None if math.isnan(value) else value, bool(self.pruned[i])))
+        return result
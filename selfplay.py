@@ -0,0 +1,168 @@
+"""Headless AI-vs-AI self-play over a process pool.
+
+Each game pits an X personality (playing the human's side, powerups
+included) against an O personality (the regular AI side). Finished games
+are streamed to a JSON-lines file, one compact record per game, in the
+order they complete.
+
+Usage: python selfplay.py --games 10000 --out selfplay.jsonl
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+
+from core import GameCore
+from enums import GameState, PowerUpType, AIPersonality
+from opponent import load_opponent_model
+import config
+
+# The X side isn't a human: LEARNING models it in memory without touching the stored model
+config.OPPONENT_MODEL_PATH = None
+# Games already run one per core, so each one searches serially
+config.AI_SEARCH_WORKERS = 1
+# Moves search to the depth limit rather than for a slice of wall time, so a
+# game replays exactly from its seed however busy the machine is
+config.AI_MOVE_BUDGET = 1e9
+
+# Per-process game, created once by the pool initializer; play_game clears
+# what its engine learned, so no game depends on the ones the worker played before
+_worker_game = None
+
+
+def _init_worker(board_size=None, win_length=None):
+    """Pool initializer: build this worker's headless game"""
+    global _worker_game
+    _worker_game = GameCore(board_size, win_length)
+
+
+def _move_stats(engine, elapsed):
+    """Compact per-move search statistics: nodes, pruned, eval, microseconds"""
+    return [engine.node_count, engine.pruned_count, engine.current_eval, int(elapsed * 1e6)]
+
+
+def play_game(spec):
+    """Play one game from a (index, seed, x_name, o_name) spec and return its record
+
+    Each move is [side, row, col, powerup used, swap target or None,
+    nodes, pruned, eval, microseconds].
+    """
+    index, seed, x_name, o_name = spec
+    game = _worker_game if _worker_game is not None else GameCore()
+    engine = game.ai_engine
+    x_personality = AIPersonality[x_name]
+
+    # Seed before reset_game so add_powerups and RANDOM personalities are reproducible
+    random.seed(seed)
+    game.reset_game()
+    game.ai_personality = AIPersonality[o_name]
+    # Start from cold tables, tree and reply counts: the record depends on the seed alone
+    engine.transposition_table.clear()
+    engine.learning_table = None
+    engine.mcts = None
+    engine.opponent_model = load_opponent_model(None, game.BOARD_SIZE, game.WIN_LENGTH)
+    rng = random.Random(seed)
+
+    powerups = [[row, col, game.powerups[row][col]]
+                for row in range(game.BOARD_SIZE) for col in range(game.BOARD_SIZE) if game.powerups[row][col]]
+    moves = []
+
+    while game.game_state == GameState.ONGOING:
+        start = time.perf_counter()
+        if game.player_turn:
+            move = engine.get_best_move(x_personality, mark=1)
+            if move is None:
+                game.game_state = GameState.DRAW
+                break
+            row, col = move
+            action = PowerUpType(game.powerups[row][col]).name if game.powerups[row][col] else ""
+            game.handle_board_click(row, col)
+            record = [1, row, col, action, None]
+
+            if game.selected_powerup:
+                # SWAP: the occupied cell whose piece moves onto the powerup cell
+                target = engine.swap_target
+                if target is None:
+                    targets = [(r, c) for r in range(game.BOARD_SIZE) for c in range(game.BOARD_SIZE)
+                               if game.board[r][c] != 0]
+                    target = rng.choice(targets)
+                game.handle_board_click(*target)
+                record[4] = list(target)
+        else:
+            history_length = len(game.moves_history)
+            game.ai_move()
+            row, col = game.moves_history[-1][:2] if len(game.moves_history) > history_length else (-1, -1)
+            record = [-1, row, col, "", None]
+
+        moves.append(record + _move_stats(engine, time.perf_counter() - start))
+
+    return {
+        'g': index,
+        'seed': seed,
+        'x': x_name,
+        'o': o_name,
+        'pu': powerups,
+        'm': moves,
+        'r': game.game_state.name,
+    }
+
+
+def game_specs(num_games, pairs, seed):
+    """Spread num_games round-robin over the personality pairs"""
+    pair_cycle = itertools.cycle(pairs)
+    for index in range(num_games):
+        x_personality, o_personality = next(pair_cycle)
+        yield index, seed + index, x_personality.name, o_personality.name
+
+
+def run_selfplay(num_games, out_path, pairs=None, workers=None, seed=0, chunksize=16,
+                 board_size=None, win_length=None):
+    """Play num_games across a process pool, streaming records to out_path"""
+    if pairs is None:
+        pairs = list(itertools.product(AIPersonality, repeat=2))
+    workers = workers or os.cpu_count() or 1
+
+    results = {state.name: 0 for state in GameState}
+    start = time.perf_counter()
+    with open(out_path, "w") as out, multiprocessing.Pool(workers, initializer=_init_worker,
+                                                         initargs=(board_size, win_length)) as pool:
+        for record in pool.imap_unordered(play_game, game_specs(num_games, pairs, seed), chunksize):
+            out.write(json.dumps(record, separators=(",", ":")) + "\n")
+            results[record['r']] += 1
+    elapsed = time.perf_counter() - start
+
+    return {'games': num_games, 'workers': workers, 'seconds': elapsed,
+            'games_per_second': num_games / elapsed if elapsed else 0.0, 'results': results}
+
+
+def parse_pairs(text):
+    """Parse "BALANCED:DEFENSIVE,RANDOM:AGGRESSIVE" into personality pairs"""
+    pairs = []
+    for item in text.split(","):
+        x_name, o_name = item.split(":")
+        pairs.append((AIPersonality[x_name.strip().upper()], AIPersonality[o_name.strip().upper()]))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play AI-vs-AI games across all cores")
+    parser.add_argument("--games", type=int, default=1000, help="number of games to play")
+    parser.add_argument("--out", default="selfplay.jsonl", help="JSON-lines output file")
+    parser.add_argument("--pairs", type=parse_pairs, default=None,
+                        help="X:O personality pairs, e.g. BALANCED:DEFENSIVE,RANDOM:AGGRESSIVE (default: all)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0, help="base seed; game i uses seed + i")
+    parser.add_argument("--size", type=int, default=None, help="board size N for an NxN board")
+    parser.add_argument("--win", type=int, default=None, help="marks in a row needed to win")
+    args = parser.parse_args()
+
+    summary = run_selfplay(args.games, args.out, args.pairs, args.workers, args.seed,
+                           board_size=args.size, win_length=args.win)
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""Asyncio game server: many concurrent headless games over TCP.
+
+Clients send one JSON object per line and get one back per request,
+carrying the request's "id". Every connection can open any number of
+sessions (games against the AI), which end when it disconnects. The
+player's move is applied on the event loop; the AI's reply is searched on
+a process pool so the loop keeps serving other sessions meanwhile. Each
+session is a CompactGame (see session.py) of a few hundred bytes, so one
+server holds hundreds of thousands of idle games.
+
+Requests ("op" and its fields):
+    new_game   size, win, personality (all optional)  -> a new session's state
+    move       session, row, col   play a cell; a cell holding a powerup triggers it
+    swap       session, row, col   the occupied cell a pending SWAP moves onto its cell
+    state      session
+    close      session             end the session (its game goes to the game record)
+    metrics                        the AI search totals as Prometheus text (with --metrics-*)
+
+Replies are {"id", "ok": true, ...state} or {"id", "ok": false, "error"}.
+
+Usage:
+    python server.py --port 8765 --move-budget 0.05
+    python server.py --metrics-jsonl searches.jsonl --metrics-prom /var/lib/node_exporter/tictactoe.prom
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+
+from enums import AIPersonality, GameState
+from records import open_record_writer
+from search_metrics import JsonLinesHook, SearchMetrics, write_text
+from session import CompactGame, board_rules
+import config
+
+# Players are many different people: LEARNING doesn't model them, and the
+# server already spreads sessions across cores, so each search is serial
+config.OPPONENT_MODEL_PATH = None
+config.AI_SEARCH_WORKERS = 1
+
+
+def search_move(size, win_length, position, personality, metrics=False, budget=None):
+    """Pool task: the AI's move for a position within budget seconds, with the search's node count, eval
+    and metrics record"""
+    engine = board_rules(size, win_length).engine  # One per board configuration in each process
+    if metrics and engine.metrics is None:
+        engine.set_metrics(SearchMetrics())
+    move = engine.get_best_move(AIPersonality(personality), position=position, budget=budget)
+    return move, engine.node_count, engine.current_eval, engine.metrics.last if metrics else None
+
+
+class RequestError(Exception):
+    """A request the server refuses; the message goes back to the client"""
+
+
+def session_state(session_id, game, ai_reply=None):
+    """The game as sent to the client, with the AI's (move, nodes, eval) reply to the request"""
+    move, nodes, value = ai_reply or (None, 0, 0)
+    return {
+        'session': session_id,
+        'board': game.board(),
+        'powerups': game.powerup_grid(),
+        'state': game.game_state.name,
+        'swap_pending': game.swap_cell is not None,
+        'ai_move': list(move) if move else None,
+        'ai_nodes': nodes,
+        'ai_eval': value,
+    }
+
+
+def check_cell(game, row, col):
+    """Refuse cells off the board or a finished game"""
+    size = game.rules.size
+    if not (isinstance(row, int) and isinstance(col, int) and 0 <= row < size and 0 <= col < size):
+        raise RequestError(f"row and col must be integers in 0..{size - 1}")
+    if game.game_state != GameState.ONGOING:
+        raise RequestError("the game is over")
+    return row * size + col
+
+
+class GameServer:
+    def __init__(self, workers=None, max_sessions=None, metrics=None, move_budget=None):
+        """Sessions and the process pool that searches their AI moves
+
+        metrics, a SearchMetrics, gets the record of every AI search.
+        move_budget is each search's deadline in seconds
+        (config.AI_MOVE_BUDGET by default).
+        """
+        self.metrics = metrics
+        self.move_budget = move_budget or config.AI_MOVE_BUDGET
+        self.executor = ProcessPoolExecutor(workers or config.SERVER_WORKERS or os.cpu_count() or 1)
+        self.max_sessions = max_sessions or config.SERVER_MAX_SESSIONS
+        self.sessions = {}  # Session id -> CompactGame
+        self.busy = set()  # Sessions waiting for an AI reply
+        self.session_ids = itertools.count(1)
+
+    async def handle_connection(self, reader, writer):
+        """Serve one client until it disconnects, then close its sessions"""
+        owned = set()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                # Requests run side by side, so a slow AI reply doesn't hold up the connection's other sessions
+                task = asyncio.create_task(self.respond(line, owned, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass  # Dropped connection or an overlong line
+        except asyncio.CancelledError:
+            pass  # The server is stopping; ending quietly keeps asyncio from reporting the handler
+        finally:
+            for task in list(tasks):
+                task.cancel()
+            for session_id in owned:
+                self.close_session(session_id)
+            writer.close()
+
+    async def respond(self, line, owned, writer):
+        """Answer one request line"""
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError("a request must be a JSON object")
+            request_id = request.get('id')
+            reply = await self.handle(request, owned)
+            reply['ok'] = True
+        except (RequestError, json.JSONDecodeError) as e:
+            reply = {'ok': False, 'error': str(e)}
+        except Exception as e:  # A failed search mustn't leave the client waiting
+            reply = {'ok': False, 'error': f"internal error: {e!r}"}
+        reply['id'] = request_id
+        try:
+            writer.write(json.dumps(reply, separators=(",", ":")).encode() + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def handle(self, request, owned):
+        """Carry out a request and return the reply"""
+        op = request.get('op')
+        if op == 'metrics':
+            if self.metrics is None:
+                raise RequestError("metrics are off (start the server with --metrics-jsonl or --metrics-prom)")
+            return {'prometheus': self.metrics.prometheus_text()}
+        if op == 'new_game':
+            session_id = self.new_game(request, owned)
+            return session_state(session_id, self.sessions[session_id])
+
+        session_id = request.get('session')
+        game = self.sessions.get(session_id)
+        if game is None or session_id not in owned:
+            raise RequestError("unknown session")
+        if session_id in self.busy and op != 'state':
+            raise RequestError("the AI is still replying to the previous move")
+        if op in ('move', 'swap') and game.ai_to_move():
+            raise RequestError("it is the AI's turn")
+        if op == 'move':
+            cell = check_cell(game, request.get('row'), request.get('col'))
+            if game.swap_cell is not None:
+                raise RequestError("a SWAP is pending: choose its target with swap")
+            if game.cell_value(cell) != 0:
+                raise RequestError("the cell is occupied")
+        elif op == 'swap':
+            cell = check_cell(game, request.get('row'), request.get('col'))
+            if game.swap_cell is None:
+                raise RequestError("no SWAP is pending")
+            if game.cell_value(cell) == 0:
+                raise RequestError("the swap target must be occupied")
+        elif op == 'close':
+            self.close_session(session_id)
+            owned.discard(session_id)
+            return {'session': session_id, 'state': game.game_state.name}
+        elif op != 'state':
+            raise RequestError(f"unknown op {op!r}")
+
+        ai_reply = None
+        if op != 'state':
+            saved = game.snapshot()
+            game.handle_board_click(request['row'], request['col'])
+            if game.ai_to_move():
+                try:
+                    ai_reply = await self.reply_for_ai(session_id, game)
+                except Exception:
+                    game.restore(saved)  # Take the move back: the client can send it again
+                    raise
+        return session_state(session_id, game, ai_reply)
+
+    def new_game(self, request, owned):
+        """Open a session from a new_game request and return its id"""
+        if len(self.sessions) >= self.max_sessions:
+            raise RequestError("the server is full")
+        size = request.get('size', config.DEFAULT_BOARD_SIZE)
+        win_length = request.get('win', config.DEFAULT_WIN_LENGTH)
+        name = str(request.get('personality', AIPersonality.BALANCED.name)).upper()
+        if name not in AIPersonality.__members__:
+            raise RequestError(f"unknown personality {name!r}")
+        if not (isinstance(size, int) and isinstance(win_length, int)):
+            raise RequestError("size and win must be integers")
+        try:
+            game = CompactGame(size, win_length, AIPersonality[name])
+        except ValueError as e:
+            raise RequestError(str(e)) from None
+        session_id = next(self.session_ids)
+        self.sessions[session_id] = game
+        owned.add(session_id)
+        return session_id
+
+    async def reply_for_ai(self, session_id, game):
+        """Search the AI's move on the pool and play it; returns (move, nodes, eval)"""
+        loop = asyncio.get_running_loop()
+        rules = game.rules
+        self.busy.add(session_id)
+        try:
+            *reply, record = await loop.run_in_executor(self.executor, search_move, rules.size, rules.win_length,
+                                                        game.position(), game.personality.value,
+                                                        self.metrics is not None, self.move_budget)
+        finally:
+            self.busy.discard(session_id)
+        if record is not None:
+            self.metrics.record(record)
+        game.apply_ai_move(reply[0])
+        return reply
+
+    def close_session(self, session_id):
+        """Drop a session, keeping its game in the game record"""
+        game = self.sessions.pop(session_id, None)
+        if game is not None:
+            game.save_record()
+
+    def shutdown(self):
+        """Close every session and stop the pool"""
+        for session_id in list(self.sessions):
+            self.close_session(session_id)
+        writer = open_record_writer(config.GAME_RECORD_PATH)
+        if writer is not None:
+            writer.close()  # Write out the games still buffered
+        self.executor.shutdown(cancel_futures=True)
+
+
+async def export_metrics(metrics, path):
+    """Rewrite the Prometheus text file at path every config.SERVER_METRICS_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(config.SERVER_METRICS_INTERVAL)
+        write_text(path, metrics.prometheus_text())
+
+
+async def serve(host, port, workers=None, ready=None, metrics_jsonl=None, metrics_prom=None, move_budget=None):
+    """Run a GameServer until cancelled; ready(host, port) is called once it listens
+
+    metrics_jsonl gets one JSON line per AI search; metrics_prom is kept
+    up to date with the search totals in Prometheus text format.
+    move_budget caps each AI search, in seconds.
+    """
+    metrics = jsonl = exporter = None
+    if metrics_jsonl or metrics_prom:
+        metrics = SearchMetrics()
+        if metrics_jsonl:
+            jsonl = JsonLinesHook(metrics_jsonl)
+            metrics.add_hook(jsonl)
+        if metrics_prom:
+            exporter = asyncio.create_task(export_metrics(metrics, metrics_prom))
+    game_server = GameServer(workers, metrics=metrics, move_budget=move_budget)
+    try:
+        # Terminating stops the server like Ctrl-C: sessions are closed and the game record saved
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:
+        pass  # No signal handlers on Windows event loops
+    server = await asyncio.start_server(game_server.handle_connection, host, port)
+    host, port = server.sockets[0].getsockname()[:2]
+    if ready is not None:
+        ready(host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        game_server.shutdown()
+        if exporter is not None:
+            exporter.cancel()
+            write_text(metrics_prom, metrics.prometheus_text())
+        if jsonl is not None:
+            jsonl.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve tic-tac-toe games against the AI over TCP (JSON lines)")
+    parser.add_argument("--host", default=config.SERVER_HOST, help="address to listen on")
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT, help="port to listen on (0 picks a free one)")
+    parser.add_argument("--workers", type=int, default=None, help="AI search processes (default: all cores)")
+    parser.add_argument("--move-budget", type=float, default=None,
+                        help=f"seconds an AI search may take (default: {config.AI_MOVE_BUDGET}); "
+                             "time queued for a worker comes on top")
+    parser.add_argument("--metrics-jsonl", default=None, help="append a JSON line per AI search to this file")
+    parser.add_argument("--metrics-prom", default=None,
+                        help="keep the AI search totals in this file as Prometheus text (textfile collector)")
+    args = parser.parse_args()
+
+    def ready(host, port):
+        print(json.dumps({'listening': [host, port]}), flush=True)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, ready, args.metrics_jsonl, args.metrics_prom,
+                          args.move_budget))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""Memory-compact headless games, for hosting many at once.
+
+A CompactGame plays by GameCore's rules but keeps the whole game in a
+handful of ints and one small bytearray: the board as the engine's
+(player, ai, blocked) bitmasks, the unused powerups packed like the
+engine's powerup bits, the turn, result, pending SWAP and personality in
+one flags int, and the game's (cell, action) history as in the game
+record. Board geometry, winning-line masks and the AI engine (with its
+transposition table) live in one BoardRules per board configuration,
+shared by every game on it.
+
+Usage: python session.py --games 100000 --size 3 --win 3
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from ai import AIEngine
+from bitboard import full_mask, iter_bits, win_masks
+from enums import AIPersonality, GameState, PowerUpType
+from records import GameRecord, open_record_writer, PLAYER, AI, BLOCK, SWAP, SWAP_TARGET, WILD
+import config
+
+# Fields of CompactGame.flags
+STATE_MASK = 0x3  # GameState value
+AI_TURN = 0x4  # The AI is to move
+SWAP_SHIFT = 3  # Cell + 1 of a SWAP waiting for its target (0: none)
+SWAP_MASK = 0xFF << SWAP_SHIFT
+PERSONALITY_SHIFT = 11  # AIPersonality value
+
+POWERUP_KINDS = [p.value for p in PowerUpType if p != PowerUpType.NONE]
+
+
+class BoardRules:
+    def __init__(self, size, win_length):
+        """What every game on one board configuration shares"""
+        self.size = size
+        self.win_length = win_length
+        self.cells = size * size
+        self.full = full_mask(size)
+        # Per cell, the masks of the winning lines through it: a move can only complete one of those
+        lines = win_masks(size, win_length)
+        self.cell_lines = tuple(tuple(line for line in lines if line >> cell & 1) for cell in range(self.cells))
+        # The engine every game on this board searches and learns with
+        self.engine = AIEngine(SimpleNamespace(BOARD_SIZE=size, WIN_LENGTH=win_length))
+
+    def completes_line(self, bits, cell):
+        """True when bits hold every cell of a winning line through cell"""
+        for line in self.cell_lines[cell]:
+            if bits & line == line:
+                return True
+        return False
+
+
+_rules = {}
+
+
+def board_rules(size=None, win_length=None):
+    """The process-wide BoardRules of a board configuration, checked like GameCore's"""
+    size = size or config.DEFAULT_BOARD_SIZE
+    win_length = min(win_length or config.DEFAULT_WIN_LENGTH, size)
+    key = (size, win_length)
+    rules = _rules.get(key)
+    if rules is None:
+        if not 3 <= size <= config.MAX_BOARD_SIZE:
+            raise ValueError(f"board size must be between 3 and {config.MAX_BOARD_SIZE}, got {size}")
+        if win_length < 3:
+            raise ValueError(f"win length must be at least 3, got {win_length}")
+        rules = _rules[key] = BoardRules(size, win_length)
+    return rules
+
+
+class CompactGame:
+    __slots__ = ('rules', 'player', 'ai', 'blocked', 'powerups', 'flags', 'started', 'history')
+
+    def __init__(self, size=None, win_length=None, personality=AIPersonality.BALANCED):
+        """A new game against the AI, with GameCore's random powerups"""
+        self.rules = board_rules(size, win_length)
+        self.flags = personality.value << PERSONALITY_SHIFT
+        self.history = bytearray()  # (cell, action) pairs, as in the game record
+        self.reset_game()
+
+    def reset_game(self):
+        """Start over on an empty board with new powerups"""
+        self.save_record()
+        self.player = self.ai = self.blocked = 0
+        self.flags &= ~((1 << PERSONALITY_SHIFT) - 1)
+        self.history.clear()
+        # Same draws as GameCore.add_powerups, so seeded games match
+        size = self.rules.size
+        powerups = 0
+        available_positions = [(x, y) for x in range(size) for y in range(size)]
+        for _ in range(min(2, len(available_positions))):
+            pos_idx = random.randint(0, len(available_positions) - 1)
+            x, y = available_positions.pop(pos_idx)
+            kind = random.choice(POWERUP_KINDS)
+            powerups |= 1 << ((kind - 1) * self.rules.cells + x * size + y)
+        self.powerups = powerups
+        self.started = int(time.time())
+
+    @property
+    def game_state(self):
+        return GameState(self.flags & STATE_MASK)
+
+    @property
+    def player_turn(self):
+        return not self.flags & AI_TURN
+
+    @property
+    def personality(self):
+        return AIPersonality(self.flags >> PERSONALITY_SHIFT)
+
+    @property
+    def swap_cell(self):
+        """Cell of the SWAP waiting for its target, or None"""
+        cell = (self.flags & SWAP_MASK) >> SWAP_SHIFT
+        return cell - 1 if cell else None
+
+    def ai_to_move(self):
+        """True when the game waits for the AI"""
+        return bool(self.flags & AI_TURN) and not self.flags & STATE_MASK
+
+    def set_ai_personality(self, personality):
+        """Choose the AI personality for the following moves"""
+        self.flags = (self.flags & ((1 << PERSONALITY_SHIFT) - 1)) | personality.value << PERSONALITY_SHIFT
+
+    def cell_value(self, cell):
+        """Board value of a cell: 0 empty, 1 player, -1 AI, 2 blocked"""
+        bit = 1 << cell
+        if self.player & bit:
+            return 1
+        if self.ai & bit:
+            return -1
+        if self.blocked & bit:
+            return 2
+        return 0
+
+    def powerup_at(self, cell):
+        """PowerUpType value of the unused powerup on a cell (0 for none)"""
+        cells = self.rules.cells
+        for kind in POWERUP_KINDS:
+            if self.powerups >> ((kind - 1) * cells + cell) & 1:
+                return kind
+        return 0
+
+    def board(self):
+        """The board as GameCore lays it out (rows of cell values)"""
+        size = self.rules.size
+        return [[self.cell_value(row * size + col) for col in range(size)] for row in range(size)]
+
+    def powerup_grid(self):
+        """The unused powerups as GameCore lays them out"""
+        size = self.rules.size
+        return [[self.powerup_at(row * size + col) for col in range(size)] for row in range(size)]
+
+    def position(self):
+        """(player, ai, blocked, powerup) bitmasks, as AIEngine.get_best_move takes them"""
+        return self.player, self.ai, self.blocked, self.powerups
+
+    def snapshot(self):
+        """The game's state, for restore"""
+        return self.player, self.ai, self.blocked, self.powerups, self.flags, len(self.history)
+
+    def restore(self, state):
+        """Go back to a snapshot taken earlier in the same game"""
+        self.player, self.ai, self.blocked, self.powerups, self.flags, length = state
+        del self.history[length:]
+
+    def handle_board_click(self, row, col):
+        """GameCore.handle_board_click: the player's click on a cell, ignored unless the player is to move"""
+        if self.flags & (AI_TURN | STATE_MASK):
+            return
+        cell = row * self.rules.size + col
+        bit = 1 << cell
+        occupied = self.player | self.ai | self.blocked
+        swap_cell = self.swap_cell
+        if swap_cell is not None:
+            if occupied & bit:
+                # The target's piece moves onto the (empty) SWAP cell
+                value = self.cell_value(cell)
+                self.set_cell(cell, 0)
+                self.set_cell(swap_cell, value)
+                self.history += bytes((cell, SWAP_TARGET))
+                self.flags = (self.flags & ~SWAP_MASK) | AI_TURN
+                self.update_game_state(swap_cell, value)
+            return
+        if occupied & bit:
+            return
+
+        self.rules.engine.observe_player_move(row, col, self.position())
+        kind = self.powerup_at(cell)
+        if kind:
+            self.powerups &= ~(1 << ((kind - 1) * self.rules.cells + cell))
+        if kind == PowerUpType.BLOCK.value:
+            self.history += bytes((cell, BLOCK))
+            self.blocked |= bit
+            self.flags |= AI_TURN
+            self.update_game_state(cell, 2)
+        elif kind == PowerUpType.SWAP.value:
+            self.history += bytes((cell, SWAP))
+            if not occupied:
+                self.flags |= AI_TURN  # Nothing to swap with: the turn passes
+            else:
+                self.flags |= (cell + 1) << SWAP_SHIFT
+        elif kind == PowerUpType.WILDCARD.value:
+            self.history += bytes((cell, WILD))
+            self.player |= bit
+            self.update_game_state(cell, 1)  # The player moves again
+        else:
+            self.history += bytes((cell, PLAYER))
+            self.player |= bit
+            if not self.update_game_state(cell, 1):
+                self.flags |= AI_TURN
+
+    def ai_move(self):
+        """Search the AI's move with the shared engine and play it"""
+        engine = self.rules.engine
+        self.apply_ai_move(engine.get_best_move(self.personality, position=self.position()))
+
+    def apply_ai_move(self, best_move):
+        """Play a move chosen by the AI engine"""
+        if best_move:
+            cell = best_move[0] * self.rules.size + best_move[1]
+            self.history += bytes((cell, AI))
+            self.ai |= 1 << cell
+            self.update_game_state(cell, -1)
+        else:
+            self.flags |= GameState.DRAW.value  # No valid moves left
+        self.flags &= ~AI_TURN
+
+    def set_cell(self, cell, value):
+        """Put a board value on a cell"""
+        bit = 1 << cell
+        self.player &= ~bit
+        self.ai &= ~bit
+        self.blocked &= ~bit
+        if value == 1:
+            self.player |= bit
+        elif value == -1:
+            self.ai |= bit
+        elif value == 2:
+            self.blocked |= bit
+
+    def update_game_state(self, cell, value):
+        """Check for win or draw after value landed on cell; returns the new GameState value
+
+        The game was still on before, so only lines through cell can have
+        been completed.
+        """
+        rules = self.rules
+        state = 0
+        if value == 1 and rules.completes_line(self.player, cell):
+            state = GameState.PLAYER_WIN.value
+        elif value == -1 and rules.completes_line(self.ai, cell):
+            state = GameState.AI_WIN.value
+        elif self.player | self.ai | self.blocked == rules.full:
+            state = GameState.DRAW.value
+        self.flags |= state
+        return state
+
+    def start_powerups(self):
+        """(cell, kind) of the powerups placed at the start: the unused ones and those the history took"""
+        taken = {BLOCK: PowerUpType.BLOCK.value, SWAP: PowerUpType.SWAP.value, WILD: PowerUpType.WILDCARD.value}
+        cells = self.rules.cells
+        powerups = [(bit % cells, bit // cells + 1) for bit in iter_bits(self.powerups)]
+        history = self.history
+        powerups += [(history[i], taken[history[i + 1]]) for i in range(0, len(history), 2)
+                     if history[i + 1] in taken]
+        return tuple(sorted(powerups))
+
+    def record(self):
+        """The game as a GameRecord"""
+        history = self.history
+        actions = tuple(zip(history[0::2], history[1::2]))
+        return GameRecord(self.rules.size, self.rules.win_length, self.flags >> PERSONALITY_SHIFT,
+                          self.flags & STATE_MASK, self.started, self.start_powerups(), actions)
+
+    def save_record(self):
+        """Append the game to the game record, if it has begun, and let the engine's model close it"""
+        if not self.history:
+            return
+        writer = open_record_writer(config.GAME_RECORD_PATH)
+        if writer is not None:
+            writer.write(self.record())
+        self.rules.engine.end_game()
+
+
+def session_bytes(count, size=None, win_length=None, moves=0):
+    """Heap bytes per game for count CompactGames, each moves player/AI plies into a random game"""
+    rules = board_rules(size, win_length)
+    rng = random.Random(0)
+    tracemalloc.start()
+    games = [CompactGame(size, win_length) for _ in range(count)]
+    for game in games:
+        for _ in range(moves):
+            if game.flags & STATE_MASK:
+                break
+            occupied = game.player | game.ai | game.blocked
+            allowed = occupied if game.swap_cell is not None else rules.full & ~occupied
+            cell = rng.randrange(rules.cells)
+            while not allowed >> cell & 1:  # Cheaper than listing the cells while tracemalloc runs
+                cell = rng.randrange(rules.cells)
+            if game.player_turn:
+                game.handle_board_click(*divmod(cell, rules.size))
+            else:
+                game.apply_ai_move(divmod(cell, rules.size))
+    # Only what this module allocated: the games, not the engine's model of their moves
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(True, __file__)])
+    tracemalloc.stop()
+    used = sum(stat.size for stat in snapshot.statistics('filename'))
+    del games
+    return used / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the memory of many idle compact games")
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--size", type=int, default=config.DEFAULT_BOARD_SIZE)
+    parser.add_argument("--win", type=int, default=config.DEFAULT_WIN_LENGTH)
+    parser.add_argument("--moves", type=int, default=0, help="plies played into each game first")
+    args = parser.parse_args()
+    config.OPPONENT_MODEL_PATH = None
+    print(json.dumps({'games': args.games, 'size': args.size, 'win': args.win, 'moves': args.moves,
+                      'bytes_per_game': session_bytes(args.games, args.size, args.win, args.moves)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Offline retrograde solver for the 3x3 board.
+
+Every cell is empty, player (X), AI (O) or blocked, so the whole state space
+is 4^9 boards times the side to move. Solving all of them (rather than only
+those reachable by alternating play) covers every position BLOCK and SWAP can
+produce. The result is written as a compact binary table that AIEngine
+memory-maps at startup, turning get_best_move into a single indexed read.
+
+Usage: python solver.py [output_path]
+"""
+import mmap
+import os
+import struct
+import sys
+import warnings
+import zlib
+
+from bitboard import winner
+
+BOARD_SIZE = 3
+CELLS = BOARD_SIZE * BOARD_SIZE
+NUM_CODES = 4 ** CELLS  # Base-4 board codes: 0 empty, 1 player, 2 AI, 3 blocked
+
+MAGIC = b"TTTS"
+VERSION = 1
+HEADER = struct.Struct("<4sHBBII")  # magic, version, board size, entry size, entries, crc32
+ENTRY_SIZE = 2  # best move (NO_MOVE if terminal), signed score for the side to move
+NO_MOVE = 255
+
+WIN_SCORE = 10  # Same scale as minimax_alpha_beta: 10 - plies for a win
+
+# Base-4 weight of every cell mask, so board codes can be built from bitboards
+_CELL_WEIGHTS = [sum(4 ** cell for cell in range(CELLS) if mask >> cell & 1) for mask in range(1 << CELLS)]
+
+
+def position_code(player, ai, blocked):
+    """Base-4 code of a 3x3 position given as bitmasks"""
+    return _CELL_WEIGHTS[player] + 2 * _CELL_WEIGHTS[ai] + 3 * _CELL_WEIGHTS[blocked]
+
+
+def entry_index(code, ai_to_move):
+    """Index of a position's entry in the table"""
+    return code * 2 + (1 if ai_to_move else 0)
+
+
+def _decode(code):
+    """Split a board code back into (player, ai, blocked) bitmasks"""
+    player = ai = blocked = 0
+    for cell in range(CELLS):
+        digit = code % 4
+        code //= 4
+        if digit == 1:
+            player |= 1 << cell
+        elif digit == 2:
+            ai |= 1 << cell
+        elif digit == 3:
+            blocked |= 1 << cell
+    return player, ai, blocked
+
+
+def _shrink(score):
+    """Move a score one step towards zero (a win one ply further away)"""
+    if score > 0:
+        return score - 1
+    if score < 0:
+        return score + 1
+    return 0
+
+
+def solve():
+    """Solve every position and return the table payload"""
+    payload = bytearray(NUM_CODES * 2 * ENTRY_SIZE)
+    terminal = bytearray(NUM_CODES)
+
+    # Placing a mark always removes an empty cell, so solving positions in
+    # order of increasing empty-cell count sees every child before its parent
+    by_empty = [[] for _ in range(CELLS + 1)]
+    for code in range(NUM_CODES):
+        player, ai, blocked = _decode(code)
+        empty_count = CELLS - (player | ai | blocked).bit_count()
+        by_empty[empty_count].append(code)
+
+    for empty_count in range(CELLS + 1):
+        for code in by_empty[empty_count]:
+            player, ai, blocked = _decode(code)
+            result = winner(player, ai, blocked, BOARD_SIZE)
+
+            for ai_to_move in (False, True):
+                offset = entry_index(code, ai_to_move) * ENTRY_SIZE
+
+                if result != 0:
+                    # Terminal: score it from the side to move's point of view
+                    terminal[code] = 1
+                    if result == 2:
+                        score = 0
+                    elif (result == -1) == ai_to_move:
+                        score = WIN_SCORE
+                    else:
+                        score = -WIN_SCORE
+                    payload[offset] = NO_MOVE
+                    payload[offset + 1] = score & 0xFF
+                    continue
+
+                mark_digit = 2 if ai_to_move else 1
+                best_score = None
+                best_move = NO_MOVE
+                occupied = player | ai | blocked
+                for cell in range(CELLS):
+                    if occupied >> cell & 1:
+                        continue
+                    child = code + mark_digit * 4 ** cell
+                    child_offset = entry_index(child, not ai_to_move) * ENTRY_SIZE
+                    child_score = struct.unpack_from("b", payload, child_offset + 1)[0]
+                    if not terminal[child]:
+                        child_score = _shrink(child_score)
+                    score = -child_score
+                    if best_score is None or score > best_score:
+                        best_score = score
+                        best_move = cell
+
+                payload[offset] = best_move
+                payload[offset + 1] = best_score & 0xFF
+
+    return bytes(payload)
+
+
+def write_table(path):
+    """Solve the game and write the versioned, checksummed table to path"""
+    payload = solve()
+    header = HEADER.pack(MAGIC, VERSION, BOARD_SIZE, ENTRY_SIZE, NUM_CODES * 2, zlib.crc32(payload))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+class SolutionTable:
+    def __init__(self, path):
+        """Memory-map a solution table, raising ValueError if it is stale or corrupt"""
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self.data) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path}: truncated solution table")
+
+        magic, version, size, entry_size, entries, crc = HEADER.unpack_from(self.data)
+        if (magic != MAGIC or version != VERSION or size != BOARD_SIZE or entry_size != ENTRY_SIZE
+                or entries != NUM_CODES * 2 or len(self.data) != HEADER.size + entries * entry_size):
+            self.close()
+            raise ValueError(f"{path}: solution table has an unexpected format or version")
+
+        if zlib.crc32(memoryview(self.data)[HEADER.size:]) != crc:
+            self.close()
+            raise ValueError(f"{path}: solution table checksum mismatch")
+
+    def close(self):
+        """Release the memory map"""
+        self.data.close()
+
+    def lookup(self, player, ai, blocked, ai_to_move=True):
+        """Return (best cell or None, score for the side to move)"""
+        offset = HEADER.size + entry_index(position_code(player, ai, blocked), ai_to_move) * ENTRY_SIZE
+        move = self.data[offset]
+        score = self.data[offset + 1]
+        if score > 127:
+            score -= 256
+        return (None if move == NO_MOVE else move), score
+
+
+_loaded_tables = {}
+
+
+def load_solution_table(path):
+    """Load the table at path once per process; None if missing or rejected"""
+    if path not in _loaded_tables:
+        table = None
+        if path and os.path.exists(path):
+            try:
+                table = SolutionTable(path)
+            except (OSError, ValueError) as e:
+                warnings.warn(f"Ignoring solution table: {e}")
+        _loaded_tables[path] = table
+    return _loaded_tables[path]
+
+
+if __name__ == "__main__":
+    import config
+
+    output_path = sys.argv[1] if len(sys.argv) > 1 else config.SOLUTION_TABLE_PATH
+    write_table(output_path)
+    print(f"Wrote {output_path}")
@@ -0,0 +1,27 @@
+"""Where the launcher's time to first frame goes (main.py --profile-startup).
+
+Only the standard library is imported here, so the clock starts before
+pygame and the game modules load.
+"""
+import time
+
+
+class StartupProfile:
+    def __init__(self):
+        """Start the clock; each mark closes the phase since the previous one"""
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.phases = []  # (name, seconds) in order
+
+    def mark(self, name):
+        """End the phase called name"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self):
+        """Per-phase and total milliseconds up to the last mark"""
+        return {
+            'phases_ms': {name: seconds * 1000 for name, seconds in self.phases},
+            'total_ms': (self.last - self.started) * 1000,
+        }
@@ -0,0 +1,61 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# The game's modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from ai import AIEngine  # noqa: E402
+from enums import AIPersonality  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_config(monkeypatch):
+    """Keep engines off the files in the repository and searches serial and deterministic"""
+    monkeypatch.setattr(config, "OPPONENT_MODEL_PATH", None)
+    monkeypatch.setattr(config, "GAME_RECORD_PATH", None)
+    monkeypatch.setattr(config, "SOLUTION_TABLE_PATH", None)
+    monkeypatch.setattr(config, "AI_SEARCH_WORKERS", 1)
+    monkeypatch.setattr(config, "AI_MOVE_BUDGET", 1e9)  # No deadline: every search completes
+
+
+def make_engine(size=3, win_length=None, personality=AIPersonality.BALANCED):
+    """A headless engine reading its position from a bare board array"""
+    game = SimpleNamespace(BOARD_SIZE=size, WIN_LENGTH=win_length or size, board=np.zeros((size, size), dtype=int),
+                           powerups=[[0] * size for _ in range(size)], ai_personality=personality)
+    return AIEngine(game)
+
+
+def set_board(engine, player, ai, blocked=0):
+    """Write (player, ai, blocked) bitmasks into the engine's board, without powerups, and load them"""
+    size = engine.size
+    board = engine.game.board
+    board[:] = 0
+    engine.game.powerups = [[0] * size for _ in range(size)]
+    for cell in range(size * size):
+        for bits, value in ((player, 1), (ai, -1), (blocked, 2)):
+            if bits >> cell & 1:
+                board[cell // size][cell % size] = value
+    engine.load_position()
+
+
+def random_position(rng, size, win_length, pieces, blocked=0):
+    """(player, ai, blocked) bitmasks of a game still on, with the AI to move after pieces marks"""
+    from bitboard import winner
+    cells = list(range(size * size))
+    while True:
+        rng.shuffle(cells)
+        player = ai = blocked_bits = 0
+        for cell in cells[:blocked]:
+            blocked_bits |= 1 << cell
+        for i, cell in enumerate(cells[blocked:blocked + pieces]):
+            if i % 2 == 0:
+                player |= 1 << cell
+            else:
+                ai |= 1 << cell
+        if winner(player, ai, blocked_bits, size, win_length) == 0:
+            return player, ai, blocked_bits
@@ -0,0 +1,36 @@
+"""Batched evaluation gives evaluate_board's scores and check_winner's results"""
+import random
+
+import numpy as np
+import pytest
+
+import batcheval
+from bitboard import board_to_masks
+from conftest import make_engine
+
+
+def random_boards(rng, size, count):
+    """Boards of every fill level, including ones where both sides have a line"""
+    boards = []
+    for _ in range(count):
+        fill = rng.random()
+        boards.append([[rng.choice((1, -1, 2)) if rng.random() < fill else 0 for _ in range(size)]
+                       for _ in range(size)])
+    return boards
+
+
+@pytest.mark.parametrize("size, win_length", [(3, 3), (4, 3), (5, 4), (7, 5), (15, 5)])
+def test_batch_matches_single_evaluation(monkeypatch, size, win_length):
+    monkeypatch.setattr(batcheval, "CHUNK", 37)  # Several chunks, the last one partial
+    rng = random.Random(size)
+    engine = make_engine(size, win_length)
+    boards = random_boards(rng, size, 200)
+
+    scores, results = engine.evaluate_batch(np.array(boards, dtype=np.int8))
+    flat_scores, flat_results = engine.evaluate_batch(np.array(boards, dtype=np.int8).reshape(len(boards), -1))
+    assert scores.tolist() == flat_scores.tolist()
+    assert results.tolist() == flat_results.tolist()
+
+    for board, score, result in zip(boards, scores, results):
+        engine.set_position(*board_to_masks(board, size))
+        assert (score, result) == (engine.evaluate_board(), engine.check_winner())
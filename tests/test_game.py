@@ -0,0 +1,55 @@
+"""The window's AI turn survives searches that fail or are abandoned"""
+import threading
+from concurrent.futures import wait
+
+import pygame
+import pytest
+
+import config
+
+
+@pytest.fixture
+def game(monkeypatch, tmp_path):
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    monkeypatch.setattr(config, "FONT_CACHE_PATH", str(tmp_path / "font_cache.json"))
+    monkeypatch.setattr(config, "AI_MIN_THINK_TIME", 0)
+    from game import EnhancedTicTacToe
+    game = EnhancedTicTacToe(3, 3)
+    yield game
+    game.cancel_ai_search()
+    game.ai_executor.shutdown()
+    pygame.quit()  # Leave no SDL threads behind for the forking tests
+
+
+def test_failed_search_plays_a_legal_move(game, monkeypatch):
+    game.board[0][0] = 1
+    game.player_turn = False
+
+    def fail(*args):
+        raise RuntimeError("search failed")
+    monkeypatch.setattr(game.ai_engine, "get_best_move", fail)
+    game.start_ai_search()
+    wait([game.ai_future])
+    with pytest.warns(UserWarning, match="search failed"):
+        game.poll_ai_search()
+    assert game.board[0][1] == -1
+    assert game.player_turn and not game.ai_thinking and game.ai_future is None
+
+
+def test_hiding_the_panel_abandons_the_search(game, monkeypatch):
+    game.player_turn = False
+    started, traces = threading.Event(), []
+
+    def search(personality, mark, cancel):
+        traces.append(game.ai_engine.trace)
+        started.set()
+        cancel.wait(10)
+        traces.append(game.ai_engine.trace)
+        return (0, 0)
+    monkeypatch.setattr(game.ai_engine, "get_best_move", search)
+    game.start_ai_search()
+    started.wait(10)
+    game.set_show_algorithm(False)
+    # The search ended before the swap, still recording into its own trace
+    assert game.ai_future is None
+    assert traces[0] is traces[1] is not game.ai_engine.trace
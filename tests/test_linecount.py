@@ -0,0 +1,50 @@
+"""Incremental line counts agree with a full rescan of the board"""
+import random
+
+import pytest
+
+from bitboard import win_lines, winner
+from linecount import LineCounts, line_score
+
+MARKS = (1, -1, 2)
+
+
+def rescan(size, win_length, board):
+    """(score, winner) recomputed from every line of a {cell: mark} board"""
+    score = 0
+    for _, cells in win_lines(size, win_length):
+        marks = [board.get(row * size + col, 0) for row, col in cells]
+        score += line_score(marks.count(1), marks.count(-1), marks.count(2))
+    masks = [sum(1 << cell for cell, value in board.items() if value == mark) for mark in MARKS]
+    return score, winner(*masks, size, win_length)
+
+
+@pytest.mark.parametrize("size, win_length", [(3, 3), (4, 3), (5, 4), (7, 5), (15, 5)])
+def test_place_and_remove_match_rescan(size, win_length):
+    rng = random.Random(size)
+    counts = LineCounts(size, win_length)
+    board = {}
+    for _ in range(2000):
+        if board and (len(board) == size * size or rng.random() < 0.4):
+            cell = rng.choice(list(board))
+            counts.remove(cell, board.pop(cell))
+        else:
+            cell = rng.choice([cell for cell in range(size * size) if cell not in board])
+            board[cell] = rng.choice(MARKS)
+            counts.place(cell, board[cell])
+        assert (counts.score, counts.winner()) == rescan(size, win_length, board)
+        assert counts.empty == size * size - len(board)
+
+
+def test_load_matches_placing():
+    rng = random.Random(1)
+    board = [[rng.choice((0, 0, 1, -1, 2)) for _ in range(5)] for _ in range(5)]
+    loaded = LineCounts(5, 4)
+    loaded.load(board)
+    placed = LineCounts(5, 4)
+    for row in range(5):
+        for col in range(5):
+            if board[row][col]:
+                placed.place(row * 5 + col, board[row][col])
+    assert (loaded.codes, loaded.score, loaded.empty, loaded.complete) == \
+        (placed.codes, placed.score, placed.empty, placed.complete)
@@ -0,0 +1,68 @@
+"""The opponent model keeps the most played replies of the most played positions"""
+import pytest
+
+from opponent import NO_CELL, OpponentModel, position_key
+
+
+def test_replies_are_most_played_first():
+    model = OpponentModel(max_replies=4)
+    for cell in (4, 0, 4, 8, 4, 0):
+        model.observe(1, cell)
+    assert model.replies(1) == (4, 3, 0, 2, 8, 1, NO_CELL, 0)
+    assert model.replies(2) == ()
+
+
+def test_new_reply_takes_over_the_rarest_slot():
+    model = OpponentModel(max_replies=2)
+    for cell in (1, 1, 1, 2, 2, 3):
+        model.observe(7, cell)
+    # 3 inherits the count of 2, which it pushed out
+    assert model.replies(7) == (1, 3, 3, 3)
+
+
+def test_save_keeps_the_most_played_positions(tmp_path):
+    path = str(tmp_path / "model.bin")
+    model = OpponentModel(path, max_positions=4, max_replies=2)
+    for key, plays in ((10, 5), (11, 1), (12, 3), (13, 1), (14, 2)):
+        for _ in range(plays):
+            model.observe(key, key % 9)
+    model.save()
+    # 11 and 13 tie on one play; the one played longest ago goes
+    assert set(model.positions) == {10, 12, 13, 14}
+
+    reloaded = OpponentModel(path, max_positions=4, max_replies=2)
+    assert reloaded.has_data()
+    assert reloaded.positions == model.positions
+
+
+def test_store_for_another_board_is_ignored(tmp_path):
+    path = str(tmp_path / "model.bin")
+    model = OpponentModel(path, size=3, win_length=3)
+    model.observe(1, 4)
+    model.save()
+
+    other = OpponentModel(path, size=4, win_length=3)
+    with pytest.warns(UserWarning, match="unexpected format"):
+        assert not other.has_data()
+
+
+def test_keys_are_fixed_digests_of_the_masks():
+    # Pinned, so a store written on one platform or Python build reads back on another
+    assert position_key(0b000000011, 0b000011000, 0) == 0x628b84abdb658a8a
+    assert position_key(0b000000011, 0b000011000, 0, 1 << 8) == 0xa1118c6c4629570f
+    keys = {position_key(0b1, 0b10, 0), position_key(0b10, 0b1, 0), position_key(0b1, 0, 0b10),
+            position_key(0b1, 0b10, 0, 1 << 9)}
+    assert len(keys) == 4
+
+
+def test_store_from_another_version_is_ignored(tmp_path):
+    path = str(tmp_path / "model.bin")
+    model = OpponentModel(path)
+    model.observe(1, 4)
+    model.save()
+    with open(path, "r+b") as f:
+        f.seek(4)
+        f.write((1).to_bytes(2, "little"))
+
+    with pytest.warns(UserWarning, match="another version"):
+        assert not OpponentModel(path).has_data()
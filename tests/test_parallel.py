@@ -0,0 +1,71 @@
+"""The root search pool finds the serial search's move and score"""
+import random
+
+import pytest
+
+import config
+import parallel
+from conftest import make_engine, random_position, set_board
+from enums import AIPersonality
+from opponent import OpponentModel, position_key
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(config, "AI_SEARCH_WORKERS", 2)
+    monkeypatch.setattr(config, "AI_PARALLEL_MIN_SIZE", 4)
+    yield
+    if parallel._pool is not None:
+        parallel._pool.close()
+        parallel._pool = None
+
+
+def teach(rng, engine, position, replies):
+    """Observe replies random human replies after every AI move from position"""
+    player, ai, blocked = position
+    occupied = player | ai | blocked
+    empty = [cell for cell in range(engine.cells) if not occupied >> cell & 1]
+    for cell in empty:
+        for _ in range(replies):
+            reply = rng.choice([other for other in empty if other != cell])
+            engine.opponent_model.observe(position_key(player, ai | 1 << cell, blocked), reply)
+
+
+@pytest.mark.parametrize("personality", [AIPersonality.BALANCED, AIPersonality.LEARNING])
+def test_pool_matches_serial_search(pool, monkeypatch, personality):
+    rng = random.Random(11)
+    searched = 0
+    for _ in range(3):
+        position = random_position(rng, 5, 4, 4)
+        engines = []
+        for workers in (1, 2):
+            monkeypatch.setattr(config, "AI_SEARCH_WORKERS", workers)
+            engine = make_engine(5, 4)
+            teach(random.Random(searched), engine, position, 6)
+            set_board(engine, *position)
+            engines.append((engine.get_best_move(personality), engine.current_eval, engine.node_count))
+        (serial_move, serial_eval, nodes), (pool_move, pool_eval, _) = engines
+        assert (pool_move, pool_eval) == (serial_move, serial_eval)
+        searched += nodes > 0
+    assert searched
+    assert parallel._pool.searches
+
+
+def test_model_goes_to_the_workers_once_per_revision(pool, monkeypatch):
+    encoded = []
+    encode = OpponentModel.encode
+    monkeypatch.setattr(OpponentModel, "encode", lambda model: encoded.append(model.revision) or encode(model))
+    rng = random.Random(11)
+    engine = make_engine(5, 4)
+    positions = [random_position(rng, 5, 4, 4) for _ in range(3)]
+    revisions = []
+    for _ in range(2):
+        for position in positions:
+            teach(rng, engine, position, 6)  # New counts, a new revision
+        revisions.append(engine.opponent_model.revision)
+        for position in positions:
+            set_board(engine, *position)
+            engine.get_best_move(AIPersonality.LEARNING)
+    # Several searches in the pool per revision, but each revision of the model went out once
+    assert parallel._pool.searches > len(revisions)
+    assert encoded == revisions
@@ -0,0 +1,94 @@
+"""Powerup moves in the search: make/unmake restores the position exactly"""
+import random
+
+import pytest
+
+from ai import CELL_MASK
+from conftest import make_engine, random_position
+from linecount import LineCounts
+
+
+def add_powerups(rng, engine, count):
+    """Put count random powerups on empty cells, as packed powerup bits"""
+    occupied = engine.player_bits | engine.ai_bits | engine.blocked_bits
+    empty = [cell for cell in range(engine.cells) if not occupied >> cell & 1]
+    bits = 0
+    for cell in rng.sample(empty, min(count, len(empty))):
+        bits |= 1 << ((rng.randint(1, 3) - 1) * engine.cells + cell)
+    return bits
+
+
+def state(engine):
+    """Everything a move changes"""
+    counts = engine.counts
+    return (engine.player_bits, engine.ai_bits, engine.blocked_bits, engine.powerup_bits,
+            list(counts.codes), counts.score, counts.empty, dict(counts.complete))
+
+
+def rebuilt_counts(engine):
+    """Line counts built from scratch for the engine's bitboards"""
+    counts = LineCounts(engine.size, engine.win_length)
+    for bits, value in ((engine.player_bits, 1), (engine.ai_bits, -1), (engine.blocked_bits, 2)):
+        for cell in range(engine.cells):
+            if bits >> cell & 1:
+                counts.place(cell, value)
+    return list(counts.codes), counts.score, counts.empty, counts.complete
+
+
+@pytest.mark.parametrize("size, win_length", [(3, 3), (5, 4), (7, 5)])
+@pytest.mark.parametrize("powerup_mark", [1, -1])
+def test_make_unmake_restores_position(size, win_length, powerup_mark):
+    rng = random.Random(size)
+    engine = make_engine(size, win_length)
+    powerup_moves = 0
+    for _ in range(30):
+        player, ai, blocked = random_position(rng, size, win_length, rng.randint(1, size * size // 2),
+                                              rng.randint(0, 1))
+        engine.set_position(player, ai, blocked)
+        engine.set_position(player, ai, blocked, add_powerups(rng, engine, 3), powerup_mark)
+        before = state(engine)
+        for move in engine.generate_moves(powerup_mark == -1):
+            if move <= CELL_MASK:
+                continue
+            powerup_moves += 1
+            value = engine.make_powerup_move(move)
+            assert rebuilt_counts(engine) == tuple(state(engine)[4:])
+            engine.unmake_powerup_move(move, value)
+            assert state(engine) == before, hex(move)
+    assert powerup_moves
+
+
+@pytest.mark.parametrize("size, win_length", [(3, 3), (5, 4)])
+def test_search_leaves_position_unchanged(size, win_length):
+    rng = random.Random(size + 1)
+    engine = make_engine(size, win_length)
+    for _ in range(5):
+        player, ai, blocked = random_position(rng, size, win_length, 3)
+        engine.set_position(player, ai, blocked)
+        position = (player, ai, blocked, add_powerups(rng, engine, 3))
+        engine.reset()
+        engine.set_position(*position)
+        before = state(engine)
+        for move in engine.generate_moves(True):
+            engine.search_root_move(move, 3, float('-inf'))
+            assert state(engine) == before
+
+
+def root_values(engine, position):
+    """Every root move's value, searched to the end of the game"""
+    engine.reset()
+    engine.set_position(*position)
+    return {move: engine.search_root_move(move, engine.cells, float('-inf')) for move in engine.generate_moves(True)}
+
+
+def test_table_keeps_the_powerup_sides_apart():
+    rng = random.Random(4)
+    engine = make_engine(3, 3)
+    for _ in range(10):
+        player, ai, blocked = random_position(rng, 3, 3, 4)
+        engine.set_position(player, ai, blocked)
+        powerups = add_powerups(rng, engine, 3)
+        # The same masks with the powerups on either side, one table
+        for powerup_mark in (1, -1):
+            position = (player, ai, blocked, powerups, powerup_mark)
+            assert root_values(engine, position) == root_values(make_engine(3, 3), position)
@@ -0,0 +1,116 @@
+"""Game records read back exactly as they were written"""
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+import config
+from core import GameCore
+from records import GameRecord, GameRecordWriter, read_games, AI, PLAYER, SWAP, SWAP_TARGET
+
+
+def fields(record):
+    return tuple(getattr(record, name) for name in GameRecord.__slots__)
+
+
+def random_records(rng, count):
+    records = []
+    for _ in range(count):
+        size = rng.randint(3, 15)
+        cells = size * size
+        powerups = tuple((rng.randrange(cells), rng.randint(1, 3)) for _ in range(rng.randint(0, 2)))
+        actions = tuple((rng.randrange(cells), rng.choice((PLAYER, AI, SWAP, SWAP_TARGET)))
+                        for _ in range(rng.randint(0, cells)))
+        records.append(GameRecord(size, rng.randint(3, size), rng.randint(1, 6), rng.randint(0, 3),
+                                  rng.randrange(1 << 32), powerups, actions))
+    return records
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1 << 20])
+def test_write_read_round_trip(tmp_path, chunk_size):
+    path = str(tmp_path / "games.bin")
+    records = random_records(random.Random(chunk_size), 50)
+    writer = GameRecordWriter(path, flush_games=8)
+    for record in records[:30]:
+        writer.write(record)
+    writer.close()
+    writer = GameRecordWriter(path, flush_games=8)  # Appending keeps the one header
+    for record in records[30:]:
+        writer.write(record)
+    writer.close()
+
+    assert [fields(record) for record in read_games(path, chunk_size)] == [fields(record) for record in records]
+
+
+def test_truncated_last_game_is_skipped(tmp_path):
+    path = str(tmp_path / "games.bin")
+    records = random_records(random.Random(1), 3)
+    writer = GameRecordWriter(path)
+    for record in records:
+        writer.write(record)
+    writer.close()
+    with open(path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 3)
+
+    with pytest.warns(UserWarning, match="truncated"):
+        read = [fields(record) for record in read_games(path)]
+    assert read == [fields(record) for record in records[:2]]
+
+
+def test_corrupt_game_is_rejected(tmp_path):
+    path = str(tmp_path / "games.bin")
+    writer = GameRecordWriter(path)
+    writer.write(random_records(random.Random(2), 1)[0])
+    writer.close()
+    with open(path, "r+b") as f:
+        f.seek(10)
+        byte = f.read(1)
+        f.seek(10)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+    with pytest.raises(ValueError, match="checksum"):
+        list(read_games(path))
+
+
+GAME_SCRIPT = """
+import sys
+sys.path.insert(0, {root!r})
+import config
+config.OPPONENT_MODEL_PATH = None
+config.AI_SEARCH_WORKERS = 1
+from core import GameCore
+from enums import GameState
+
+game = GameCore(3, 3, {record_path!r})
+game.powerups = [[0] * 3 for _ in range(3)]
+game.start_powerups = ()
+while game.game_state == GameState.ONGOING:
+    if game.player_turn:
+        game.handle_board_click(*game.get_valid_moves()[0])
+    else:
+        game.ai_move()
+print(game.game_state.value)
+game.reset_game()  # The finished game goes to the writer's queue; nothing closes the writer
+"""
+
+
+def test_unclosed_game_core_keeps_its_finished_game(tmp_path):
+    path = str(tmp_path / "games.bin")
+    script = GAME_SCRIPT.format(root=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), record_path=path)
+    result = int(subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout)
+
+    records = list(read_games(path))
+    assert [record.result for record in records] == [result]
+    assert records[0].actions and records[0].actions[0][1] == PLAYER
+
+
+def test_headless_game_core_keeps_no_record(tmp_path, monkeypatch):
+    path = tmp_path / "games.bin"
+    monkeypatch.setattr(config, "GAME_RECORD_PATH", str(path))
+    game = GameCore(3, 3)
+    game.handle_board_click(0, 0)
+    game.reset_game()
+    assert game.record_writer is None
+    assert not path.exists()
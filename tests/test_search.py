@@ -0,0 +1,210 @@
+"""The bitboard engine sees the board the way the board array does, and searches it exactly"""
+import random
+
+import pytest
+
+import config
+from ai import WIN_SCORE
+from bitboard import full_mask, iter_bits, winner
+from conftest import make_engine, random_position, set_board
+from enums import AIPersonality
+
+
+def board_lines(board, size, win_length):
+    """Every run of win_length cells in a row, column or diagonal of a board array, as its values"""
+    lines = []
+    for row in range(size):
+        for col in range(size):
+            for step_row, step_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_row, end_col = row + step_row * (win_length - 1), col + step_col * (win_length - 1)
+                if 0 <= end_row < size and 0 <= end_col < size:
+                    lines.append([board[row + step_row * i][col + step_col * i] for i in range(win_length)])
+    return lines
+
+
+def scan_winners(board, size, win_length):
+    """The sides with a complete line; 2 alone for a full board without one"""
+    winners = {line[0] for line in board_lines(board, size, win_length)
+               if line[0] in (1, -1) and line.count(line[0]) == win_length}
+    if not winners and all(value != 0 for row in board for value in row):
+        return {2}
+    return winners or {0}
+
+
+def scan_evaluation(board, size, win_length):
+    score = 0
+    for line in board_lines(board, size, win_length):
+        if 2 not in line:
+            if line.count(1) == 0:
+                score += line.count(-1) ** 2
+            elif line.count(-1) == 0:
+                score -= line.count(1) ** 2
+    center = board[size // 2][size // 2]
+    return score + (2 if center == -1 else -2 if center == 1 else 0)
+
+
+@pytest.mark.parametrize("size, win_length", [(3, 3), (4, 4), (4, 3), (5, 4)])
+def test_winner_and_evaluation_match_board_scan(size, win_length):
+    rng = random.Random(size * 10 + win_length)
+    engine = make_engine(size, win_length)
+    for _ in range(500):
+        fill = rng.random()
+        board = [[rng.choice((1, -1, 2)) if rng.random() < fill else 0 for _ in range(size)] for _ in range(size)]
+        engine.game.board[:] = board
+        engine.load_position()
+        assert engine.check_winner() in scan_winners(board, size, win_length)
+        assert engine.evaluate_board() == scan_evaluation(board, size, win_length)
+
+
+@pytest.mark.parametrize("personality", [AIPersonality.BALANCED, AIPersonality.DEFENSIVE, AIPersonality.LEARNING])
+def test_best_move_wins_before_blocking(personality):
+    engine = make_engine(3, personality=personality)
+    # AI can complete the middle row; the player threatens the top row
+    set_board(engine, 0b000000011, 0b000011000)
+    assert engine.get_best_move(personality) == (1, 2)
+    # Only the player threatens
+    set_board(engine, 0b000000011, 0b100010000)
+    assert engine.get_best_move(personality) == (0, 2)
+
+
+def plain_minimax(engine, player, ai, blocked, depth, max_depth, ai_to_move):
+    """Every move searched, without pruning, table or ordering, scored like minimax_alpha_beta"""
+    result = winner(player, ai, blocked, engine.size, engine.win_length)
+    if result == 1:
+        return -WIN_SCORE + depth
+    if result == -1:
+        return WIN_SCORE - depth
+    if result == 2:
+        return 0
+    if depth >= max_depth:
+        engine.set_position(player, ai, blocked)
+        return engine.evaluate_board()
+
+    empty = full_mask(engine.size) & ~(player | ai | blocked)
+    if ai_to_move:
+        return max(plain_minimax(engine, player, ai | 1 << cell, blocked, depth + 1, max_depth, False)
+                   for cell in iter_bits(empty))
+    return min(plain_minimax(engine, player | 1 << cell, ai, blocked, depth + 1, max_depth, True)
+               for cell in iter_bits(empty))
+
+
+def root_values(engine, position, max_depth):
+    """The search's value of every root move, each searched with a full window"""
+    engine.reset()
+    engine.set_position(*position)
+    return {move: engine.search_root_move(move, max_depth, float('-inf')) for move in engine.generate_moves(True)}
+
+
+@pytest.mark.parametrize("size, win_length, pieces, blocked, max_depth", [
+    (3, 3, 1, 0, 5),
+    (3, 3, 2, 1, 5),
+    (4, 3, 5, 0, 3),
+    (4, 4, 6, 1, 3),
+])
+def test_root_values_match_plain_minimax(size, win_length, pieces, blocked, max_depth):
+    rng = random.Random(size * 100 + pieces)
+    engine = make_engine(size, win_length)
+    reference = make_engine(size, win_length)
+    for _ in range(4):
+        player, ai, blocked_bits = random_position(rng, size, win_length, pieces, blocked)
+        values = root_values(engine, (player, ai, blocked_bits), max_depth)
+        for move, value in values.items():
+            assert value == plain_minimax(reference, player, ai | 1 << move, blocked_bits, 0, max_depth, False), move
+
+
+def test_kept_table_gives_fresh_engine_results():
+    rng = random.Random(3)
+    kept = make_engine(3)
+    reference = make_engine(3)
+    searched = 0
+    for _ in range(30):
+        # Seven empty cells or fewer, so LEARNING's depth-6 search reaches the end of every line
+        # and matches a minimax played out to the end
+        blocked = rng.randint(0, 1)
+        player, ai, blocked_bits = random_position(rng, 3, 3, 2 - blocked, blocked)
+        # Play the game out, so later searches meet the table entries of earlier ones
+        while winner(player, ai, blocked_bits, 3) == 0:
+            fresh = make_engine(3)
+            set_board(fresh, player, ai, blocked_bits)
+            set_board(kept, player, ai, blocked_bits)
+            move = fresh.get_best_move(AIPersonality.LEARNING)
+            kept_move = kept.get_best_move(AIPersonality.LEARNING)
+            if fresh.node_count:  # Searched, not taken by the immediate win or block check
+                searched += 1
+                values = {cell: plain_minimax(reference, player, ai | 1 << cell, blocked_bits, 0, 9, False)
+                          for cell in iter_bits(full_mask(3) & ~(player | ai | blocked_bits))}
+                best = max(values.values())
+                assert kept.current_eval == fresh.current_eval == best
+                # Deepening on a kept table may order the root differently and pick another of equal moves
+                assert values[move[0] * 3 + move[1]] == values[kept_move[0] * 3 + kept_move[1]] == best
+            else:
+                assert kept_move == move
+            ai |= 1 << (move[0] * 3 + move[1])
+            empty = list(iter_bits(full_mask(3) & ~(player | ai | blocked_bits)))
+            if empty and winner(player, ai, blocked_bits, 3) == 0:
+                player |= 1 << rng.choice(empty)
+    assert searched
+
+
+@pytest.mark.parametrize("size, win_length, pieces", [(3, 3, 2), (4, 4, 4), (5, 4, 4), (7, 5, 6)])
+def test_ordering_changes_nodes_not_results(size, win_length, pieces):
+    rng = random.Random(size)
+    ordered_nodes = unordered_nodes = 0
+    for _ in range(5):
+        position = random_position(rng, size, win_length, pieces)
+        ordered = make_engine(size, win_length)
+        unordered = make_engine(size, win_length)
+        unordered.order_moves = lambda moves, *args: moves
+        set_board(ordered, *position)
+        set_board(unordered, *position)
+        move = ordered.get_best_move(AIPersonality.BALANCED)
+        assert unordered.get_best_move(AIPersonality.BALANCED) == move
+        assert unordered.current_eval == ordered.current_eval
+        ordered_nodes += ordered.node_count
+        unordered_nodes += unordered.node_count
+    assert ordered_nodes < unordered_nodes
+
+
+@pytest.mark.parametrize("personality", [AIPersonality.BALANCED, AIPersonality.DEFENSIVE])
+def test_best_move_has_the_best_value(monkeypatch, personality):
+    monkeypatch.setattr(config, "AI_MAX_DEPTH", 3)
+    rng = random.Random(7)
+    engine = make_engine(4, 4)
+    reference = make_engine(4, 4)
+    searched = 0
+    for _ in range(6):
+        player, ai, _ = random_position(rng, 4, 4, 3)
+        move = engine.get_best_move(personality, position=(player, ai, 0, 0))
+        if not engine.node_count:
+            continue  # Taken by the immediate win or block check, not searched
+        searched += 1
+        values = {cell: plain_minimax(reference, player, ai | 1 << cell, 0, 0, 3, False)
+                  for cell in iter_bits(full_mask(4) & ~(player | ai))}
+        assert engine.current_eval == max(values.values())
+        assert values[move[0] * 4 + move[1]] == max(values.values())
+    assert searched
+
+
+@pytest.mark.parametrize("size, win_length, pieces", [(3, 3, 2), (5, 4, 4), (7, 5, 6)])
+def test_principal_variation_is_a_legal_line_from_the_best_move(monkeypatch, size, win_length, pieces):
+    monkeypatch.setattr(config, "AI_MAX_DEPTH", 4)
+    rng = random.Random(size + 2)
+    engine = make_engine(size, win_length)
+    longest = 0
+    for _ in range(6):
+        player, ai, blocked = random_position(rng, size, win_length, pieces)
+        move = engine.get_best_move(AIPersonality.BALANCED, position=(player, ai, blocked, 0))
+        if not engine.node_count:
+            continue  # Taken by the immediate win or block check, not searched
+        assert engine.pv[0] == move[0] * size + move[1]
+        assert len(engine.pv) <= engine.completed_depth + 1
+        longest = max(longest, len(engine.pv))
+        # Marks alternate from the AI's, each on an empty cell of a game still on
+        for i, cell in enumerate(engine.pv):
+            assert winner(player, ai, blocked, size, win_length) == 0
+            assert not (player | ai | blocked) >> cell & 1
+            if i % 2 == 0:
+                ai |= 1 << cell
+            else:
+                player |= 1 << cell
+    assert longest > 1
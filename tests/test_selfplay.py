@@ -0,0 +1,28 @@
+"""Self-play games replay exactly from their seeds"""
+import json
+
+import selfplay
+from enums import AIPersonality
+
+
+def played_games(path):
+    """The records in path by game index, without the per-move timings"""
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    for record in records:
+        record['m'] = [move[:-1] for move in record['m']]
+    return sorted(records, key=lambda record: record['g'])
+
+
+def test_same_seed_plays_the_same_games(tmp_path):
+    pairs = [(AIPersonality.BALANCED, AIPersonality.LEARNING), (AIPersonality.RANDOM, AIPersonality.MCTS),
+             (AIPersonality.LEARNING, AIPersonality.DEFENSIVE)]
+    runs = []
+    # The worker count changes which games share a worker process, and in what order they're played
+    for workers in (1, 2):
+        path = str(tmp_path / f"selfplay_{workers}.jsonl")
+        summary = selfplay.run_selfplay(9, path, pairs, workers=workers, seed=3, chunksize=1)
+        assert summary['games'] == 9
+        runs.append(played_games(path))
+    assert runs[0] == runs[1]
+    assert [record['g'] for record in runs[0]] == list(range(9))
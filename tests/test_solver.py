@@ -0,0 +1,72 @@
+"""The 3x3 solution table agrees with a full-depth minimax"""
+import random
+import shutil
+from functools import lru_cache
+
+import pytest
+
+import solver
+from bitboard import full_mask, iter_bits, winner
+from conftest import random_position
+
+
+@lru_cache(maxsize=None)
+def full_minimax(player, ai, blocked, depth, ai_to_move):
+    """Every line played out, scored like minimax_alpha_beta: 10 - depth for an AI win"""
+    result = winner(player, ai, blocked, 3)
+    if result == -1:
+        return solver.WIN_SCORE - depth
+    if result == 1:
+        return -solver.WIN_SCORE + depth
+    if result == 2:
+        return 0
+    empty = full_mask(3) & ~(player | ai | blocked)
+    if ai_to_move:
+        return max(full_minimax(player, ai | 1 << cell, blocked, depth + 1, False) for cell in iter_bits(empty))
+    return min(full_minimax(player | 1 << cell, ai, blocked, depth + 1, True) for cell in iter_bits(empty))
+
+
+@pytest.fixture(scope="module")
+def table_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("solver") / "solution_table.bin")
+    solver.write_table(path)
+    return path
+
+
+@pytest.fixture(scope="module")
+def table(table_path):
+    table = solver.SolutionTable(table_path)
+    yield table
+    table.close()
+
+
+@pytest.mark.parametrize("pieces, blocked", [(1, 0), (3, 0), (5, 0), (2, 1), (4, 1), (3, 2)])
+def test_table_matches_full_minimax(table, pieces, blocked):
+    rng = random.Random(pieces * 10 + blocked)
+    for _ in range(15):
+        # Blocked cells come with the player's BLOCK turn, so the counts may be even
+        player, ai, blocked_bits = random_position(rng, 3, 3, pieces, blocked)
+        empty = full_mask(3) & ~(player | ai | blocked_bits)
+        values = {cell: full_minimax(player, ai | 1 << cell, blocked_bits, 0, False) for cell in iter_bits(empty)}
+
+        cell, score = table.lookup(player, ai, blocked_bits)
+        assert score == max(values.values())
+        assert values[cell] == max(values.values())
+
+
+def test_finished_positions_have_no_move(table):
+    # Player's top row, AI to move
+    cell, score = table.lookup(0b000000111, 0b000011000, 0)
+    assert cell is None
+    assert score == -solver.WIN_SCORE
+
+
+def test_corrupt_table_is_ignored(table_path, tmp_path):
+    path = str(tmp_path / "solution_table.bin")
+    shutil.copyfile(table_path, path)
+    with open(path, "r+b") as f:
+        f.seek(solver.HEADER.size + 100)
+        f.write(b"\xff")
+
+    with pytest.warns(UserWarning, match="checksum"):
+        assert solver.load_solution_table(path) is None
@@ -0,0 +1,24 @@
+"""Win scores reach the eval panel as forced wins, not as gauge positions"""
+import pytest
+
+from ai import WIN_SCORE
+from visualization import EVAL_RANGE, eval_label, gauge_value
+
+
+@pytest.mark.parametrize("value, label, short", [
+    (WIN_SCORE, "AI wins in 1", "W1"),  # The root move wins
+    (WIN_SCORE - 2, "AI wins in 2", "W2"),
+    (-WIN_SCORE + 1, "Player wins in 1", "L1"),  # The reply wins
+    (-WIN_SCORE + 3, "Player wins in 2", "L2"),
+    (3.25, "3.2", "3.2"),
+    (0, "0.0", "0.0"),
+])
+def test_eval_label(value, label, short):
+    assert eval_label(value) == label
+    assert eval_label(value, short=True) == short
+
+
+def test_gauge_value_is_clamped():
+    assert gauge_value(WIN_SCORE) == EVAL_RANGE
+    assert gauge_value(-WIN_SCORE + 1) == -EVAL_RANGE
+    assert gauge_value(7.5) == 7.5
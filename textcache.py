@@ -0,0 +1,43 @@
+from collections import OrderedDict
+
+class TextCache:
+    def __init__(self, max_entries):
+        """Shared cache of rendered text surfaces with LRU eviction"""
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, color, antialias=True):
+        """Return font.render(text, antialias, color), rasterizing each combination once"""
+        key = (font, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        """Drop every cached surface (e.g. after fonts change)"""
+        self.surfaces.clear()
+
+    def stats(self):
+        """Counters for checking how much rasterization the cache saves"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.surfaces),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+        }
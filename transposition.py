@@ -0,0 +1,76 @@
+import itertools
+from collections import OrderedDict
+
+# Entry flags: how the stored value relates to the true minimax value
+EXACT = 0
+LOWER = 1  # Search failed high, the true value is at least the stored one
+UPPER = 2  # Search failed low, the true value is at most the stored one
+
+# Rough CPython cost of one entry: key tuple, value tuple, their ints and the
+# OrderedDict bookkeeping. Used to turn a byte budget into an entry budget.
+ESTIMATED_ENTRY_BYTES = 320
+
+_generations = itertools.count()
+
+
+class TranspositionTable:
+    def __init__(self, max_entries=None, max_bytes=None):
+        """Bounded position cache with LRU eviction that survives across moves and games"""
+        limits = [limit for limit in (max_entries, max_bytes and max_bytes // ESTIMATED_ENTRY_BYTES) if limit]
+        self.max_entries = max(1, min(limits)) if limits else None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        # Unique per table and renewed by clear(), so copies elsewhere know when to drop theirs
+        self.generation = next(_generations)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Return the (depth, value, flag, best move) entry for key, or None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def peek(self, key):
+        """Return the entry for key, or None, without counting a probe or refreshing it"""
+        return self.entries.get(key)
+
+    def store(self, key, depth, value, flag, move=None):
+        """Store a search result and the move that produced it, keeping a deeper existing entry for the same key"""
+        existing = self.entries.get(key)
+        if existing is not None:
+            self.entries.move_to_end(key)
+            if existing[0] > depth:
+                return
+        self.entries[key] = (depth, value, flag, move)
+        self.stores += 1
+
+        if self.max_entries is not None and len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        self.entries.clear()
+        self.generation = next(_generations)
+
+    def stats(self):
+        """Counters for monitoring cache effectiveness"""
+        probes = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+        }
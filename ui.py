@@ -2,12 +2,13 @@ import pygame
 from enums import AIPersonality, GameState
 
 class GameUI:
-    def __init__(self, game, screen, colors, fonts):
+    def __init__(self, game, screen, colors, fonts, text_cache):
         """Initialize the UI component"""
         self.game = game
         self.screen = screen
         self.colors = colors
         self.fonts = fonts
+        self.text_cache = text_cache
         self.play_again_rect = None
     
     def draw_ui(self, x, y):
@@ -16,14 +17,14 @@ class GameUI:
         status_text, status_color = self.get_status_text_and_color()
         status_rect = pygame.Rect(x, y, 180, 40)
         pygame.draw.rect(self.screen, self.colors['GRAY'], status_rect)
-        status_surface = self.fonts['normal'].render(status_text, True, status_color)
+        status_surface = self.text_cache.render(self.fonts['normal'], status_text, status_color)
         self.screen.blit(status_surface, (x + 10, y + 8))
         
         # Draw "Play Again" button when game is over
         if self.game.game_state != GameState.ONGOING:
             play_again_rect = pygame.Rect(x, y + 50, 180, 40)
             pygame.draw.rect(self.screen, self.colors['GREEN'], play_again_rect)
-            play_again_text = self.fonts['normal'].render("Play Again", True, self.colors['BLACK'])
+            play_again_text = self.text_cache.render(self.fonts['normal'], "Play Again", self.colors['BLACK'])
             self.screen.blit(play_again_text, (x + 40, y + 58))
             
             # Store play again rect and return it
@@ -32,7 +33,7 @@ class GameUI:
         
         # Draw AI personality selector with title
         personality_y = y + 60  # Moved up since there's no board size selector
-        personality_text = self.fonts['normal'].render("AI Personality:", True, self.colors['BLACK'])
+        personality_text = self.text_cache.render(self.fonts['normal'], "AI Personality:", self.colors['BLACK'])
         self.screen.blit(personality_text, (x, personality_y))
         
         for i, personality in enumerate(AIPersonality):
@@ -40,32 +41,36 @@ class GameUI:
             color = self.colors['GREEN'] if self.game.ai_personality == personality else self.colors['GRAY']
             pygame.draw.rect(self.screen, color, rect)
             pygame.draw.rect(self.screen, self.colors['BLACK'], rect, 2)  # Border
-            p_text = self.fonts['normal'].render(personality.name, True, self.colors['BLACK'])
+            p_text = self.text_cache.render(self.fonts['normal'], personality.name, self.colors['BLACK'])
             self.screen.blit(p_text, (x + 10, personality_y + 35 + i*35))
         
-        # Draw algorithm visualization toggle
-        vis_y = personality_y + 210
-        vis_text = self.fonts['normal'].render("Algorithm Visualization:", True, self.colors['BLACK'])
+        # Draw algorithm visualization toggle below however many personalities there are
+        vis_y = self.toggle_y(personality_y)
+        vis_text = self.text_cache.render(self.fonts['normal'], "Algorithm Visualization:", self.colors['BLACK'])
         self.screen.blit(vis_text, (x, vis_y))
         
         vis_rect = pygame.Rect(x, vis_y + 30, 180, 30)
         vis_color = self.colors['GREEN'] if self.game.show_algorithm else self.colors['GRAY']
         pygame.draw.rect(self.screen, vis_color, vis_rect)
         pygame.draw.rect(self.screen, self.colors['BLACK'], vis_rect, 2)  # Border
-        toggle_text = self.fonts['normal'].render("ON" if self.game.show_algorithm else "OFF", True, self.colors['BLACK'])
+        toggle_text = self.text_cache.render(self.fonts['normal'], "ON" if self.game.show_algorithm else "OFF", self.colors['BLACK'])
         self.screen.blit(toggle_text, (x + 80, vis_y + 35))
         
         # Draw reset button with better styling
         reset_rect = pygame.Rect(x, vis_y + 80, 180, 40)
         pygame.draw.rect(self.screen, self.colors['RED'], reset_rect)
         pygame.draw.rect(self.screen, self.colors['BLACK'], reset_rect, 2)  # Border
-        reset_text = self.fonts['normal'].render("Reset Game", True, self.colors['WHITE'])
+        reset_text = self.text_cache.render(self.fonts['normal'], "Reset Game", self.colors['WHITE'])
         self.screen.blit(reset_text, (x + 40, vis_y + 90))
         
         # Reset play_again_rect when game is ongoing
         self.play_again_rect = None
         return reset_rect
     
+    def toggle_y(self, personality_y):
+        """Top of the visualization toggle, just below the personality buttons"""
+        return personality_y + 35 + len(AIPersonality) * 35
+
     def get_status_text_and_color(self):
         """Get game status text and color"""
         if self.game.game_state == GameState.PLAYER_WIN:
@@ -93,14 +98,14 @@ class GameUI:
         for i, personality in enumerate(AIPersonality):
             rect = pygame.Rect(ui_x, personality_y + 30 + i*35, 180, 30)
             if rect.collidepoint(pos):
-                self.game.ai_personality = personality
+                self.game.set_ai_personality(personality)
                 return True
         
         # Algorithm visualization toggle
-        vis_y = personality_y + 210
+        vis_y = self.toggle_y(personality_y)
         vis_rect = pygame.Rect(ui_x, vis_y + 30, 180, 30)
         if vis_rect.collidepoint(pos):
-            self.game.show_algorithm = not self.game.show_algorithm
+            self.game.set_show_algorithm(not self.game.show_algorithm)
             return True
         
         # Reset button
@@ -1,130 +1,198 @@
 import pygame
 
+from ai import WIN_SCORE, WIN_THRESHOLD
+
+EVAL_RANGE = 20  # Score at either end of the gauge
+
+
+def win_moves(value):
+    """Moves the winner needs for the forced win a score stands for, or None for a heuristic score
+
+    Scores count plies from the root move (WIN_SCORE - depth); the root move
+    is the AI's first move and the reply the player's first.
+    """
+    if abs(value) <= WIN_THRESHOLD:
+        return None
+    plies = WIN_SCORE - abs(value) + 1
+    return (plies + 1) // 2
+
+
+def gauge_value(value):
+    """A score clamped to the gauge, so forced wins pin it to their side's end"""
+    return max(-EVAL_RANGE, min(EVAL_RANGE, value))
+
+
+def eval_label(value, short=False):
+    """Text for a score: the forced win it stands for, or the heuristic value
+
+    short gives node labels: W3 / L3 for an AI win / loss in 3.
+    """
+    moves = win_moves(value)
+    if moves is None:
+        return f"{value:.1f}"
+    if short:
+        return f"{'W' if value > 0 else 'L'}{moves}"
+    return f"{'AI' if value > 0 else 'Player'} wins in {moves}"
+
+
 class AlgorithmVisualizer:
-    def __init__(self, screen, colors, fonts):
+    def __init__(self, screen, colors, fonts, text_cache):
         """Initialize the visualization component"""
         self.screen = screen
         self.colors = colors
         self.fonts = fonts
-    
-    def draw_algorithm_visualization(self, x, y, width, height, tree_nodes, pruned_nodes, current_eval):
-        """Draw the algorithm visualization panel"""
+        self.text_cache = text_cache
+
+        # The panel only changes when a search finishes, so it is rendered
+        # once into an off-screen surface and blitted every frame after that
+        self.panel_surface = None
+        self.panel_key = None
+
+    def draw_algorithm_visualization(self, x, y, width, height, trace, current_eval, generation, mcts_stats=None):
+        """Draw the algorithm visualization panel, re-rendering only after a new search"""
+        key = (width, height, current_eval, generation)
+        if key != self.panel_key:
+            self.panel_surface = self.render_panel(width, height, trace, current_eval, mcts_stats)
+            self.panel_key = key
+        self.screen.blit(self.panel_surface, (x, y))
+
+    def render_panel(self, width, height, trace, current_eval, mcts_stats=None):
+        """Render the whole panel into a new surface"""
+        surface = pygame.Surface((width, height))
+        x, y = 0, 0
+
         # Draw background panel with gradient effect
-        pygame.draw.rect(self.screen, self.colors['GRAY'], (x, y, width, height))
-        pygame.draw.rect(self.screen, self.colors['BLACK'], (x, y, width, height), 2)
-        
+        pygame.draw.rect(surface, self.colors['GRAY'], (x, y, width, height))
+        pygame.draw.rect(surface, self.colors['BLACK'], (x, y, width, height), 2)
+
         # Title with better styling
-        panel_title = self.fonts['normal'].render("Algorithm Visualization", True, self.colors['BLACK'])
+        panel_title = self.text_cache.render(self.fonts['normal'], "Algorithm Visualization", self.colors['BLACK'])
         title_bg = pygame.Rect(x, y, width, 40)
-        pygame.draw.rect(self.screen, self.colors['LIGHT_BLUE'], title_bg)
-        pygame.draw.rect(self.screen, self.colors['BLACK'], title_bg, 2)
-        self.screen.blit(panel_title, (x + (width - panel_title.get_width()) // 2, y + 10))
-        
+        pygame.draw.rect(surface, self.colors['LIGHT_BLUE'], title_bg)
+        pygame.draw.rect(surface, self.colors['BLACK'], title_bg, 2)
+        surface.blit(panel_title, (x + (width - panel_title.get_width()) // 2, y + 10))
+
         # Draw evaluation gauge
         gauge_y = y + 60
-        pygame.draw.rect(self.screen, self.colors['WHITE'], (x + 20, gauge_y, width - 40, 30))
-        pygame.draw.rect(self.screen, self.colors['BLACK'], (x + 20, gauge_y, width - 40, 30), 2)
-        
+        pygame.draw.rect(surface, self.colors['WHITE'], (x + 20, gauge_y, width - 40, 30))
+        pygame.draw.rect(surface, self.colors['BLACK'], (x + 20, gauge_y, width - 40, 30), 2)
+
         # Gauge center line
         center_x = x + 20 + (width - 40) // 2
-        pygame.draw.line(self.screen, self.colors['BLACK'], 
+        pygame.draw.line(surface, self.colors['BLACK'],
                          (center_x, gauge_y), (center_x, gauge_y + 30), 2)
-        
-        # Current evaluation marker
-        eval_range = 20  # Scale factor
-        marker_x = x + 20 + (width - 40) // 2 + int(current_eval * (width - 40) / (2 * eval_range))
+
+        # Current evaluation marker; win scores are clamped before any scaling
+        gauge_eval = gauge_value(current_eval)
+        marker_x = x + 20 + (width - 40) // 2 + int(gauge_eval * (width - 40) / (2 * EVAL_RANGE))
         marker_x = max(x + 20, min(x + width - 20, marker_x))
-        
+
         # Draw a more visible marker
-        pygame.draw.circle(self.screen, self.colors['RED'], (marker_x, gauge_y + 15), 10)
-        pygame.draw.circle(self.screen, self.colors['BLACK'], (marker_x, gauge_y + 15), 10, 2)
-        
+        pygame.draw.circle(surface, self.colors['RED'], (marker_x, gauge_y + 15), 10)
+        pygame.draw.circle(surface, self.colors['BLACK'], (marker_x, gauge_y + 15), 10, 2)
+
         # Fill gauge based on evaluation
-        if current_eval > 0:  # AI advantage
-            advantage_width = int(current_eval * (width - 40) / (2 * eval_range))
+        if gauge_eval > 0:  # AI advantage
+            advantage_width = int(gauge_eval * (width - 40) / (2 * EVAL_RANGE))
             advantage_width = min(advantage_width, (width - 40) // 2)
-            pygame.draw.rect(self.screen, (255, 200, 200), 
+            pygame.draw.rect(surface, (255, 200, 200),
                            (center_x, gauge_y + 1, advantage_width, 28))
-        elif current_eval < 0:  # Player advantage
-            advantage_width = int(-current_eval * (width - 40) / (2 * eval_range))
+        elif gauge_eval < 0:  # Player advantage
+            advantage_width = int(-gauge_eval * (width - 40) / (2 * EVAL_RANGE))
             advantage_width = min(advantage_width, (width - 40) // 2)
-            pygame.draw.rect(self.screen, (200, 200, 255), 
+            pygame.draw.rect(surface, (200, 200, 255),
                            (center_x - advantage_width, gauge_y + 1, advantage_width, 28))
-        
+
         # Draw labels with better positioning
-        ai_win = self.fonts['normal'].render("AI Win", True, self.colors['RED'])
-        player_win = self.fonts['normal'].render("Player Win", True, self.colors['BLUE'])
-        self.screen.blit(ai_win, (x + width - 100, gauge_y + 5))
-        self.screen.blit(player_win, (x + 30, gauge_y + 5))
-        
+        ai_win = self.text_cache.render(self.fonts['normal'], "AI Win", self.colors['RED'])
+        player_win = self.text_cache.render(self.fonts['normal'], "Player Win", self.colors['BLUE'])
+        surface.blit(ai_win, (x + width - 100, gauge_y + 5))
+        surface.blit(player_win, (x + 30, gauge_y + 5))
+
         # Draw current evaluation text
-        eval_text = self.fonts['normal'].render(f"Eval: {current_eval:.1f}", True, self.colors['BLACK'])
-        self.screen.blit(eval_text, (x + (width - eval_text.get_width()) // 2, gauge_y + 40))
-        
+        eval_text = self.text_cache.render(self.fonts['normal'], f"Eval: {eval_label(current_eval)}", self.colors['BLACK'])
+        surface.blit(eval_text, (x + (width - eval_text.get_width()) // 2, gauge_y + 40))
+
         # Draw search tree stats with styled background
         tree_start_y = gauge_y + 80
         stats_bg = pygame.Rect(x + 10, tree_start_y, width - 20, 70)
-        pygame.draw.rect(self.screen, self.colors['LIGHT_GREEN'], stats_bg)
-        pygame.draw.rect(self.screen, self.colors['BLACK'], stats_bg, 2)
-        
-        # Default to 0 when no nodes
-        node_count = len(tree_nodes) if tree_nodes else 0
-        pruned_count = len(pruned_nodes) if pruned_nodes else 0
-        
-        nodes_text = self.fonts['normal'].render(f"Nodes explored: {node_count}", True, self.colors['BLACK'])
-        pruned_text = self.fonts['normal'].render(f"Nodes pruned: {pruned_count}", True, self.colors['BLACK'])
-        self.screen.blit(nodes_text, (x + 20, tree_start_y + 10))
-        self.screen.blit(pruned_text, (x + 20, tree_start_y + 40))
-        
+        pygame.draw.rect(surface, self.colors['LIGHT_GREEN'], stats_bg)
+        pygame.draw.rect(surface, self.colors['BLACK'], stats_bg, 2)
+
+        if mcts_stats:
+            # Tree search: playouts run and how often the chosen move was visited
+            first_line = f"Playouts: {mcts_stats['rollouts']}"
+            second_line = f"Best: {mcts_stats['visits']} visits, {mcts_stats['value']:+.2f}"
+        else:
+            # Totals include nodes that did not fit in the trace buffer
+            first_line = f"Nodes explored: {trace.total}"
+            second_line = f"Nodes pruned: {trace.pruned_total}"
+
+        nodes_text = self.text_cache.render(self.fonts['normal'], first_line, self.colors['BLACK'])
+        pruned_text = self.text_cache.render(self.fonts['normal'], second_line, self.colors['BLACK'])
+        surface.blit(nodes_text, (x + 20, tree_start_y + 10))
+        surface.blit(pruned_text, (x + 20, tree_start_y + 40))
+
         # Draw a simple tree representation if we have nodes
+        tree_nodes = trace.nodes()
         if tree_nodes:
-            tree_title = self.fonts['normal'].render("Decision Tree", True, self.colors['BLACK'])
-            self.screen.blit(tree_title, (x + (width - tree_title.get_width()) // 2, tree_start_y + 90))
-            
+            tree_title = self.text_cache.render(self.fonts['normal'], "Decision Tree", self.colors['BLACK'])
+            surface.blit(tree_title, (x + (width - tree_title.get_width()) // 2, tree_start_y + 90))
+
             tree_height = height - tree_start_y - 130
             tree_width = width - 40
-            
-            max_depth = max([node[0] for node in tree_nodes]) if tree_nodes else 0
+
+            max_depth = max(node[0] for node in tree_nodes)
             if max_depth > 0:
                 level_height = tree_height / (max_depth + 1)
-                
-                # Draw connecting lines first
-                for i, (depth, node_id, parent_id, value, pruned) in enumerate(tree_nodes):
-                    if parent_id is not None:
-                        # Find parent coordinates
-                        parent_x, parent_y = None, None
-                        for d, nid, pid, v, p in tree_nodes:
-                            if nid == parent_id:
-                                parent_y = tree_start_y + 120 + d * level_height
-                                parent_x = x + 20 + (tree_width * nid) / (2**(d+1))
-                                break
-                        
-                        if parent_x is not None:
-                            node_y = tree_start_y + 120 + depth * level_height
-                            node_x = x + 20 + (tree_width * node_id) / (2**(depth+1))
-                            line_color = self.colors['RED'] if pruned else self.colors['BLACK']
-                            pygame.draw.line(self.screen, line_color, 
-                                            (parent_x, parent_y),  # type: ignore
-                                            (node_x, node_y), 2)
-                
-                # Draw nodes
-                for depth, node_id, parent_id, value, pruned in tree_nodes:
-                    node_y = tree_start_y + 120 + depth * level_height
-                    # Position horizontally based on binary tree layout
-                    node_x = x + 20 + (tree_width * node_id) / (2**(depth+1))
-                    
-                    # Node circle with border
-                    node_color = self.colors['RED'] if pruned else self.colors['BLUE']
-                    pygame.draw.circle(self.screen, node_color, (int(node_x), int(node_y)), 10)
-                    pygame.draw.circle(self.screen, self.colors['BLACK'], (int(node_x), int(node_y)), 10, 2)
-                    
-                    # Value text with background for better visibility
-                    if value is not None:
-                        value_text = self.fonts['small'].render(f"{value:.1f}", True, self.colors['BLACK'])
-                        text_bg_rect = pygame.Rect(
-                            node_x - 15, node_y + 15, 
-                            value_text.get_width() + 6, value_text.get_height() + 2
-                        )
-                        pygame.draw.rect(self.screen, self.colors['WHITE'], text_bg_rect)
-                        pygame.draw.rect(self.screen, self.colors['BLACK'], text_bg_rect, 1)
-                        self.screen.blit(value_text, (node_x - 12, node_y + 16))
\ No newline at end of file
+                positions, first_by_id = self.build_layout(
+                    tree_nodes, x + 20, tree_start_y + 120, tree_width, level_height)
+                self.draw_tree(surface, tree_nodes, positions, first_by_id, width)
+
+        return surface
+
+    def build_layout(self, tree_nodes, left, top, tree_width, level_height):
+        """Compute node positions, indexing the first node of each id for parent lookups"""
+        positions = []
+        first_by_id = {}
+        for depth, node_id, parent_id, value, pruned in tree_nodes:
+            # Position horizontally based on binary tree layout
+            position = (left + (tree_width * node_id) / (2**(depth+1)), top + depth * level_height)
+            positions.append(position)
+            first_by_id.setdefault(node_id, position)
+        return positions, first_by_id
+
+    def draw_tree(self, surface, tree_nodes, positions, first_by_id, width):
+        """Draw connecting lines, then nodes, from a precomputed layout"""
+        # Most ids lay out far beyond the panel's right edge; skip what would be clipped
+        visible_right = width + 20
+
+        # Draw connecting lines first
+        for (depth, node_id, parent_id, value, pruned), (node_x, node_y) in zip(tree_nodes, positions):
+            if parent_id is not None and parent_id in first_by_id:
+                parent_x, parent_y = first_by_id[parent_id]
+                if min(parent_x, node_x) > visible_right:
+                    continue
+                line_color = self.colors['RED'] if pruned else self.colors['BLACK']
+                pygame.draw.line(surface, line_color, (parent_x, parent_y), (node_x, node_y), 2)
+
+        # Draw nodes
+        for (depth, node_id, parent_id, value, pruned), (node_x, node_y) in zip(tree_nodes, positions):
+            if node_x > visible_right:
+                continue
+
+            # Node circle with border
+            node_color = self.colors['RED'] if pruned else self.colors['BLUE']
+            pygame.draw.circle(surface, node_color, (int(node_x), int(node_y)), 10)
+            pygame.draw.circle(surface, self.colors['BLACK'], (int(node_x), int(node_y)), 10, 2)
+
+            # Value text with background for better visibility
+            if value is not None:
+                value_text = self.text_cache.render(self.fonts['small'], eval_label(value, short=True), self.colors['BLACK'])
+                text_bg_rect = pygame.Rect(
+                    node_x - 15, node_y + 15,
+                    value_text.get_width() + 6, value_text.get_height() + 2
+                )
+                pygame.draw.rect(surface, self.colors['WHITE'], text_bg_rect)
+                pygame.draw.rect(surface, self.colors['BLACK'], text_bg_rect, 1)
+                surface.blit(value_text, (node_x - 12, node_y + 16))